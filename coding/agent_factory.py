@@ -0,0 +1,155 @@
+import os
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import streamlit as st
+from autogen import AssistantAgent, ConversableAgent, LLMConfig, UserProxyAgent
+from autogen.code_utils import content_str
+from autogen.tools import Tool
+
+from coding.agenttools import AGENT_TOOLS
+from coding.chat_runner import async_tool
+from coding.chat_stream import announce_speaker
+
+ModelKey = Tuple[Tuple[str, Any], ...]
+
+# ag2's google client ignores stream=True, so replies are streamed through Gemini's
+# OpenAI-compatible endpoint; LLM_STREAM=0 opts out and keeps the native google client
+GEMINI_OPENAI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+LLM_STREAM = os.getenv("LLM_STREAM", "1") != "0"
+
+
+class AgentSpec(NamedTuple):
+    """
+    Definition of one agent. `template` may contain '{lang_setting}', which is
+    filled in when the team is built.
+    """
+    name: str
+    template: str
+    tools: Tuple[str, ...] = ()
+    max_auto_reply: Optional[int] = None
+    assistant: bool = False  # AssistantAgent instead of ConversableAgent
+
+
+class AgentTeam:
+    """
+    Agents of one page for one session, with their tools registered. Each
+    session gets its own agents (see session_team), so chats of different
+    users never share agent state and run side by side; only the immutable
+    parts (TeamBlueprint) are shared by the process.
+    """
+
+    def __init__(self, agents: Dict[str, ConversableAgent], user_proxy: Optional[UserProxyAgent]):
+        self.agents = agents
+        self.user_proxy = user_proxy
+
+    def __getitem__(self, name: str) -> ConversableAgent:
+        return self.agents[name]
+
+
+class TeamBlueprint(NamedTuple):
+    """What every session's team shares: rendered system messages, the LLM config and the tools."""
+    specs: Tuple[AgentSpec, ...]
+    system_messages: Dict[str, str]
+    llm_config: LLMConfig
+    tools: Dict[str, Tool]
+    termination: Optional[Tuple[str, ...]]
+
+
+def model_key(**config) -> ModelKey:
+    """Hashable form of LLMConfig keyword arguments, usable as a cache key."""
+    return tuple(sorted(config.items()))
+
+
+def gemini_model(model: str, api_key: Optional[str], stream: bool = LLM_STREAM) -> ModelKey:
+    """
+    Model key for a Gemini model. With `stream`, the OpenAI-compatible
+    endpoint is used so tokens reach the IOStream as they are generated.
+    """
+    if stream:
+        return model_key(api_type="openai", base_url=GEMINI_OPENAI_BASE_URL,
+                         model=model, api_key=api_key, stream=True)
+    return model_key(api_type="google", model=model, api_key=api_key)
+
+
+def termination_check(tokens: Tuple[str, ...]) -> Callable[[dict], bool]:
+    def is_termination_msg(msg: dict) -> bool:
+        content = content_str(msg.get("content"))
+        return any(token in content for token in tokens)
+    return is_termination_msg
+
+
+@st.cache_resource(show_spinner=False)
+def team_blueprint(specs: Tuple[AgentSpec, ...],
+                   lang_setting: str,
+                   model: ModelKey,
+                   termination: Optional[Tuple[str, ...]] = None) -> TeamBlueprint:
+    """
+    Render the personas, build the LLMConfig and the tool schemas once per
+    process for one (specs, language, model) combination.
+
+    Args:
+        specs (Tuple[AgentSpec, ...]): Agents to build.
+        lang_setting (str): Output language substituted into the templates.
+        model (ModelKey): model_key(api_type=..., model=..., api_key=...).
+        termination (Tuple[str, ...], optional): Tokens that end a chat; when
+            given, teams get a user proxy that executes the agents' tools.
+    """
+    tools: Dict[str, Tool] = {}
+    if termination is not None:
+        for spec in specs:
+            for name in spec.tools:
+                description, func = AGENT_TOOLS[name]
+                # coroutine tools run concurrently when the model calls several at once
+                tools[name] = Tool(name=name, description=description, func_or_tool=async_tool(func))
+    return TeamBlueprint(
+        specs=specs,
+        system_messages={spec.name: spec.template.replace("{lang_setting}", lang_setting) for spec in specs},
+        llm_config=LLMConfig(**dict(model)),
+        tools=tools,
+        termination=termination,
+    )
+
+
+def build_team(blueprint: TeamBlueprint) -> AgentTeam:
+    """Build fresh agents from a blueprint and register their tools."""
+    agents: Dict[str, ConversableAgent] = {}
+    for spec in blueprint.specs:
+        agent_cls = AssistantAgent if spec.assistant else ConversableAgent
+        agents[spec.name] = agent_cls(
+            name=spec.name,
+            system_message=blueprint.system_messages[spec.name],
+            llm_config=blueprint.llm_config,
+            max_consecutive_auto_reply=spec.max_auto_reply,
+        )
+        agents[spec.name].register_hook("update_agent_state", announce_speaker)
+
+    user_proxy = None
+    if blueprint.termination is not None:
+        user_proxy = UserProxyAgent(
+            "user_proxy",
+            human_input_mode="NEVER",
+            code_execution_config=False,
+            is_termination_msg=termination_check(blueprint.termination),
+        )
+        for spec in blueprint.specs:
+            for name in spec.tools:
+                blueprint.tools[name].register_for_llm(agents[spec.name])
+                blueprint.tools[name].register_for_execution(user_proxy)
+
+    return AgentTeam(agents, user_proxy)
+
+
+def session_team(specs: Tuple[AgentSpec, ...],
+                 lang_setting: str,
+                 model: ModelKey,
+                 termination: Optional[Tuple[str, ...]] = None) -> AgentTeam:
+    """
+    The current session's team for this combination, built on first use and
+    kept in st.session_state, so reruns reuse it and other sessions never
+    wait on it. Arguments are those of team_blueprint.
+    """
+    teams = st.session_state.setdefault("agent_teams", {})
+    key = (specs, lang_setting, model, termination)
+    if key not in teams:
+        teams[key] = build_team(team_blueprint(specs, lang_setting, model, termination))
+    return teams[key]
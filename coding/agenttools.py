@@ -1,25 +1,25 @@
 from typing import List, Dict, Optional, Any, Annotated
-from coding.tools import search_expert, search_textbook, search_news, fetch_all_news
+from coding.tools import search_news
+from coding.catalog import EXPERT_CATALOG, TEXTBOOK_CATALOG
+from coding.news_cache import get_news_index
+from coding.job_retrieval import get_job_retriever
+from coding.job_query import ORDERS, get_job_query_index
+from coding.token_budget import fit_records
 from datetime import datetime
 import streamlit as st
 
+NEWS_FIELDS = ["ar_head", "ar_desc", "ar_section", "ar_pubdate", "url"]
+
 def AG_search_expert(
     name: Annotated[Optional[str], "Expert name."] = None,
     discipline: Annotated[Optional[List[str]], "List of input strings containing disciplines to filter by."] = None,
     interest: Annotated[Optional[List[str]], "List of input strings containing interests to filter by."] = None
 ):
     """
-    Wrapper around search_expert that accepts lists for discipline and interest.
+    Wrapper around the expert catalog that accepts lists for discipline and interest.
+    Returns experts matching ANY of the given values, answered in one pass.
     """
-    # If multiple disciplines or interests are provided, return experts matching ANY of them
-    matched = []
-    for d in (discipline or []):
-        matched.extend(search_expert(name=name, discipline=d, interest=None))
-    for i in (interest or []):
-        matched.extend(search_expert(name=name, discipline=None, interest=i))
-    # If no lists provided, fall back to single-value search
-    if not discipline and not interest:
-        matched = search_expert(name=name)
+    matched = EXPERT_CATALOG.search(NAME=[name], DISCIPLINE=discipline, INTEREST=interest)
     # Deduplicate results
     unique = {expert["EMAIL"]: expert for expert in matched if "EMAIL" in expert}
     return list(unique.values())
@@ -30,15 +30,9 @@ def AG_search_textbook(
     related_expert: Annotated[Optional[List[str]], "List of input strings containing related expert names to filter by."] = None
 ):
     """
-    Wrapper around search_textbook that accepts lists for discipline and related_expert.
+    Wrapper around the textbook catalog that accepts lists for discipline and related_expert.
     """
-    matched = []
-    for d in (discipline or []):
-        matched.extend(search_textbook(title=title, discipline=d, related_expert=None))
-    for e in (related_expert or []):
-        matched.extend(search_textbook(title=title, discipline=None, related_expert=e))
-    if not discipline and not related_expert:
-        matched = search_textbook(title=title)
+    matched = TEXTBOOK_CATALOG.search(TITLE=[title], DISCIPLINE=discipline, RELATED_EXPERT=related_expert)
     unique = {tb["TITLE"]: tb for tb in matched if "TITLE" in tb}
     return list(unique.values())
 
@@ -63,23 +57,85 @@ def AG_search_news(
         Optional[str],
         "End date inclusive, 'YYYY-MM-DD'"
     ] = None
-) -> List[Dict[str, Any]]:
+) -> Dict[str, Any]:
     """
-    Tool wrapper: takes a list-of-dicts, runs search_news, returns list-of-dicts.
+    Tool wrapper: runs search_news and returns the matching articles, ranked.
+    News is served from the process-wide cache and its search index, so a tool call is an in-memory lookup.
+    Articles are projected to NEWS_FIELDS and capped to the tool token budget.
     """
-    df = fetch_all_news(1,5,list_type='all')
+    index = get_news_index(1, 5, list_type='all')
 
     # Apply search
     result_df = search_news(
-        df=df,
+        df=None,
+        index=index,
         query=query,
         search_columns=search_columns,
         sections=sections,
         date_from=date_from,
         date_to=date_to
     )
-    # Return as plain JSON-serializable list
-    return result_df.to_dict(orient="records")
+    articles, report = fit_records(result_df.to_dict(orient="records"), "AG_search_news", fields=NEWS_FIELDS)
+    return {"total": report.total, "returned": report.returned, "articles": articles}
+
+def AG_retrieve_jobs(
+    query: Annotated[str, "What the student is looking for: a job title, skills or interests, e.g. '資料分析 Python'"],
+    location: Annotated[Optional[str], "Only jobs whose jobAddrNoDesc contains this text, e.g. '台北市' or '新竹'"] = None,
+    salary_type: Annotated[Optional[str], "'H' for hourly or 'M' for monthly pay"] = None,
+    min_salary: Annotated[Optional[int], "Minimum salaryLow, in the unit of salary_type"] = None,
+    top_k: Annotated[int, "Number of jobs to return (1-10)"] = 5
+) -> List[Dict[str, Any]]:
+    """
+    Semantic search over the 104 internship postings (jobName + description).
+    Returns the top-k matching jobs with a short snippet, so answers cite real rows.
+    """
+    retriever = get_job_retriever("104")
+    hits = retriever.search(
+        query,
+        top_k=max(1, min(int(top_k), 10)),
+        location=location,
+        min_salary=min_salary,
+        salary_type=salary_type,
+    )
+    return fit_records(hits, "AG_retrieve_jobs")[0]
+
+def AG_search_jobs(
+    location: Annotated[Optional[List[str]], "jobAddrNoDesc contains any of these, e.g. ['台北市', '新北市板橋區']"] = None,
+    industry: Annotated[Optional[List[str]], "coIndustryDesc contains any of these, e.g. ['半導體', '銀行']"] = None,
+    salary_type: Annotated[Optional[str], "'H' for hourly or 'M' for monthly pay"] = None,
+    min_salary: Annotated[Optional[int], "Minimum salaryLow, in the unit of salary_type"] = None,
+    max_salary: Annotated[Optional[int], "Maximum salaryHigh, in the unit of salary_type"] = None,
+    posted_after: Annotated[Optional[str], "Only jobs posted on or after 'YYYY-MM-DD'"] = None,
+    near: Annotated[Optional[str], "A place to search around: an MRT station, landmark or district, e.g. '捷運港墘站'"] = None,
+    within_km: Annotated[Optional[float], "Radius around `near` in km"] = None,
+    order_by: Annotated[str, "'date' (newest first), 'salary' (highest first) or 'distance' (needs near)"] = "date",
+    limit: Annotated[int, "Number of jobs to return (1-20)"] = 10
+) -> Dict[str, Any]:
+    """
+    Structured filter over the 104 internship postings: location, industry,
+    salary range, posting date and distance, all combinable.
+    Returns the total number of matches and the first `limit` jobs.
+    """
+    index = get_job_query_index("104")
+    center = None
+    if near:
+        center = index.locate(near)
+        if center is None:
+            return {"total": 0, "jobs": [], "error": f"unknown place: {near}"}
+    result = index.query(
+        locations=location,
+        industries=industry,
+        salary_type=salary_type,
+        min_salary=min_salary,
+        max_salary=max_salary,
+        posted_after=posted_after,
+        near=center,
+        within_km=within_km or (3.0 if center else None),
+        order_by=order_by if order_by in ORDERS else "date",
+        limit=max(1, min(int(limit), 20)),
+    )
+    result["jobs"] = fit_records(result["jobs"], "AG_search_jobs")[0]
+    return result
 
 def get_time() -> str:
         """
@@ -97,4 +153,15 @@ def get_time() -> str:
         except Exception as e:
             current_time = "2024-10-01 12:00:00"
 
-        return f"Current time in your location: {current_time}"
\ No newline at end of file
+        return f"Current time in your location: {current_time}"
+
+
+# Tools the agent factory can register: name -> (description for the LLM, function)
+AGENT_TOOLS = {
+    "get_time": ("Retrieve the current date and time.", get_time),
+    "AG_search_expert": ("Search EXPERTS_LIST by name, discipline, or interest.", AG_search_expert),
+    "AG_search_textbook": ("Search TEXTBOOK_LIST by title, discipline, or related_expert.", AG_search_textbook),
+    "AG_search_news": ("Search a pre-fetched news DataFrame by keywords, sections, and date range.", AG_search_news),
+    "AG_retrieve_jobs": ("Find 104 internship postings similar to a query, optionally filtered by location and salary.", AG_retrieve_jobs),
+    "AG_search_jobs": ("Filter 104 internship postings by location, industry, salary range, posting date or distance from a place.", AG_search_jobs),
+}
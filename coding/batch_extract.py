@@ -0,0 +1,138 @@
+import json
+import re
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+
+Item = Tuple[Hashable, str]
+
+CJK_RE = re.compile(r"[\u3000-\u9fff\uff00-\uffef]")
+LENGTH_ERROR_MARKERS = ("context length", "context_length", "context window", "too long", "too many tokens",
+                        "token limit", "maximum context", "exceeds the maximum", "max_tokens")
+
+
+def is_length_error(e: Exception) -> bool:
+    """Request rejected because the prompt or the reply is too long for the model."""
+    status = getattr(e, "status_code", None) or getattr(e, "code", None) or getattr(e, "status", None)
+    if str(status) == "413":
+        return True
+    text = str(e).lower()
+    return any(s in text for s in LENGTH_ERROR_MARKERS)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~1 token per CJK character, ~4 characters per token otherwise."""
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+def plan_batches(items: Sequence[Item],
+                 max_items: int = 20,
+                 input_budget: int = 6000,
+                 output_budget: int = 8000,
+                 output_per_item: int = 256) -> List[List[Item]]:
+    """
+    Greedily pack items into batches that stay under both token budgets, so
+    long descriptions get small batches and short ones large batches.
+
+    Args:
+        items (Sequence[Item]): (id, text) pairs.
+        max_items (int): Hard cap on items per batch.
+        input_budget (int): Estimated prompt tokens allowed per batch.
+        output_budget (int): Reply tokens allowed per batch (the request's max_tokens).
+        output_per_item (int): Reply tokens reserved for each item.
+
+    Returns:
+        List[List[Item]]: Batches in input order.
+    """
+    max_items = max(1, min(max_items, output_budget // output_per_item))
+    batches: List[List[Item]] = []
+    current: List[Item] = []
+    used = 0
+    for item in items:
+        cost = estimate_tokens(item[1]) + 16  # id and JSON framing
+        if current and (len(current) >= max_items or used + cost > input_budget):
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_prompt(batch: Sequence[Item]) -> str:
+    payload = [{"id": str(item_id), "text": text} for item_id, text in batch]
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def parse_batch_reply(reply: str, batch: Sequence[Item]) -> Dict[Hashable, str]:
+    """
+    Parse a reply of the form [{"id": "...", "content": "..."}, ...].
+
+    Only items of `batch` whose id came back with a string content are
+    returned; anything missing or malformed is left for a retry.
+    """
+    if not reply:
+        return {}
+    text = reply.strip()
+    fence = re.search(r"```(?:json)?\s*(.*?)```", text, flags=re.S)
+    if fence:
+        text = fence.group(1)
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+
+    wanted = {str(item_id): item_id for item_id, _ in batch}
+    results: Dict[Hashable, str] = {}
+    for entry in data if isinstance(data, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        key = str(entry.get("id"))
+        content = entry.get("content")
+        if key in wanted and isinstance(content, str):
+            results[wanted[key]] = content.strip()
+    return results
+
+
+def extract_batch(call: Callable[[str], str], batch: Sequence[Item]) -> Tuple[Dict[Hashable, str], List[Item]]:
+    """
+    Send one batch; items missing from the reply (an unparsable or truncated
+    reply, or a request rejected as too long) are re-split into halves and
+    retried, down to single items.
+
+    Args:
+        call (callable): Sends a prompt to the batch LLM and returns its text reply.
+        batch (Sequence[Item]): (id, text) pairs.
+
+    Returns:
+        Tuple[dict, list]: (id -> extracted content, items that failed even alone).
+
+    Raises:
+        Exception: Any error from `call` other than a length error (throttling,
+            auth, network, ...), unchanged; smaller batches would not help.
+    """
+    try:
+        results = parse_batch_reply(call(build_batch_prompt(batch)), batch)
+    except Exception as e:
+        if not is_length_error(e):
+            raise
+        results = {}
+
+    missing = [item for item in batch if item[0] not in results]
+    if not missing:
+        return results, []
+    if len(batch) == 1:
+        return results, missing
+
+    failed: List[Item] = []
+    half = (len(missing) + 1) // 2
+    for part in (missing[:half], missing[half:]):
+        if not part:
+            continue
+        sub_results, sub_failed = extract_batch(call, part)
+        results.update(sub_results)
+        failed.extend(sub_failed)
+    return results, failed
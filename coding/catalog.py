@@ -0,0 +1,116 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from coding.constant import EXPERTS_LIST, TEXTBOOK_LIST
+
+TOKEN_RE = re.compile(r"\w+")
+GRAM = 3  # longest character n-gram indexed per token
+
+
+def ngrams(token: str, n: int) -> Set[str]:
+    return {token[i:i + n] for i in range(len(token) - n + 1)}
+
+
+class Catalog:
+    """
+    Searchable list of catalog entries (experts, textbooks, ...).
+
+    Lowercased fields and a token -> entry-id index are computed once, so a
+    query only verifies the entries sharing its tokens instead of lowercasing
+    every field of every entry. Matching keeps the old semantics: a value
+    matches when it is a case-insensitive substring of the field.
+
+    A query token may be a fragment of an indexed token ("socio" in
+    "sociology"); a character n-gram -> token index (all 1..GRAM-grams)
+    finds those tokens without scanning the vocabulary.
+
+    Args:
+        entries (Iterable[dict]): Catalog entries.
+        fields (Sequence[str]): Fields that can be searched.
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, str]], fields: Sequence[str]):
+        self.entries = list(entries)
+        self.fields = list(fields)
+        self.lower = [{f: str(e.get(f, "")).lower() for f in self.fields} for e in self.entries]
+        self.tokens: Dict[str, Dict[str, Set[int]]] = {f: {} for f in self.fields}
+        for i, row in enumerate(self.lower):
+            for f in self.fields:
+                for token in TOKEN_RE.findall(row[f]):
+                    self.tokens[f].setdefault(token, set()).add(i)
+        self.grams: Dict[str, Dict[str, Set[str]]] = {f: {} for f in self.fields}
+        for f in self.fields:
+            for token in self.tokens[f]:
+                for n in range(1, GRAM + 1):
+                    for gram in ngrams(token, n):
+                        self.grams[f].setdefault(gram, set()).add(token)
+
+    @classmethod
+    def from_json(cls, path: str, list_key: str, fields: Sequence[str]) -> "Catalog":
+        """Load entries from a JSON file shaped like coding.constant, e.g. {"EXPERTS": [...]}."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)[list_key], fields)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _tokens_containing(self, field: str, fragment: str) -> Set[str]:
+        """Indexed tokens of `field` that contain `fragment`."""
+        grams = self.grams[field]
+        if len(fragment) <= GRAM:
+            return grams.get(fragment, set())
+        # every trigram of the fragment must occur in the token; verify the survivors
+        tokens: Optional[Set[str]] = None
+        for gram in sorted(ngrams(fragment, GRAM), key=lambda g: len(grams.get(g, ()))):
+            found = grams.get(gram, set())
+            tokens = set(found) if tokens is None else tokens & found
+            if not tokens:
+                return set()
+        return {token for token in tokens if fragment in token}
+
+    def _candidates(self, field: str, value: str) -> Iterable[int]:
+        query_tokens = TOKEN_RE.findall(value)
+        if not query_tokens:
+            return range(len(self.entries))
+        index = self.tokens[field]
+        candidates: Optional[Set[int]] = None
+        for qt in query_tokens:
+            ids: Set[int] = set(index.get(qt, ()))
+            for token in self._tokens_containing(field, qt):
+                ids |= index[token]
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return ()
+        return candidates
+
+    def match(self, field: str, value: str) -> Set[int]:
+        value = value.lower()
+        return {i for i in self._candidates(field, value) if value in self.lower[i][field]}
+
+    def search(self, **criteria: Optional[Sequence[str]]) -> List[Dict[str, str]]:
+        """
+        Entries matching ANY of the given values, in catalog order.
+
+        Example:
+            catalog.search(DISCIPLINE=["sociology", "hci"], INTEREST=["privacy"])
+        """
+        ids: Set[int] = set()
+        for field, values in criteria.items():
+            for value in values or []:
+                if value:
+                    ids |= self.match(field, value)
+        return [self.entries[i] for i in sorted(ids)]
+
+
+def _load(env_var: str, default: Dict, list_key: str, fields: Sequence[str]) -> Catalog:
+    # Point the env var at a JSON file to serve a larger catalog than coding/constant.py
+    path = os.getenv(env_var)
+    if path:
+        return Catalog.from_json(path, list_key, fields)
+    return Catalog(default[list_key], fields)
+
+
+EXPERT_CATALOG = _load("EXPERTS_CATALOG_PATH", EXPERTS_LIST, "EXPERTS", ["NAME", "DISCIPLINE", "INTEREST"])
+TEXTBOOK_CATALOG = _load("TEXTBOOK_CATALOG_PATH", TEXTBOOK_LIST, "TEXTBOOKS", ["TITLE", "DISCIPLINE", "RELATED_EXPERT"])
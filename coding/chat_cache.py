@@ -0,0 +1,350 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import streamlit as st
+
+from coding.chat_stream import ChatEvent
+from coding.job_retrieval import HashedTfidf
+from coding.llm_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+# Opt-in: CHAT_CACHE=1 turns the cache on for the agent pages
+CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE", "0") == "1"
+# Cosine similarity above which a paraphrased prompt reuses a cached chat; empty disables it.
+# Calibrated with `python -m coding.chat_cache` on the 80 most common skill tags of the cake
+# data: rewordings of one question ("我會X", "X 技能", "想找X的工作", ...) all score ~1.0 and
+# two different skills at most 0.71, but a prompt adding a second skill ("X 和 Y" vs "X")
+# still reached 0.9 in 9% of pairs, 3% at 0.95 and under 1% at 0.97 (kept below 1.0 for
+# the float16 vectors and small wording differences).
+SEMANTIC_THRESHOLD = os.getenv("CHAT_CACHE_SIMILARITY", "0.97")
+PROMPT_DIM = 1024
+
+# Wording that does not change what is asked ("我會 Python" = "Python 技能" = "python")
+FILLER_RE = re.compile(
+    r"我會|我有|我想|想要|想做|想找|請問|請給|擅長|熟悉|會用|有哪些|什麼|推薦|相關|技能|能力|"
+    r"實習生?|職缺|工作|一些|可以|的|跟|和|與|及|嗎|呢|吧|[?？!！,，。、]"
+)
+
+
+# Constraints the vector cannot tell apart: numbers with their unit, bounds and
+# negated terms. A semantic hit needs the same constraints in the same order.
+GUARD_RE = re.compile(
+    r"\d+(?:\.\d+)?\s*(?:萬|千|百|k|公里|km|元|塊|小時|天|年|個月|月)?"
+    r"|[一二兩三四五六七八九十]+\s*(?:萬|千|百|公里|元|塊|小時|天|年|個月)"
+    r"|以上|以下|以內|超過|低於|至少|最多|最少"
+    r"|(?:不要|不想|不是|不用|不含|不會|除了|排除|沒有|別|非)\s*[^\s,，。、?？!！]+"
+)
+
+
+def prompt_guard(prompt: str) -> str:
+    """Constraint signature of a prompt, e.g. '時薪 200 以上 行銷' -> '200|以上'."""
+    text = normalize_text(prompt).lower()
+    return "|".join(re.sub(r"\s+", "", match) for match in GUARD_RE.findall(text))
+
+
+class PromptVectorizer(HashedTfidf):
+    """
+    HashedTfidf for short prompts: filler wording is removed first, so
+    paraphrases of one question map to nearby vectors.
+
+    The idf is left at 1: every term left in a prompt (a skill, a place) is
+    part of the question. An idf fitted on the job corpus did not separate
+    the calibration pairs any better (see SEMANTIC_THRESHOLD).
+    """
+
+    def __init__(self, dim: int = PROMPT_DIM):
+        super().__init__(dim=dim)
+
+    def _counts(self, text: str) -> Dict[int, float]:
+        return super()._counts(FILLER_RE.sub(" ", normalize_text(text).lower()))
+
+
+def conversation_scope(page: str, personas: Sequence[str], language: str, **extra: Any) -> str:
+    """
+    Everything but the prompt that determines a conversation: the page, the
+    system messages of its agents, the output language and `extra` (e.g.
+    which agent receives the prompt). Only prompts of one scope are compared.
+    """
+    payload = json.dumps(
+        {"page": page, "personas": list(personas), "language": language, "extra": extra},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def conversation_key(scope: str, prompt: str) -> str:
+    text = scope + "\n" + normalize_text(prompt).lower()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CacheHit(NamedTuple):
+    history: List[Message]
+    similarity: float      # 1.0 for an exact hit
+    saved_seconds: float   # duration of the original chat minus the lookup
+
+
+class ChatCache:
+    """
+    Disk-backed (SQLite) cache of whole agent conversations: the
+    chat_history of a finished chat, stored per (scope, normalized prompt).
+
+    Entries expire `ttl` seconds after they were written and the least
+    recently used beyond `max_entries` are evicted. Each entry records the
+    data version (job_store.data_version) it was built from; looking it up
+    with another version is a miss, and storing a newer version drops the
+    page's older entries, so a new scrape invalidates them.
+
+    With a `threshold`, a prompt without an exact entry is embedded with
+    PromptVectorizer and compared with the cached prompts of its scope
+    (an in-memory matrix per scope); the nearest one is reused when its
+    cosine similarity reaches the threshold and both prompts carry the same
+    constraints (prompt_guard: numbers, bounds, negations), so '時薪 200'
+    never reuses the chat of '時薪 300'. stats() reports the hit rate and
+    the chat time saved (show_cache_stats puts them in the sidebar); each
+    lookup is also logged.
+
+    Args:
+        path (str): SQLite file; created with its directory if missing.
+        ttl (float): Seconds an entry stays valid.
+        max_entries (int): Least recently used entries beyond this are evicted.
+        threshold (float, optional): Similarity for a semantic hit; None
+            keeps exact matching only.
+    """
+
+    def __init__(self, path: str = ".cache/chat_cache.sqlite", ttl: float = 86400.0,
+                 max_entries: int = 500, threshold: Optional[float] = float(SEMANTIC_THRESHOLD or 0.97)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.vectorizer = PromptVectorizer()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+        # (scope, version) -> (keys, guards, prompt vectors); rebuilt from SQLite after deletions
+        self._index: Dict[Tuple[str, float], Tuple[List[str], np.ndarray, np.ndarray]] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_cache ("
+            " key TEXT PRIMARY KEY, page TEXT NOT NULL, version REAL NOT NULL,"
+            " history TEXT NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL,"
+            " scope TEXT, vector BLOB, elapsed REAL NOT NULL DEFAULT 0, guard TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chat_cache)")}
+        for column, kind in (("scope", "TEXT"), ("vector", "BLOB"), ("elapsed", "REAL NOT NULL DEFAULT 0"),
+                             ("guard", "TEXT")):
+            if column not in columns:  # cache files written before semantic lookup
+                self._conn.execute(f"ALTER TABLE chat_cache ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chat_cache_lru ON chat_cache (last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chat_cache_scope ON chat_cache (scope, version)")
+        self._conn.commit()
+
+    def _fetch(self, key: str, version: float, now: float) -> Optional[Tuple[str, float]]:
+        row = self._conn.execute(
+            "SELECT history, version, created, elapsed FROM chat_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        stale = row[1] < version or row[2] + self.ttl < now
+        if stale:
+            self._conn.execute("DELETE FROM chat_cache WHERE key = ?", (key,))
+            self._index.clear()
+        if stale or row[1] != version:
+            return None
+        self._conn.execute("UPDATE chat_cache SET last_access = ? WHERE key = ?", (now, key))
+        return row[0], row[3]
+
+    def _nearest(self, scope: str, version: float, vector: np.ndarray, guard: str) -> Optional[Tuple[str, float]]:
+        if (scope, version) not in self._index:
+            # entries written before guards existed have none and only hit exactly
+            rows = self._conn.execute(
+                "SELECT key, guard, vector FROM chat_cache"
+                " WHERE scope = ? AND version = ? AND vector IS NOT NULL AND guard IS NOT NULL",
+                (scope, version),
+            ).fetchall()
+            vectors = [np.frombuffer(blob, dtype=np.float16) for _, _, blob in rows]
+            matrix = np.vstack(vectors).astype(np.float32) if vectors else np.empty((0, self.vectorizer.dim), np.float32)
+            guards = np.array([row[1] for row in rows], dtype=object)
+            self._index[(scope, version)] = ([row[0] for row in rows], guards, matrix)
+        keys, guards, matrix = self._index[(scope, version)]
+        candidates = np.flatnonzero(guards == guard) if keys else []
+        if len(candidates) == 0:
+            return None
+        similarities = matrix[candidates] @ vector
+        best = int(np.argmax(similarities))
+        return keys[candidates[best]], float(similarities[best])
+
+    def lookup(self, scope: str, prompt: str, version: float) -> Optional[CacheHit]:
+        """The cached chat for `prompt`: an exact match, else the most similar prompt above the threshold."""
+        start = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            found = self._fetch(conversation_key(scope, prompt), version, now)
+            similarity, semantic = 1.0, False
+            if found is None and self.threshold is not None:
+                vector = self.vectorizer.transform_one(prompt)
+                nearest = self._nearest(scope, version, vector, prompt_guard(prompt)) if vector.any() else None
+                if nearest is not None and nearest[1] >= self.threshold:
+                    found = self._fetch(nearest[0], version, now)
+                    similarity, semantic = nearest[1], True
+            self._conn.commit()
+
+            if found is None:
+                self.misses += 1
+                self._log(logging.DEBUG, "miss")
+                return None
+            self.hits += 1
+            if semantic:
+                self.semantic_hits += 1
+            saved = max(0.0, found[1] - (time.perf_counter() - start))
+            self.saved_seconds += saved
+            self._log(logging.INFO, f"{'semantic' if semantic else 'exact'} hit"
+                                    f" (similarity {similarity:.2f}, saved {saved:.1f}s)")
+            return CacheHit(json.loads(found[0]), similarity, saved)
+
+    def put(self, scope: str, prompt: str, page: str, version: float,
+            history: List[Message], elapsed: float = 0.0) -> None:
+        """Store a finished chat; `elapsed` (seconds it took) is reported as saved on later hits."""
+        now = time.time()
+        key = conversation_key(scope, prompt)
+        value = json.dumps(history, ensure_ascii=False, default=str)
+        vector = self.vectorizer.transform_one(prompt)
+        blob = vector.astype(np.float16).tobytes() if vector.any() else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_cache"
+                " (key, page, version, history, created, last_access, scope, vector, elapsed, guard)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, page, version, value, now, now, scope, blob, elapsed, prompt_guard(prompt)),
+            )
+            # entries of an older scrape and expired entries can never hit again
+            deleted = self._conn.execute(
+                "DELETE FROM chat_cache WHERE (page = ? AND version < ?) OR created < ?",
+                (page, version, now - self.ttl),
+            ).rowcount
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM chat_cache").fetchone()
+            if count > self.max_entries:
+                deleted += self._conn.execute(
+                    "DELETE FROM chat_cache WHERE key IN ("
+                    " SELECT key FROM chat_cache ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+            self._conn.commit()
+            # the new (or replaced) vector and any deletion change the scope matrices
+            if deleted:
+                self._index.clear()
+            else:
+                self._index.pop((scope, version), None)
+
+    def _log(self, level: int, outcome: str) -> None:
+        if not logger.isEnabledFor(level):
+            return
+        stats = self.stats(count_entries=False)
+        logger.log(level, "%s; hit rate %.0f%% (%d/%d, %d semantic), %.1fs saved",
+                   outcome, stats["hit_rate"] * 100, self.hits, self.hits + self.misses,
+                   self.semantic_hits, self.saved_seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chat_cache").fetchone()[0]
+
+    def stats(self, count_entries: bool = True) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
+        if count_entries:
+            stats["entries"] = len(self)
+        return stats
+
+
+@st.cache_resource(show_spinner=False)
+def get_chat_cache() -> Optional[ChatCache]:
+    """Process-wide ChatCache, or None unless CHAT_CACHE=1."""
+    if not CHAT_CACHE_ENABLED:
+        return None
+    return ChatCache(
+        os.getenv("CHAT_CACHE_PATH", ".cache/chat_cache.sqlite"),
+        ttl=float(os.getenv("CHAT_CACHE_TTL", "86400")),
+        max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "500")),
+        threshold=float(SEMANTIC_THRESHOLD) if SEMANTIC_THRESHOLD else None,
+    )
+
+
+def show_cache_stats(container) -> None:
+    """Hit rate and chat time saved by the cache, e.g. in st.sidebar; nothing unless CHAT_CACHE=1."""
+    cache = get_chat_cache()
+    if cache is None:
+        return
+    stats = cache.stats()
+    with container:
+        st.caption(f"💾 對話快取（{stats['entries']} 筆）")
+        c1, c2 = st.columns(2)
+        c1.metric("命中率", f"{stats['hit_rate']:.0%}",
+                  help=f"{stats['hits']} / {stats['hits'] + stats['misses']} 次，語意相近命中 {stats['semantic_hits']} 次")
+        c2.metric("省下時間", f"{stats['saved_seconds']:.0f} 秒")
+
+
+def replay_events(history: List[Message]) -> Iterator[ChatEvent]:
+    """
+    ChatEvents of a stored chat_history, for render_chat_stream: the chat is
+    shown as if it ran, without calling the model. Ends with 'done' carrying
+    the history.
+    """
+    for message in history:
+        sender = message.get("name", "")
+        calls = message.get("tool_calls")
+        if calls:
+            yield ChatEvent("tool_call", sender, [(c["function"]["name"], c["function"].get("arguments"))
+                                                  for c in calls])
+        if message.get("role") == "tool":
+            for response in message.get("tool_responses") or []:
+                yield ChatEvent("tool_result", "tool", response.get("content"))
+        elif message.get("content"):
+            yield ChatEvent("message", sender, message["content"])
+    yield ChatEvent("done", content=history)
+
+
+if __name__ == "__main__":
+    # Similarity of prompt pairs built from the skill tags of the cake data, to pick SEMANTIC_THRESHOLD
+    import itertools
+    from collections import Counter
+
+    from coding.job_store import read_jobs
+    from coding.skill_index import parse_tags
+
+    vectorizer = PromptVectorizer()
+    tags = Counter(tag for value in read_jobs("cake", columns=["job_tags"])["job_tags"] for tag in parse_tags(value))
+    skills = [tag for tag, _ in tags.most_common(120) if vectorizer.transform_one(tag).any()][:80]
+    templates = ["我會{}", "{} 技能", "我擅長{}，有哪些實習", "請推薦{}相關的職缺", "{}", "想找{}的工作", "{}實習"]
+    vector = lambda text: vectorizer.transform_one(text).astype(np.float16).astype(np.float32)  # as stored
+    paraphrases = np.array([vector(a.format(x)) @ vector(b.format(x))
+                            for x in skills for a, b in itertools.combinations(templates, 2)])
+    different = np.array([vector(a.format(x)) @ vector(a.format(y))
+                          for x, y in itertools.combinations(skills, 2) for a in templates[:3]])
+    superset = np.array([vector(f"我會{x}和{y}") @ vector(f"我會{x}")
+                         for x, y in itertools.permutations(skills[:30], 2)])
+    print(f"{len(skills)} skills; different skills score at most {different.max():.2f}")
+    for threshold in (0.8, 0.85, 0.9, 0.95, 0.97, 0.99):
+        print(f"{threshold:.2f}: paraphrases hit {np.mean(paraphrases >= threshold):.1%},"
+              f" different skills {np.mean(different >= threshold):.1%},"
+              f" an added skill {np.mean(superset >= threshold):.1%}")
@@ -0,0 +1,149 @@
+import asyncio
+import functools
+import queue
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from autogen.io import IOStream
+
+from coding.chat_stream import ChatEvent, QueueIOStream
+
+EVENT_POLL_SECONDS = 0.5  # how often events() checks whether the chat has stopped
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Process-wide event loop running in a daemon thread; every chat runs on it."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="chat-runner", daemon=True).start()
+        return _loop
+
+
+def async_tool(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """
+    Async wrapper of a blocking tool. autogen gathers the coroutine tools of
+    one assistant turn, so parallel tool calls run concurrently in threads
+    instead of one after another on the event loop.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return wrapper
+
+
+class ChatHandle:
+    """
+    A chat running on the runner loop.
+
+    Attributes:
+        progress (dict): turns, tool_calls, tools_done and elapsed seconds,
+            updated as events arrive.
+    """
+
+    def __init__(self, stream: QueueIOStream):
+        self.stream = stream
+        self.finished = threading.Event()
+        self.cancelled = threading.Event()
+        self.future = None
+        self.started_at = time.monotonic()
+        self.progress: Dict[str, float] = {"turns": 0, "tool_calls": 0, "tools_done": 0, "elapsed": 0.0}
+
+    def cancel(self, wait: float = 5.0) -> None:
+        """Cancel the chat and wait (up to `wait` seconds) until it has stopped."""
+        self.cancelled.set()
+        if self.future is not None and not self.finished.is_set():
+            self.future.cancel()
+            self.finished.wait(wait)
+
+    def _stopped_event(self) -> Optional[ChatEvent]:
+        """Terminal event for a chat that stopped without queuing one (e.g. cancelled before it started)."""
+        if self.cancelled.is_set() or (self.future is not None and self.future.cancelled()):
+            return ChatEvent("cancelled")
+        if self.future is not None and self.future.done():
+            return ChatEvent("error", content=RuntimeError("chat stopped without a result"))
+        return None
+
+    def events(self) -> Iterator[ChatEvent]:
+        """
+        ChatEvents in order; ends with 'done', 'error' or 'cancelled'.
+
+        The queue is polled every EVENT_POLL_SECONDS, so a reader never hangs
+        on a chat that was cancelled or stopped without a final event.
+        """
+        while True:
+            try:
+                event = self.stream.events.get(timeout=EVENT_POLL_SECONDS)
+            except queue.Empty:
+                event = self._stopped_event()
+                if event is None:
+                    continue
+            self.progress["elapsed"] = time.monotonic() - self.started_at
+            if event.kind == "message":
+                self.progress["turns"] += 1
+            elif event.kind == "tool_call":
+                self.progress["tool_calls"] += len(event.content)
+            elif event.kind == "tool_result":
+                self.progress["tools_done"] += 1
+            yield event
+            if event.kind in ("done", "error", "cancelled"):
+                return
+
+
+def run_chat(start: Callable[[], Awaitable[Any]]) -> ChatHandle:
+    """
+    Start a chat on the runner loop without blocking the calling thread.
+
+    Args:
+        start (callable): Returns the chat coroutine, e.g.
+            lambda: proxy.a_initiate_chat(agent, message=prompt). The agents
+            should belong to the calling session (agent_factory.session_team).
+
+    Returns:
+        ChatHandle: Iterate handle.events() to render the chat.
+    """
+    stream = QueueIOStream()
+    handle = ChatHandle(stream)
+
+    async def main():
+        try:
+            with IOStream.set_default(stream):
+                result = await start()
+        except asyncio.CancelledError:
+            stream.put(ChatEvent("cancelled"))
+            raise
+        except Exception as e:
+            stream.put(ChatEvent("error", content=e))
+        else:
+            stream.put(ChatEvent("done", content=result))
+        finally:
+            handle.finished.set()
+
+    handle.future = asyncio.run_coroutine_threadsafe(main(), get_loop())
+    return handle
+
+
+class ChatRunner:
+    """
+    Per-session runner (keep one in st.session_state): starting a chat
+    cancels the one the session still has running, e.g. when the user sends
+    a new prompt before the previous answer is complete.
+    """
+
+    def __init__(self):
+        self.current: Optional[ChatHandle] = None
+
+    def start(self, start: Callable[[], Awaitable[Any]]) -> ChatHandle:
+        self.cancel()
+        self.current = run_chat(start)
+        return self.current
+
+    def cancel(self) -> None:
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
@@ -0,0 +1,167 @@
+import json
+import queue
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+import streamlit as st
+from autogen.events.agent_events import ExecutedFunctionEvent, TextEvent, ToolCallEvent
+from autogen.events.client_events import StreamEvent
+from autogen.io import IOStream
+
+from coding.utils import get_message_store
+
+DONE_TOKENS = ("##ALL DONE##", "ALL DONE", "JOB_RECOMMENDATION_DONE", "SKILL_ANALYSIS_DONE")
+
+
+class ChatEvent(NamedTuple):
+    """
+    kind: 'token' (one streamed chunk; sender is the agent generating it, or
+    "" outside an agent reply, e.g. an LLM summary), 'message' (a finished turn),
+    'tool_call', 'tool_result', 'done' (content is the ChatResult), 'error'
+    or 'cancelled'.
+    """
+    kind: str
+    sender: str = ""
+    content: Any = None
+
+
+class QueueIOStream:
+    """
+    autogen IOStream that forwards what agents emit (streamed tokens, finished
+    turns, tool calls and results) to a queue instead of the console, so the
+    Streamlit script thread can render them while the chat runs on the
+    coding.chat_runner event loop.
+    """
+
+    def __init__(self):
+        self.events: "queue.Queue[ChatEvent]" = queue.Queue()
+        self.speaker = ""  # agent whose reply is being generated (see announce_speaker)
+
+    def put(self, event: ChatEvent) -> None:
+        self.events.put(event)
+
+    def print(self, *objects: Any, sep: str = " ", end: str = "\n", flush: bool = False) -> None:
+        pass  # console formatting only; everything useful arrives through send()
+
+    def send(self, message: Any) -> None:
+        event = getattr(message, "content", None)
+        if isinstance(message, StreamEvent):
+            self.put(ChatEvent("token", self.speaker, event.content))
+        elif isinstance(message, TextEvent):
+            self.speaker = ""  # the turn is finished; the next reply announces itself
+            self.put(ChatEvent("message", event.sender, event.content))
+        elif isinstance(message, ToolCallEvent):
+            self.speaker = ""
+            calls = [(c.function.name, c.function.arguments) for c in event.tool_calls]
+            self.put(ChatEvent("tool_call", event.sender, calls))
+        elif isinstance(message, ExecutedFunctionEvent):
+            self.put(ChatEvent("tool_result", event.func_name, event.content))
+
+    def input(self, prompt: str = "", *, password: bool = False) -> str:
+        return ""  # no human in the loop: an empty reply ends the chat
+
+
+def announce_speaker(agent: Any, messages: Any) -> None:
+    """
+    'update_agent_state' hook (registered by agent_factory.build_team): runs
+    right before an agent generates a reply, so the tokens streamed next are
+    attributed to it.
+    """
+    stream = IOStream.get_default()
+    if isinstance(stream, QueueIOStream):
+        stream.speaker = agent.name
+
+
+def clean_content(content: Any) -> str:
+    if not isinstance(content, str):
+        return ""
+    for token in DONE_TOKENS:
+        content = content.replace(token, "")
+    return content.strip()
+
+
+def render_chat_stream(container_obj,
+                       events: Iterator[ChatEvent],
+                       user_image: Optional[str] = None,
+                       initiator: str = "user_proxy",
+                       hidden: Tuple[str, ...] = (),
+                       roles: Tuple[str, str] = ("assistant", "user"),
+                       progress: Optional[Dict[str, float]] = None) -> Any:
+    """
+    Render a streamed chat into `container_obj`: tokens are written into the
+    bubble of the agent generating them as they arrive, tool calls show as
+    status lines, and every finished turn is appended to the session's
+    MessageStore. `hidden` applies to streamed tokens as well as to turns.
+
+    Args:
+        container_obj: Streamlit container holding the chat.
+        events (Iterator[ChatEvent]): ChatHandle.events() of coding.chat_runner.
+        user_image (str, optional): Avatar of the initiating agent.
+        initiator (str): Name of the agent that started the chat; its turns
+            are shown as the user's.
+        hidden (Tuple[str, ...]): Senders whose turns are not shown (e.g. a
+            proxy that only sends a prompt template).
+        roles (Tuple[str, str]): Roles stored in session_state for the
+            initiator's turns and for the other agents' turns; the default
+            matches the roles of ChatResult.chat_history.
+        progress (dict, optional): ChatHandle.progress, shown as a status
+            line under the chat while it runs.
+
+    Returns:
+        ChatResult: Result of the chat, or None if it was cancelled; the
+            error is re-raised on failure.
+    """
+    messages = get_message_store()
+    placeholder, buffer = None, ""
+    status = st.empty()
+
+    for event in events:
+        if progress is not None and event.kind not in ("done", "error", "cancelled"):
+            status.caption(
+                f"⏳ 第 {progress['turns']:.0f} 輪 · 工具 {progress['tools_done']:.0f}/{progress['tool_calls']:.0f}"
+                f" · {progress['elapsed']:.1f} 秒"
+            )
+        if event.kind == "token":
+            if not event.sender or event.sender in hidden:
+                continue  # not part of a shown turn (hidden agent, LLM summary)
+            if placeholder is None:
+                if event.sender == initiator:
+                    placeholder = container_obj.chat_message("assistant", avatar=user_image).empty()
+                else:
+                    placeholder = container_obj.chat_message("ai").empty()
+            buffer += event.content
+            placeholder.markdown(clean_content(buffer) + "▌")
+        elif event.kind == "message":
+            content = clean_content(event.content)
+            if placeholder is not None:
+                # the streamed turn is complete: replace the partial text
+                if content:
+                    placeholder.markdown(content)
+                else:
+                    placeholder.empty()
+                placeholder, buffer = None, ""
+            elif content and event.sender not in hidden:
+                if event.sender == initiator:
+                    container_obj.chat_message("assistant", avatar=user_image).markdown(content)
+                else:
+                    container_obj.chat_message("ai").markdown(content)
+            if content and event.sender not in hidden:
+                role = roles[0] if event.sender == initiator else roles[1]
+                messages.append({"role": role, "content": content})
+        elif event.kind == "tool_call":
+            placeholder, buffer = None, ""
+            for name, arguments in event.content:
+                container_obj.caption(f"🔧 {event.sender} 呼叫工具 `{name}` {arguments or ''}")
+        elif event.kind == "tool_result":
+            size = len(json.dumps(event.content, ensure_ascii=False, default=str))
+            container_obj.caption(f"✅ `{event.sender}` 完成（{size} 字元）")
+        elif event.kind in ("error", "cancelled", "done"):
+            if placeholder is not None:
+                placeholder.markdown(clean_content(buffer))  # drop the cursor of an unfinished turn
+            if event.kind == "error":
+                status.empty()
+                raise event.content
+            if event.kind == "cancelled":
+                status.caption("⏹️ 已取消")
+                return None
+            status.empty()
+            return event.content
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# (status, body text) — the only thing scrapers need from a page fetch
+FetchResult = Tuple[int, str]
+Fetcher = Callable[[str, Optional[Dict[str, Any]]], Awaitable[FetchResult]]
+
+
+class HTTPStatusError(RuntimeError):
+    """A page answered with a status other than 200."""
+
+    def __init__(self, url: str, status: int):
+        super().__init__(f"GET {url} -> {status}")
+        self.url = url
+        self.status = status
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, holding at most `capacity`.
+
+    A bucket with rate=1/3 and capacity=1 reproduces the old `time.sleep(3)`
+    budget (one request every 3 seconds) without blocking other coroutines.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AsyncCrawler:
+    """
+    Shared crawler core: per-host rate limit, bounded in-flight requests and
+    one pooled keep-alive session.
+
+    Args:
+        rate_per_host (float): Requests per second allowed for each host.
+        burst (float): Token bucket capacity per host.
+        max_in_flight (int): Upper bound on concurrent requests.
+        headers (dict, optional): Default headers sent with every request.
+        timeout (float): Total per-request timeout in seconds.
+        fetcher (callable, optional): `async (url, params) -> (status, text)`.
+            Replaces the aiohttp layer, e.g. with a local fake server in tests.
+    """
+
+    def __init__(self,
+                 rate_per_host: float = 1.0,
+                 burst: float = 1.0,
+                 max_in_flight: int = 4,
+                 headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 30.0,
+                 fetcher: Optional[Fetcher] = None):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.headers = headers or {}
+        self.timeout = timeout
+        self._fetcher = fetcher
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncCrawler":
+        if self._fetcher is None:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return self._buckets[host]
+
+    async def _aiohttp_fetch(self, url: str, params: Optional[Dict[str, Any]]) -> FetchResult:
+        if self._session is None:
+            raise RuntimeError("AsyncCrawler must be used as `async with AsyncCrawler(...)`")
+        async with self._session.get(url, params=params) as resp:
+            return resp.status, await resp.text()
+
+    async def fetch(self, url: str, params: Optional[Dict[str, Any]] = None) -> FetchResult:
+        """Fetch one URL under the host rate limit and in-flight bound."""
+        async with self._slots:
+            await self._bucket(url).acquire()
+            if self._fetcher is not None:
+                return await self._fetcher(url, params)
+            return await self._aiohttp_fetch(url, params)
+
+    async def fetch_text(self, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        status, text = await self.fetch(url, params)
+        if status != 200:
+            raise HTTPStatusError(url, status)
+        return text
+
+    async def fetch_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return json.loads(await self.fetch_text(url, params))
+
+    async def iter_pages(self,
+                         fetch_page: Callable[[int], Awaitable[Any]],
+                         pages: Iterable[int]) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Yield `(page, result)` in page order while keeping up to
+        `max_in_flight` pages running ahead. If the consumer stops iterating
+        (e.g. an empty page was reached), the pages still pending are cancelled;
+        wrap the loop in `contextlib.aclosing` so this happens right away.
+
+        Exceptions raised by `fetch_page` are yielded as the result so the
+        caller can log and carry on, like the old per-page try/except.
+        """
+        pages = iter(pages)
+        window = []
+
+        def schedule() -> bool:
+            page = next(pages, None)
+            if page is None:
+                return False
+            window.append((page, asyncio.ensure_future(fetch_page(page))))
+            return True
+
+        for _ in range(self.max_in_flight):
+            if not schedule():
+                break
+
+        try:
+            while window:
+                page, task = window.pop(0)
+                try:
+                    result = await task
+                except Exception as e:
+                    result = e
+                schedule()
+                yield page, result
+        finally:
+            for _, task in window:
+                task.cancel()
+            if window:
+                await asyncio.gather(*(t for _, t in window), return_exceptions=True)
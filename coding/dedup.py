@@ -0,0 +1,206 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from coding.llm_cache import normalize_text
+from coding.stream_clean import RowFailed, read_contents
+
+Item = Tuple[Hashable, str]
+
+_PRIME = (1 << 31) - 1
+
+
+class NearDuplicateIndex:
+    """
+    Online clustering of descriptions: exact duplicates by hash of the
+    normalized text, near duplicates by MinHash + LSH banding.
+
+    Every added text is either a new cluster representative or assigned to
+    the representative it duplicates. Only representatives are kept in the
+    LSH buckets, so lookups stay cheap as the number of rows grows. State is
+    kept compact: an 8-byte digest per distinct text, and per representative
+    its signature (4 bytes per permutation) and one integer key per band.
+
+    Args:
+        num_perm (int): MinHash signature length.
+        bands (int): LSH bands; num_perm must be divisible by it.
+        shingle (int): Character shingle size (Chinese text has no spaces).
+        threshold (float): Estimated Jaccard similarity needed to join a cluster.
+        seed (int): Seed of the hash permutations.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle: int = 5,
+                 threshold: float = 0.85, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self._exact: Dict[int, Hashable] = {}
+        self._buckets: List[Dict[int, List[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[Hashable, bytes] = {}  # uint32 MinHash values (all below _PRIME)
+        self.exact_hits = 0
+        self.near_hits = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        k = self.shingle
+        shingles = {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        # (a * x + b) mod p for every permutation, then the minimum per permutation
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def add(self, key: Hashable, text: str) -> Hashable:
+        """
+        Returns:
+            Hashable: `key` if the text starts a new cluster, otherwise the key
+                of the representative it duplicates.
+        """
+        norm = normalize_text(text)
+        digest = int.from_bytes(hashlib.sha1(norm.encode("utf-8")).digest()[:8], "big")
+        if digest in self._exact:
+            self.exact_hits += 1
+            return self._exact[digest]
+
+        sig = self.signature(norm).astype(np.uint32)
+        bands = [hash(sig[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(self.bands)]
+        best, best_sim = None, self.threshold
+        seen = set()
+        for band, bucket_key in zip(self._buckets, bands):
+            for rep in band.get(bucket_key, ()):
+                if rep in seen:
+                    continue
+                seen.add(rep)
+                sim = float(np.mean(np.frombuffer(self._signatures[rep], dtype=np.uint32) == sig))
+                if sim >= best_sim:
+                    best, best_sim = rep, sim
+
+        if best is not None:
+            self.near_hits += 1
+            self._exact[digest] = best
+            return best
+
+        self._exact[digest] = key
+        self._signatures[key] = sig.tobytes()
+        for band, bucket_key in zip(self._buckets, bands):
+            band.setdefault(bucket_key, []).append(key)
+        return key
+
+
+class DedupStage:
+    """
+    Wraps the plan/work functions of coding.stream_clean.clean_stream so that
+    only one row per cluster is extracted; the result is fanned out to every
+    member of the cluster.
+
+    If a representative fails, its failure is returned for every member
+    waiting on it, so each one is counted as failed (and retried next run);
+    members seen after the failure are extracted on their own.
+
+    Memory stays flat apart from the index's compact keys: only the
+    representatives in flight, their waiting members and a bounded LRU of
+    recent results are held. A member of an older representative reads its
+    result back from the `checkpoint` CSV (or is extracted on its own when
+    there is none).
+
+    Args:
+        index (NearDuplicateIndex, optional): Clustering index.
+        checkpoint (str, optional): Output CSV of coding.stream_clean.clean_stream.
+        recent (int): Results of representatives kept in memory.
+
+    Attributes:
+        saved (int): Rows served from a successful representative instead of
+            the LLM; `index.exact_hits` / `index.near_hits` count every
+            duplicate found, by kind.
+    """
+
+    def __init__(self, index: Optional[NearDuplicateIndex] = None,
+                 checkpoint: Optional[str] = None, recent: int = 1024):
+        self.index = index or NearDuplicateIndex()
+        self.checkpoint = checkpoint
+        self.recent = recent
+        self.saved = 0
+        self._pending: Set[Hashable] = set()
+        self._failed: Set[Hashable] = set()
+        self._waiting: Dict[Hashable, List[Hashable]] = {}
+        self._results: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _finish(self, results: Dict[Hashable, object]) -> Dict[Hashable, object]:
+        """Record representative results (or failures) and add the members waiting on them."""
+        fanned = dict(results)
+        with self._lock:
+            for rep, content in results.items():
+                self._pending.discard(rep)
+                waiting = self._waiting.pop(rep, [])
+                if isinstance(content, Exception):
+                    self._failed.add(rep)
+                else:
+                    self.saved += len(waiting)
+                    self._results[rep] = content
+                    while len(self._results) > self.recent:
+                        self._results.popitem(last=False)
+                for member in waiting:
+                    fanned[member] = content
+        return fanned
+
+    def wrap(self,
+             plan: Callable[[List[Item]], Tuple[Dict[Hashable, str], List[List[Item]]]],
+             work: Callable[[List[Item]], Dict[Hashable, str]]):
+        def dedup_plan(pending: List[Item]):
+            unique: List[Item] = []
+            resolved: Dict[Hashable, str] = {}
+            stored: Dict[Hashable, Tuple[Hashable, str]] = {}  # member -> (finished rep, desc)
+            for idx, desc in pending:
+                if not isinstance(desc, str) or not desc.strip():
+                    unique.append((idx, desc))
+                    continue
+                rep = self.index.add(idx, desc)
+                with self._lock:
+                    if rep == idx:
+                        self._pending.add(idx)
+                        unique.append((idx, desc))
+                    elif rep in self._failed:
+                        unique.append((idx, desc))
+                    elif rep in self._pending:
+                        self._waiting.setdefault(rep, []).append(idx)
+                    elif rep in self._results:
+                        self._results.move_to_end(rep)
+                        resolved[idx] = self._results[rep]
+                        self.saved += 1
+                    else:
+                        stored[idx] = (rep, desc)
+
+            if stored:
+                # the main thread writes the checkpoint, so every result drained so far is in it
+                found = read_contents(self.checkpoint, {rep for rep, _ in stored.values()}) if self.checkpoint else {}
+                for idx, (rep, desc) in stored.items():
+                    if rep in found:
+                        resolved[idx] = found[rep]
+                        self.saved += 1
+                    else:
+                        unique.append((idx, desc))  # finished but not written yet: extract it alone
+
+            base_resolved, units = plan(unique)
+            resolved.update(self._finish(base_resolved))
+            return resolved, units
+
+        def dedup_work(unit: List[Item]) -> Dict[Hashable, object]:
+            try:
+                results = dict(work(unit))
+            except Exception as e:
+                results = {idx: RowFailed(str(e)) for idx, _ in unit}
+            for idx, _ in unit:
+                results.setdefault(idx, RowFailed("no result"))
+            return self._finish(results)
+
+        return dedup_plan, dedup_work
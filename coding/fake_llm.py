@@ -0,0 +1,66 @@
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class FakeServerError(Exception):
+    status_code = 503
+
+
+class FakeExtractor:
+    """
+    Local stand-in for the extractor agent, with the same `generate_reply`
+    call shape. Simulates latency and a provider-side concurrency quota so the
+    scheduler can be exercised without an API key or spending money.
+
+    Args:
+        latency (float): Mean seconds per call.
+        capacity (int): Concurrent calls allowed before answering with a 429.
+        error_rate (float): Probability of a (retryable) 503 failure.
+        seed (int, optional): Seed for reproducible runs.
+    """
+
+    def __init__(self, latency: float = 0.3, capacity: int = 12, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.calls = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def _answer(self, content: str) -> str:
+        # A batch prompt is a JSON array of {id, text}; anything else is one description
+        try:
+            items = json.loads(content)
+        except (TypeError, ValueError):
+            items = None
+        if isinstance(items, list):
+            return json.dumps([{"id": it.get("id"), "content": str(it.get("text", ""))[:200]}
+                               for it in items if isinstance(it, dict)], ensure_ascii=False)
+        return content[:200]
+
+    def generate_reply(self, messages: List[Dict[str, Any]], sender: Any = None, **kwargs) -> Dict[str, str]:
+        with self._lock:
+            self.calls += 1
+            self._active += 1
+            overloaded = self._active > self.capacity
+            delay = self._random.expovariate(1 / self.latency)
+            fail = self._random.random() < self.error_rate
+        try:
+            if overloaded:
+                time.sleep(self.latency / 10)
+                raise FakeRateLimitError("429 Resource exhausted (fake quota)")
+            time.sleep(delay)
+            if fail:
+                raise FakeServerError("503 Service Unavailable (fake upstream error)")
+            return {"content": self._answer(messages[-1]["content"])}
+        finally:
+            with self._lock:
+                self._active -= 1
@@ -0,0 +1,238 @@
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from coding.job_store import data_version, job_url, read_jobs
+
+GRID_DEG = 0.05  # geo grid cell, about 5.5 km north-south
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG = 111.32
+QUERY_COLUMNS = ["jobNo", "jobName", "custName", "jobAddrNoDesc", "coIndustryDesc", "salaryType",
+                 "salaryLow", "salaryHigh", "salaryDesc", "appearDate", "lon", "lat",
+                 "landmark", "mrtDesc", "link"]
+RESULT_COLUMNS = ["jobNo", "jobName", "custName", "jobAddrNoDesc", "coIndustryDesc", "salaryDesc", "appearDate", "link"]
+ORDERS = ("date", "salary", "distance")  # order_by values of JobQueryIndex.query
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lat2 = math.radians(lat), np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class CategoryIndex:
+    """
+    Posting lists of a categorical column: category code -> sorted row ids.
+    A text filter is matched against the (few) category names, not the rows.
+    """
+
+    def __init__(self, values: pd.Series):
+        values = values.astype("category")
+        codes = values.cat.codes.to_numpy()  # -1 (missing) sorts first and belongs to no category
+        self.names = values.cat.categories.astype(str).to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(self.names) + 1))
+        self.postings = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.names))]
+
+    def rows(self, terms: Sequence[str]) -> np.ndarray:
+        """Rows whose value contains any of `terms`."""
+        matched = [i for i, name in enumerate(self.names) if any(term in name for term in terms)]
+        if not matched:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([self.postings[i] for i in matched]))
+
+
+class RangeIndex:
+    """A numeric column sorted once; a range query is two binary searches."""
+
+    def __init__(self, values: pd.Series):
+        numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = np.flatnonzero(~np.isnan(numbers))
+        order = valid[np.argsort(numbers[valid], kind="stable")]
+        self.order = order
+        self.sorted = numbers[order]
+
+    def rows(self, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        start = 0 if low is None else np.searchsorted(self.sorted, low, side="left")
+        stop = len(self.sorted) if high is None else np.searchsorted(self.sorted, high, side="right")
+        return np.sort(self.order[start:stop])
+
+
+class GeoGrid:
+    """
+    Rows bucketed into GRID_DEG x GRID_DEG cells; a radius query only looks
+    at the cells the circle overlaps and computes exact distances there.
+    """
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray, cell: float = GRID_DEG):
+        self.cell = cell
+        self.lats, self.lons = lats, lons
+        valid = np.flatnonzero(~np.isnan(lats) & ~np.isnan(lons))
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for row in valid:
+            cells.setdefault(self._cell(lats[row], lons[row]), []).append(row)
+        self.cells = {key: np.array(rows, dtype=np.int64) for key, rows in cells.items()}
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell)), int(math.floor(lon / self.cell))
+
+    def within(self, lat: float, lon: float, km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows within `km` of (lat, lon), sorted, and their distances."""
+        dlat = km / KM_PER_DEG
+        dlon = km / (KM_PER_DEG * max(math.cos(math.radians(lat)), 0.01))
+        (lat0, lon0), (lat1, lon1) = self._cell(lat - dlat, lon - dlon), self._cell(lat + dlat, lon + dlon)
+        candidates = [self.cells[(i, j)] for i in range(lat0, lat1 + 1) for j in range(lon0, lon1 + 1)
+                      if (i, j) in self.cells]
+        if not candidates:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        rows = np.sort(np.concatenate(candidates))
+        distances = haversine_km(lat, lon, self.lats[rows], self.lons[rows])
+        keep = distances <= km
+        return rows[keep], distances[keep]
+
+
+class JobQueryIndex:
+    """
+    Structured filters over the 104 jobs, answered from indexes built once:
+    posting lists for location, industry and salary type, sorted salary
+    arrays, a newest-first date rank and a geo grid. A composite query
+    intersects the row sets of its filters, smallest first.
+    """
+
+    def __init__(self, source: str = "104"):
+        self.jobs = read_jobs(source, columns=QUERY_COLUMNS).reset_index(drop=True)
+        self.location = CategoryIndex(self.jobs["jobAddrNoDesc"])
+        self.industry = CategoryIndex(self.jobs["coIndustryDesc"])
+        self.salary_type = CategoryIndex(self.jobs["salaryType"])
+        self.salary_low = RangeIndex(self.jobs["salaryLow"])
+        self.salary_high = RangeIndex(self.jobs["salaryHigh"])
+        self.appear = RangeIndex(self.jobs["appearDate"].dt.strftime("%Y%m%d"))  # yyyymmdd numbers
+        # newest first; rows without a date go last
+        self.date_rank = np.full(len(self.jobs), len(self.jobs), dtype=np.int64)
+        self.date_rank[self.appear.order[::-1]] = np.arange(len(self.appear.order))
+        self.salary_rank = np.full(len(self.jobs), len(self.jobs), dtype=np.int64)
+        self.salary_rank[self.salary_low.order[::-1]] = np.arange(len(self.salary_low.order))
+        self.lats = self.jobs["lat"].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.lons = self.jobs["lon"].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.geo = GeoGrid(self.lats, self.lons)
+        self.places = (self.jobs["mrtDesc"].fillna("") + " " + self.jobs["landmark"].fillna("")
+                       + " " + self.jobs["jobAddrNoDesc"].astype(str)).to_numpy(dtype=str)
+
+    def locate(self, place: str) -> Optional[Tuple[float, float]]:
+        """(lat, lon) of a place named in the data, e.g. '捷運港墘站' or '新竹市東區'."""
+        rows = np.flatnonzero(np.char.find(self.places, place) >= 0)
+        rows = rows[~np.isnan(self.lats[rows])]
+        if len(rows) == 0:
+            return None
+        return float(np.median(self.lats[rows])), float(np.median(self.lons[rows]))
+
+    def query(self,
+              locations: Optional[Sequence[str]] = None,
+              industries: Optional[Sequence[str]] = None,
+              salary_type: Optional[str] = None,
+              min_salary: Optional[int] = None,
+              max_salary: Optional[int] = None,
+              posted_after: Optional[str] = None,
+              near: Optional[Tuple[float, float]] = None,
+              within_km: Optional[float] = None,
+              order_by: str = "date",
+              limit: int = 10) -> Dict[str, Any]:
+        """
+        Args:
+            locations (Sequence[str], optional): jobAddrNoDesc contains any of these.
+            industries (Sequence[str], optional): coIndustryDesc contains any of these.
+            salary_type (str, optional): 'H' (hourly) or 'M' (monthly).
+            min_salary (int, optional): salaryLow >= min_salary.
+            max_salary (int, optional): salaryHigh <= max_salary.
+            posted_after (str, optional): appearDate on or after this 'YYYY-MM-DD'.
+            near (Tuple[float, float], optional): (lat, lon) centre of a radius filter.
+            within_km (float, optional): Radius around `near`.
+            order_by (str): 'date' (newest first), 'salary' (highest salaryLow
+                first) or 'distance' (needs `near`).
+            limit (int): Jobs returned.
+
+        Returns:
+            dict: total (number of matching jobs) and jobs (the first `limit`).
+        """
+        hits: List[np.ndarray] = []
+        if locations:
+            hits.append(self.location.rows(locations))
+        if industries:
+            hits.append(self.industry.rows(industries))
+        if salary_type:
+            hits.append(self.salary_type.rows([salary_type]))
+        if min_salary is not None:
+            hits.append(self.salary_low.rows(low=min_salary))
+        if max_salary is not None:
+            hits.append(self.salary_high.rows(high=max_salary))
+        if posted_after:
+            hits.append(self.appear.rows(low=int(pd.Timestamp(posted_after).strftime("%Y%m%d"))))
+        distance = None
+        if near is not None and within_km:
+            geo_rows, geo_distances = self.geo.within(near[0], near[1], within_km)
+            hits.append(geo_rows)
+            distance = dict(zip(geo_rows.tolist(), geo_distances.tolist()))
+
+        if hits:
+            hits.sort(key=len)
+            rows = hits[0]
+            for other in hits[1:]:
+                if len(rows) == 0:
+                    break
+                rows = np.intersect1d(rows, other, assume_unique=True)
+        else:
+            rows = np.arange(len(self.jobs))
+
+        if order_by == "distance" and distance is not None:
+            rows = rows[np.argsort([distance[r] for r in rows.tolist()], kind="stable")]
+        elif order_by == "salary":
+            rows = rows[np.argsort(self.salary_rank[rows], kind="stable")]
+        else:
+            rows = rows[np.argsort(self.date_rank[rows], kind="stable")]
+
+        jobs = []
+        for row in rows[:limit].tolist():
+            job = self.jobs.iloc[row]
+            record = {col: None if pd.isna(job[col]) else str(job[col]) for col in RESULT_COLUMNS}
+            record["link"] = job_url(record["link"])
+            if record["appearDate"]:
+                record["appearDate"] = record["appearDate"][:10]
+            if distance is not None:
+                record["distance_km"] = round(distance[row], 1)
+            jobs.append(record)
+        return {"total": int(len(rows)), "jobs": jobs}
+
+
+_indexes: Dict[str, Tuple[float, JobQueryIndex]] = {}
+_lock = threading.Lock()
+
+
+def get_job_query_index(source: str = "104") -> JobQueryIndex:
+    """Process-wide index, rebuilt when the job data changes (a new scrape)."""
+    version = data_version(source)
+    with _lock:
+        cached = _indexes.get(source)
+        if cached and cached[0] == version:
+            return cached[1]
+        index = JobQueryIndex(source)
+        _indexes[source] = (version, index)
+        return index
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    index = JobQueryIndex("104")
+    print(f"index built in {(time.perf_counter() - start) * 1000:.1f}ms")
+    start = time.perf_counter()
+    result = index.query(locations=["台北市"], salary_type="H", min_salary=200,
+                         near=index.locate("捷運港墘站"), within_km=5, order_by="distance")
+    print(f"query in {(time.perf_counter() - start) * 1000:.2f}ms, {result['total']} jobs")
+    for job in result["jobs"]:
+        print(job["distance_km"], job["jobName"], job["jobAddrNoDesc"], job["salaryDesc"])
@@ -0,0 +1,180 @@
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from coding.job_store import SOURCES, data_version, job_url, read_jobs
+from coding.term_matrix import tokenize
+
+RAG_DIM = int(os.getenv("RAG_DIM", "4096"))
+CJK_RUN_RE = re.compile(r"[\u4e00-\u9fff]{2,}")
+RESULT_COLUMNS = ["jobNo", "jobName", "custName", "jobAddrNoDesc", "salaryDesc", "link"]
+
+
+def features(text: str) -> List[str]:
+    """
+    jieba words plus CJK character bigrams; the bigrams keep recall when the
+    segmenter splits Traditional Chinese terms badly.
+    """
+    if not isinstance(text, str):
+        return []
+    grams = [run[i:i + 2] for run in CJK_RUN_RE.findall(text) for i in range(len(run) - 1)]
+    return tokenize(text) + grams
+
+
+class HashedTfidf:
+    """
+    TF-IDF with the hashing trick: no vocabulary to store, so the query side
+    only needs the idf vector. Signed hashing keeps collisions unbiased.
+    """
+
+    def __init__(self, dim: int = RAG_DIM, idf: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.idf = idf if idf is not None else np.ones(dim, dtype=np.float32)
+
+    def _counts(self, text: str) -> Dict[int, float]:
+        counts: Dict[int, float] = {}
+        for feature in features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            col = h % self.dim
+            counts[col] = counts.get(col, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        return counts
+
+    def fit(self, texts: Iterable[str]) -> "HashedTfidf":
+        doc_freq = np.zeros(self.dim, dtype=np.float64)
+        n = 0
+        for text in texts:
+            n += 1
+            cols = list(self._counts(text))
+            doc_freq[cols] += 1
+        self.idf = (np.log((1 + n) / (1 + doc_freq)) + 1.0).astype(np.float32)
+        return self
+
+    def transform_one(self, text: str) -> np.ndarray:
+        """L2-normalized vector with sublinear tf."""
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for col, value in self._counts(text).items():
+            vec[col] = np.sign(value) * (1.0 + np.log(abs(value))) if value else 0.0
+        vec *= self.idf
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+def vector_paths(source: str = "104") -> Tuple[str, str]:
+    base = os.path.splitext(SOURCES[source]["csv"])[0]
+    return base + ".vectors.npy", base + ".vectors_meta.npz"
+
+
+def job_text(df: pd.DataFrame) -> pd.Series:
+    return df["jobName"].fillna("") + "\n" + df["description"].fillna("")
+
+
+def build_job_vectors(source: str = "104") -> str:
+    """
+    Embed every job (jobName + description) and save the matrix as .npy, so
+    it can be memory-mapped; keys and idf go to a small .npz next to it.
+
+    Returns:
+        str: Path of the matrix.
+    """
+    df = read_jobs(source, columns=["jobNo", "jobName", "description"])
+    texts = job_text(df).tolist()
+    vectorizer = HashedTfidf().fit(texts)
+    matrix_path, meta_path = vector_paths(source)
+    matrix = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float32,
+                                       shape=(len(texts), vectorizer.dim))
+    for i, text in enumerate(texts):
+        matrix[i] = vectorizer.transform_one(text)
+    matrix.flush()
+    del matrix
+    with open(meta_path, "wb") as f:
+        np.savez(f, keys=df["jobNo"].astype(str).to_numpy().astype("U"), idf=vectorizer.idf)
+    return matrix_path
+
+
+class JobRetriever:
+    """
+    Top-k semantic search over the job matrix, optionally restricted by
+    location and salary before scoring.
+    """
+
+    def __init__(self, source: str = "104"):
+        matrix_path, meta_path = vector_paths(source)
+        with np.load(meta_path, allow_pickle=False) as meta:
+            keys, idf = meta["keys"], meta["idf"]
+        self.matrix = np.load(matrix_path, mmap_mode="r")
+        self.vectorizer = HashedTfidf(dim=self.matrix.shape[1], idf=idf)
+        jobs = read_jobs(source, columns=RESULT_COLUMNS + ["description", "salaryType", "salaryLow", "salaryHigh"])
+        # align the job rows with the matrix rows
+        self.jobs = jobs.set_index(jobs["jobNo"].astype(str)).reindex(keys).reset_index(drop=True)
+        self.salary_low = pd.to_numeric(self.jobs["salaryLow"], errors="coerce").fillna(0).to_numpy()
+        self.salary_type = self.jobs["salaryType"].astype(str).to_numpy()
+        self.location = self.jobs["jobAddrNoDesc"].astype(str).to_numpy()
+
+    def search(self, query: str, top_k: int = 5, location: Optional[str] = None,
+               min_salary: Optional[int] = None, salary_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        mask = np.ones(len(self.jobs), dtype=bool)
+        if location:
+            mask &= np.char.find(self.location.astype(str), location) >= 0
+        if salary_type:
+            mask &= self.salary_type == salary_type
+        if min_salary:
+            mask &= self.salary_low >= min_salary
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return []
+
+        scores = self.matrix[rows] @ self.vectorizer.transform_one(query)
+        k = min(top_k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        results = []
+        for i in best:
+            if scores[i] <= 0:
+                break
+            job = self.jobs.iloc[rows[i]]
+            record = {col: None if pd.isna(job[col]) else str(job[col]) for col in RESULT_COLUMNS}
+            record["link"] = job_url(record["link"])
+            record["score"] = round(float(scores[i]), 3)
+            record["snippet"] = str(job["description"])[:200]
+            results.append(record)
+        return results
+
+
+_retrievers: Dict[str, Tuple[float, JobRetriever]] = {}
+_lock = threading.Lock()
+
+
+def get_job_retriever(source: str = "104") -> JobRetriever:
+    """
+    Process-wide retriever, safe to call from tool threads. The matrix is
+    rebuilt when it is older than the CSV (a new scrape).
+    """
+    version = data_version(source)
+    with _lock:
+        cached = _retrievers.get(source)
+        if cached and cached[0] == version:
+            return cached[1]
+        matrix_path, meta_path = vector_paths(source)
+        if not os.path.exists(meta_path) or os.path.getmtime(meta_path) < version:
+            build_job_vectors(source)
+        retriever = JobRetriever(source)
+        _retrievers[source] = (version, retriever)
+        return retriever
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    start = time.perf_counter()
+    path = build_job_vectors("104")
+    print(f"{path}: built in {time.perf_counter() - start:.1f}s")
+    query = sys.argv[1] if len(sys.argv) > 1 else "資料分析 Python"
+    for hit in JobRetriever("104").search(query):
+        print(hit["score"], hit["jobName"], hit["jobAddrNoDesc"], hit["salaryDesc"])
@@ -0,0 +1,138 @@
+import ast
+import logging
+import os
+import tempfile
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Each source keeps its CSV (what the scrapers commit) next to a typed
+# Parquet store (what the pages read), rebuilt by read_jobs() on the first
+# read after a scrape. Categorical columns are dictionary-encoded by
+# pyarrow, so repeated values are stored once.
+SOURCES: Dict[str, Dict] = {
+    "104": {
+        "csv": "pages/104_intern.csv",
+        "store": "pages/104_intern.parquet",
+        "categorical": ["jobAddrNoDesc", "coIndustryDesc", "custName", "optionEdu",
+                        "periodDesc", "salaryDesc", "applyDesc", "salaryType"],
+        "integer": ["salaryLow", "salaryHigh", "applyCnt", "s10"],
+        "float": ["lon", "lat"],
+        "date": ["appearDate"],
+    },
+    "cake": {
+        "csv": "pages/jobsthousands.csv",
+        "store": "pages/jobsthousands.parquet",
+        "categorical": ["comp_name"],
+        "integer": [],
+        "float": [],
+        "date": [],
+    },
+}
+
+
+def _apply_types(df: pd.DataFrame, spec: Dict) -> pd.DataFrame:
+    for col in spec["integer"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    for col in spec["float"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in spec["date"]:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format="%Y%m%d", errors="coerce")
+    for col in spec["categorical"]:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def build_store(source: str = "104") -> str:
+    """
+    Convert the CSV of `source` into its typed Parquet store.
+
+    Args:
+        source (str): Key of SOURCES, '104' or 'cake'.
+
+    Returns:
+        str: Path of the written Parquet file.
+    """
+    spec = SOURCES[source]
+    df = pd.read_csv(spec["csv"], dtype=str, encoding="utf-8-sig")
+    df = _apply_types(df, spec)
+    # Write a temp file and rename it over the store: sessions rebuilding at
+    # the same time never read (or leave behind) a half-written file
+    directory, name = os.path.split(spec["store"])
+    fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory or ".")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, spec["store"])
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return spec["store"]
+
+
+def _store_is_fresh(spec: Dict) -> bool:
+    store, csv = spec["store"], spec["csv"]
+    if not os.path.exists(store):
+        return False
+    return not os.path.exists(csv) or os.path.getmtime(store) >= os.path.getmtime(csv)
+
+
+def data_version(source: str = "104") -> float:
+    """Modification time of the source CSV; changes whenever a scrape lands."""
+    csv = SOURCES[source]["csv"]
+    return os.path.getmtime(csv) if os.path.exists(csv) else 0.0
+
+
+def read_jobs(source: str = "104", columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Uncached read of the typed store (rebuilt first if stale). Pages use the
+    cached coding.utils.load_jobs().
+    """
+    spec = SOURCES[source]
+    cols = list(columns) if columns else None
+
+    try:
+        if not _store_is_fresh(spec):
+            build_store(source)
+        return pd.read_parquet(spec["store"], columns=cols)
+    except (ImportError, OSError, ValueError) as e:
+        # pyarrow missing, read-only checkout or a corrupt store: parse the CSV directly
+        logger.warning("Cannot use %s: %s", spec["store"], e)
+        df = pd.read_csv(spec["csv"], usecols=cols, dtype=str, encoding="utf-8-sig")
+        return _apply_types(df, spec)
+
+
+def salary_band(df: pd.DataFrame) -> pd.Series:
+    """
+    Coarse salary band of every 104 posting from salaryType ('H' hourly,
+    'M' monthly) and salaryLow; anything else is 面議/其他.
+    """
+    low = pd.to_numeric(df["salaryLow"], errors="coerce").fillna(0).to_numpy()
+    kind = df["salaryType"].astype(str).to_numpy()
+    hourly, monthly = kind == "H", kind == "M"
+    bands = np.select(
+        [hourly & (low < 200), hourly & (low < 250), hourly,
+         monthly & (low < 35000), monthly & (low < 45000), monthly],
+        ["時薪未滿 200", "時薪 200-249", "時薪 250 以上",
+         "月薪未滿 35k", "月薪 35k-45k", "月薪 45k 以上"],
+        default="面議/其他",
+    )
+    return pd.Series(bands, index=df.index, name="salaryBand")
+
+
+def job_url(link: Optional[str]) -> Optional[str]:
+    """Posting URL out of the 104 `link` column (a dict repr of job/cust/applyAnalyze links)."""
+    if not isinstance(link, str):
+        return None
+    try:
+        job = ast.literal_eval(link).get("job")
+    except (ValueError, SyntaxError, AttributeError):
+        return None
+    return "https:" + job if job and job.startswith("//") else job
@@ -0,0 +1,212 @@
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+SERVER_ERROR_RE = re.compile(r"\b50[0-4]\b")
+TRANSIENT_MARKERS = ("timeout", "timed out", "unavailable", "internal server error", "bad gateway",
+                     "overloaded", "connection reset", "connection aborted")
+
+
+def _status(e: Exception) -> Optional[str]:
+    status = getattr(e, "status_code", None) or getattr(e, "code", None) or getattr(e, "status", None)
+    return None if status is None else str(status)
+
+
+def is_throttle_error(e: Exception) -> bool:
+    """429 / quota / rate-limit errors, whatever client library raised them."""
+    if _status(e) == "429":
+        return True
+    text = str(e).lower()
+    return any(s in text for s in ("429", "quota", "rate limit", "ratelimit", "resource exhausted", "resource_exhausted"))
+
+
+def is_retryable_error(e: Exception) -> bool:
+    """
+    Errors worth retrying: throttling, 5xx, timeouts and dropped connections.
+    Client errors (400 / 401 / 403 / ...) fail the same way every time.
+    """
+    if is_throttle_error(e) or isinstance(e, (TimeoutError, ConnectionError)):
+        return True
+    status = _status(e)
+    if status is not None and status.isdigit():
+        return status.startswith("5")
+    text = str(e).lower()
+    return bool(SERVER_ERROR_RE.search(text)) or any(s in text for s in TRANSIENT_MARKERS)
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class RunStats:
+    """
+    Call metrics of one run (e.g. one job_cleaner session) through a shared
+    scheduler. Concurrent runs each get their own from AIMDScheduler.new_run(),
+    so one run starting does not wipe another's numbers.
+    """
+
+    def __init__(self, scheduler: "AIMDScheduler"):
+        self.scheduler = scheduler
+        self.started_at = time.monotonic()
+        self.completed = 0
+        self.errors = 0
+        self.throttled = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=500)
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """AIMDScheduler.run, counted in this run's metrics."""
+        return self.scheduler._run(fn, args, kwargs, self)
+
+    def stats(self) -> Dict[str, float]:
+        scheduler = self.scheduler
+        with scheduler._cond:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            latencies = list(self.latencies)
+            return {
+                "limit": scheduler.limit,
+                "in_flight": scheduler.in_flight,
+                "completed": self.completed,
+                "calls": self.completed + self.retries + self.errors,  # requests actually sent
+                "throughput": self.completed / elapsed,
+                "p50": _percentile(latencies, 0.5),
+                "p95": _percentile(latencies, 0.95),
+                "errors": self.errors,
+                "throttled": self.throttled,
+                "retries": self.retries,
+            }
+
+
+class AIMDScheduler:
+    """
+    Concurrency limiter around LLM calls with additive-increase /
+    multiplicative-decrease control, like TCP congestion control.
+
+    - success under `latency_target`: the limit grows by ~`increase` per
+      round of `limit` completed calls
+    - 429 / quota error: the limit is multiplied by `decrease` (at most once
+      per round trip) and the call is retried after a jittered backoff
+    - 5xx / timeout errors: retried with jittered backoff up to `max_retries`
+    - other errors (400 / 401 / 403, ...): raised right away
+
+    stats() covers every call since the scheduler was created; a run that
+    wants its own numbers calls through new_run().
+
+    Args:
+        initial (float): Starting concurrency limit.
+        min_limit (int): Lowest limit after backing off.
+        max_limit (int): Highest limit; size thread pools to this.
+        increase (float): Additive step per round of successful calls.
+        decrease (float): Multiplicative factor applied on throttling.
+        latency_target (float): Seconds; slower successes do not grow the limit.
+        max_retries (int): Retries per call before the error is raised.
+        base_delay (float): First backoff delay in seconds, doubled per retry.
+        max_delay (float): Cap on a single backoff delay.
+    """
+
+    def __init__(self,
+                 initial: float = 4,
+                 min_limit: int = 1,
+                 max_limit: int = 32,
+                 increase: float = 1.0,
+                 decrease: float = 0.5,
+                 latency_target: float = 20.0,
+                 max_retries: int = 5,
+                 base_delay: float = 1.0,
+                 max_delay: float = 60.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._last_decrease = 0.0
+        self.totals = RunStats(self)
+
+    def new_run(self) -> RunStats:
+        """Fresh metrics for one run; call through the returned RunStats.run()."""
+        return RunStats(self)
+
+    # ------------------------------------------------------------- slots
+    def _acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= max(self.min_limit, int(self.limit)):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def _release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _count(self, run: Optional[RunStats], field: str) -> None:
+        with self._cond:
+            for stats in (self.totals, run):
+                if stats is not None:
+                    setattr(stats, field, getattr(stats, field) + 1)
+
+    def _on_success(self, latency: float, run: Optional[RunStats]) -> None:
+        with self._cond:
+            for stats in (self.totals, run):
+                if stats is not None:
+                    stats.completed += 1
+                    stats.latencies.append(latency)
+            if latency <= self.latency_target:
+                self.limit = min(self.max_limit, self.limit + self.increase / max(self.limit, 1.0))
+            self._cond.notify_all()
+
+    def _on_throttle(self, run: Optional[RunStats]) -> None:
+        self._count(run, "throttled")
+        with self._cond:
+            now = time.monotonic()
+            # one decrease per round trip: the other calls of the same burst see the same 429
+            round_trip = _percentile(self.totals.latencies, 0.5) or self.base_delay
+            if now - self._last_decrease >= round_trip:
+                self.limit = max(float(self.min_limit), self.limit * self.decrease)
+                self._last_decrease = now
+
+    def _backoff(self, attempt: int) -> None:
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        time.sleep(random.uniform(0, delay))  # full jitter
+
+    # ------------------------------------------------------------- public
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call `fn(*args, **kwargs)` under the current limit, retrying transient failures."""
+        return self._run(fn, args, kwargs, None)
+
+    def _run(self, fn: Callable[..., Any], args: tuple, kwargs: dict, run: Optional[RunStats]) -> Any:
+        attempt = 0
+        while True:
+            self._acquire()
+            start = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._release()
+                if is_throttle_error(e):
+                    self._on_throttle(run)
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    self._count(run, "errors")
+                    raise
+                self._count(run, "retries")
+                self._backoff(attempt)
+                attempt += 1
+                continue
+            self._release()
+            self._on_success(time.monotonic() - start, run)
+            return result
+
+    def stats(self) -> Dict[str, float]:
+        """Metrics of every call since the scheduler was created."""
+        return self.totals.stats()
@@ -0,0 +1,125 @@
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+Message = Dict[str, Any]
+
+
+class MessageStore:
+    """
+    Chat history of one session with bounded memory.
+
+    The newest `max_in_memory` messages are kept in a list; older ones are
+    paged out to an append-only JSONL archive and only read back when the
+    user asks for them. Rendering goes through visible(), so a rerun costs
+    O(visible messages) whatever the length of the conversation.
+
+    Args:
+        max_in_memory (int): Messages kept in memory.
+        page_size (int): Messages shown at first and added per "load earlier".
+        archive_dir (str): Directory of the per-session archives.
+    """
+
+    def __init__(self, max_in_memory: int = 100, page_size: int = 20,
+                 archive_dir: str = ".cache/chat_history"):
+        self.max_in_memory = max(max_in_memory, page_size)
+        self.page_size = page_size
+        self.visible_count = page_size
+        self.recent: List[Message] = []
+        self.archive_path = os.path.join(archive_dir, f"{uuid.uuid4().hex}.jsonl")
+        self._offsets: List[int] = []  # byte offset of every archived message
+
+    def __len__(self) -> int:
+        return len(self._offsets) + len(self.recent)
+
+    def append(self, message: Message) -> None:
+        self.recent.append(message)
+        if len(self.recent) > self.max_in_memory:
+            # page out the oldest half in one write instead of one message at a time
+            cut = len(self.recent) - self.max_in_memory // 2
+            self._archive(self.recent[:cut])
+            del self.recent[:cut]
+
+    def extend(self, messages: List[Message]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def clear(self) -> None:
+        self.recent.clear()
+        self._offsets.clear()
+        self.visible_count = self.page_size
+        if os.path.exists(self.archive_path):
+            os.remove(self.archive_path)
+
+    def _archive(self, messages: List[Message]) -> None:
+        os.makedirs(os.path.dirname(self.archive_path), exist_ok=True)
+        with open(self.archive_path, "ab") as f:
+            for message in messages:
+                self._offsets.append(f.tell())
+                f.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def _touch(self) -> bool:
+        """Mark the archive as in use so prune_archives() keeps it; False if it is gone."""
+        try:
+            os.utime(self.archive_path)
+            return True
+        except FileNotFoundError:
+            self._forget_archive()
+            return False
+
+    def _forget_archive(self) -> None:
+        """The archive was pruned or deleted behind our back: there are no older messages any more."""
+        self._offsets.clear()
+        self.visible_count = min(self.visible_count, max(len(self.recent), self.page_size))
+
+    def _read_archived(self, count: int) -> List[Message]:
+        """The last `count` archived messages, read with one seek."""
+        if count <= 0 or not self._offsets or not self._touch():
+            return []
+        count = min(count, len(self._offsets))
+        try:
+            with open(self.archive_path, "rb") as f:
+                f.seek(self._offsets[-count])
+                return [json.loads(line) for line in f.read().splitlines()]
+        except FileNotFoundError:
+            self._forget_archive()
+            return []
+
+    def visible(self) -> List[Message]:
+        """The newest `visible_count` messages, oldest first."""
+        if self._offsets:
+            self._touch()  # every rerun renders, so an open session's archive never looks idle
+        if self.visible_count <= len(self.recent):
+            return self.recent[-self.visible_count:]
+        return self._read_archived(self.visible_count - len(self.recent)) + self.recent
+
+    def hidden_count(self) -> int:
+        return max(0, len(self) - self.visible_count)
+
+    def load_earlier(self) -> None:
+        self.visible_count = min(len(self), self.visible_count + self.page_size)
+
+
+def prune_archives(archive_dir: str = ".cache/chat_history", max_age: float = 86400.0) -> None:
+    """Delete archives of sessions idle for longer than `max_age` seconds."""
+    if not os.path.isdir(archive_dir):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(archive_dir):
+        path = os.path.join(archive_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def new_store(max_in_memory: Optional[int] = None, page_size: Optional[int] = None) -> MessageStore:
+    """MessageStore sized from CHAT_MAX_IN_MEMORY / CHAT_PAGE_SIZE, after pruning stale archives."""
+    prune_archives()
+    return MessageStore(
+        max_in_memory=max_in_memory or int(os.getenv("CHAT_MAX_IN_MEMORY", "100")),
+        page_size=page_size or int(os.getenv("CHAT_PAGE_SIZE", "20")),
+    )
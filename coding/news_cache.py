@@ -0,0 +1,144 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import pandas as pd
+
+from coding.news_index import NewsIndex
+from coding.tools import fetch_all_news
+
+logger = logging.getLogger(__name__)
+
+# Seconds a fetched news page range stays fresh; override with NEWS_CACHE_TTL.
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", "900"))
+
+
+class SWRCache:
+    """
+    Process-wide TTL cache with stale-while-revalidate semantics.
+
+    - fresh entry: returned as is.
+    - stale entry: returned immediately while one background thread refreshes it.
+    - missing entry: loaded synchronously; concurrent callers for the same key
+      wait on the single in-flight load instead of issuing their own.
+
+    Args:
+        loader (callable): Builds the value for a key.
+        ttl (float): Seconds before an entry is considered stale.
+        keep (callable, optional): Returns False for values that must not be
+            cached, e.g. an empty result after every request failed.
+    """
+
+    def __init__(self,
+                 loader: Callable[[Hashable], Any],
+                 ttl: float,
+                 keep: Callable[[Any], bool] = lambda value: True):
+        self.loader = loader
+        self.ttl = ttl
+        self.keep = keep
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, key: Hashable, future: Future) -> None:
+        try:
+            value = self.loader(key)
+            if self.keep(value):
+                with self._lock:
+                    self._entries[key] = (time.monotonic(), value)
+            future.set_result(value)
+        except Exception as e:
+            logger.warning("Failed to load %s: %s", key, e)
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _start(self, key: Hashable, background: bool) -> Tuple[Future, bool]:
+        """Return the in-flight future for `key`, creating it if needed (caller holds the lock)."""
+        future = self._in_flight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        self._in_flight[key] = future
+        if background:
+            threading.Thread(target=self._load, args=(key, future), daemon=True).start()
+        return future, True
+
+    def get_entry(self, key: Hashable) -> Tuple[float, Any]:
+        """Like get(), with the time.monotonic() timestamp of the load that produced the value."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[0] >= self.ttl:
+                    self._start(key, background=True)
+                return entry
+            future, owner = self._start(key, background=False)
+
+        if owner:
+            self._load(key, future)
+        value = future.result()
+        with self._lock:
+            # the entry written by this load (absent when `keep` rejected the value)
+            return self._entries.get(key, (time.monotonic(), value))
+
+    def get(self, key: Hashable) -> Any:
+        return self.get_entry(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_news_cache = SWRCache(
+    loader=lambda key: fetch_all_news(*key),
+    ttl=NEWS_CACHE_TTL,
+    keep=lambda df: not df.empty,
+)
+
+
+def get_news(start_page: int = 1, end_page: int = 5, list_type: str = 'all') -> pd.DataFrame:
+    """
+    Cached fetch_all_news shared by every session of the app.
+
+    Args:
+        start_page (int): First page index to retrieve.
+        end_page (int): Last page index to retrieve (inclusive).
+        list_type (str): Section of news ('front', 'taiwan', etc.).
+
+    Returns:
+        pd.DataFrame: Same frame as fetch_all_news; treat it as read-only.
+    """
+    return _news_cache.get((start_page, end_page, list_type))
+
+
+_indexes: Dict[Hashable, Tuple[float, NewsIndex]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_news_index(start_page: int = 1, end_page: int = 5, list_type: str = 'all') -> NewsIndex:
+    """
+    Search index over the cached news, rebuilt when the cache refreshes.
+
+    A published index is never modified: a refresh builds a new one from
+    the fresh frame (so articles that dropped out of the fetched pages
+    leave the index) and swaps the reference, so searches running in
+    parallel tool threads need no lock.
+    """
+    key = (start_page, end_page, list_type)
+    loaded_at, df = _news_cache.get_entry(key)
+    with _indexes_lock:
+        cached = _indexes.get(key)
+    if cached is not None and cached[0] >= loaded_at:
+        return cached[1]
+
+    index = NewsIndex.from_frame(df)
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] >= loaded_at:
+            return cached[1]  # another thread built this (or a newer) version first
+        _indexes[key] = (loaded_at, index)
+    return index
@@ -0,0 +1,211 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text) -> List[str]:
+    if not isinstance(text, str):
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+class NewsIndex:
+    """
+    Search index over news articles.
+
+    - postings: field -> term -> [(doc, term frequency)], for BM25 ranking
+    - dates: sorted (ordinal, doc) arrays, so a date range is two binary searches
+    - sections: section -> bitmap (Python int, bit i = doc i)
+
+    An index is built once by from_frame() and never modified afterwards,
+    so threads can search it without a lock. coding.news_cache builds a new
+    one when the news cache refreshes; a few pages of articles index in
+    milliseconds, and articles that left the feed leave with the old index.
+
+    Args:
+        fields (Sequence[str]): Text columns to index.
+        k1 (float): BM25 term-frequency saturation.
+        b (float): BM25 length normalization.
+    """
+
+    def __init__(self, fields: Sequence[str] = ('ar_head', 'ar_desc'), k1: float = 1.2, b: float = 0.75):
+        self.fields = list(fields)
+        self.k1 = k1
+        self.b = b
+        self.rows: List[dict] = []
+        self.ar_ids: Dict[object, int] = {}
+        self.postings: Dict[str, Dict[str, List[Tuple[int, int]]]] = {f: {} for f in self.fields}
+        self.vocab: Dict[str, List[str]] = {f: [] for f in self.fields}
+        self.doc_len: Dict[str, List[int]] = {f: [] for f in self.fields}
+        self.total_len: Dict[str, int] = {f: 0 for f in self.fields}
+        self.date_keys: List[int] = []
+        self.date_docs: List[int] = []
+        self.sections: Dict[str, int] = {}
+        self.order: List[int] = []  # docs by ar_id descending, the unranked result order
+        self.rank: Dict[int, int] = {}
+        self.columns: List[str] = []
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, fields: Sequence[str] = ('ar_head', 'ar_desc')) -> "NewsIndex":
+        index = cls(fields)
+        index._build(df)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _build(self, df: pd.DataFrame) -> None:
+        """Index the articles of `df`, keeping the first row of a repeated ar_id."""
+        if df is None or df.empty:
+            return
+        self.columns = list(df.columns)
+
+        dates = pd.to_datetime(df['ar_pubdate'], errors='coerce') if 'ar_pubdate' in df.columns else None
+        for i, record in enumerate(df.to_dict(orient='records')):
+            key = record.get('ar_id', len(self.rows))
+            if key in self.ar_ids:
+                continue
+            doc = len(self.rows)
+            self.ar_ids[key] = doc
+            self.rows.append(record)
+
+            for field in self.fields:
+                terms = Counter(tokenize(record.get(field)))
+                postings = self.postings[field]
+                for term, tf in terms.items():
+                    if term not in postings:
+                        postings[term] = []
+                    postings[term].append((doc, tf))
+                length = sum(terms.values())
+                self.doc_len[field].append(length)
+                self.total_len[field] += length
+
+            if dates is not None and not pd.isna(dates.iloc[i]):
+                self.date_keys.append(dates.iloc[i].toordinal())
+                self.date_docs.append(doc)
+
+            section = record.get('ar_section')
+            self.sections[section] = self.sections.get(section, 0) | (1 << doc)
+
+        by_date = sorted(zip(self.date_keys, self.date_docs))
+        self.date_keys = [ordinal for ordinal, _ in by_date]
+        self.date_docs = [doc for _, doc in by_date]
+        for field in self.fields:
+            self.vocab[field] = sorted(self.postings[field])
+        self.order = sorted(range(len(self.rows)),
+                            key=lambda d: self.rows[d].get('ar_id', d), reverse=True)
+        self.rank = {doc: r for r, doc in enumerate(self.order)}
+
+    # ----------------------------------------------------------------- filters
+    def _section_mask(self, sections: Sequence[str]) -> int:
+        mask = 0
+        for section in sections:
+            mask |= self.sections.get(section, 0)
+        return mask
+
+    def _date_mask(self, date_from: Optional[str], date_to: Optional[str]) -> int:
+        lo = 0 if date_from is None else bisect_left(self.date_keys, pd.to_datetime(date_from).toordinal())
+        hi = len(self.date_keys) if date_to is None else bisect_right(self.date_keys, pd.to_datetime(date_to).toordinal())
+        mask = 0
+        for doc in self.date_docs[lo:hi]:
+            mask |= 1 << doc
+        return mask
+
+    # ----------------------------------------------------------------- ranking
+    def _term_postings(self, field: str, term: str) -> List[Tuple[int, int]]:
+        postings = self.postings[field]
+        if term in postings:
+            return postings[term]
+        # unseen term: fall back to a prefix match ("taiwan" -> "taiwanese")
+        vocab = self.vocab[field]
+        merged: Dict[int, int] = {}
+        i = bisect_left(vocab, term)
+        while i < len(vocab) and vocab[i].startswith(term):
+            for doc, tf in postings[vocab[i]]:
+                merged[doc] = merged.get(doc, 0) + tf
+            i += 1
+        return list(merged.items())
+
+    def _bm25(self, terms: List[str], fields: List[str], allowed: Optional[int]) -> Dict[int, float]:
+        n_docs = len(self.rows)
+        per_term = []
+        for term in terms:
+            hits = {f: self._term_postings(f, term) for f in fields}
+            docs = set()
+            for postings in hits.values():
+                docs.update(doc for doc, _ in postings)
+            per_term.append((docs, hits))
+
+        # every term must occur; intersect from the rarest term and stop early once empty
+        per_term.sort(key=lambda t: len(t[0]))
+        candidates = None
+        for docs, _ in per_term:
+            candidates = docs if candidates is None else candidates & docs
+            if allowed is not None:
+                candidates = {d for d in candidates if allowed >> d & 1}
+            if not candidates:
+                return {}
+
+        scores: Dict[int, float] = {}
+        for docs, hits in per_term:
+            for field, postings in hits.items():
+                df_t = len(postings)
+                idf = math.log(1 + (n_docs - df_t + 0.5) / (df_t + 0.5))
+                avg_len = self.total_len[field] / n_docs or 1
+                lengths = self.doc_len[field]
+                for doc, tf in postings:
+                    if doc not in candidates:
+                        continue
+                    norm = tf + self.k1 * (1 - self.b + self.b * lengths[doc] / avg_len)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return scores
+
+    def search(self,
+               query: Optional[str] = None,
+               search_columns: Optional[List[str]] = None,
+               sections: Optional[List[str]] = None,
+               date_from: Optional[str] = None,
+               date_to: Optional[str] = None,
+               news_number: Optional[int] = 5) -> pd.DataFrame:
+        """
+        Same filters as coding.tools.search_news. With a query, results are
+        ranked by BM25 relevance; without one, by ar_id (newest first).
+        """
+        fields = search_columns or self.fields
+        missing = set(fields) - set(self.fields)
+        if missing:
+            raise KeyError(f"Search columns not indexed: {missing}")
+
+        allowed = None
+        if sections is not None:
+            allowed = self._section_mask(sections)
+        if date_from is not None or date_to is not None:
+            date_mask = self._date_mask(date_from, date_to)
+            allowed = date_mask if allowed is None else allowed & date_mask
+
+        terms = tokenize(query) if query is not None else []
+        if terms:
+            scores = self._bm25(terms, fields, allowed)
+            key = lambda d: (scores[d], -self.rank[d])
+            if news_number is None:
+                docs = sorted(scores, key=key, reverse=True)
+            else:
+                docs = heapq.nlargest(news_number, scores, key=key)
+        elif query is not None and query.strip():
+            docs = []  # query with no searchable tokens matches nothing
+        else:
+            docs = []
+            for doc in self.order:
+                if allowed is None or allowed >> doc & 1:
+                    docs.append(doc)
+                    if news_number is not None and len(docs) >= news_number:
+                        break
+
+        return pd.DataFrame([self.rows[d] for d in docs], columns=self.columns)
@@ -0,0 +1,157 @@
+"""
+Rule-based fast path for job content extraction.
+
+Many 104 descriptions carry an explicit header such as 【工作內容】,
+〔工作內容/工作時段〕, 工作內容： or Responsibilities. parse_job_content()
+cuts that section out deterministically and scores how sure it is, so the
+LLM only sees the postings the rules cannot handle.
+
+Benchmark over the bundled CSV:
+    python -m coding.section_parser pages/104_intern.csv
+"""
+import csv
+import re
+import sys
+import time
+from typing import List, Optional, Tuple
+
+CONTENT_MARKERS = [
+    "工作內容", "職務內容", "見習內容", "實習內容", "工作職責", "職務說明", "工作說明",
+    "工作項目", "實習項目", "主要職責", "職責",
+    "responsibilities", "job description", "what you will do", "what you'll do", "duties", "your role",
+]
+OTHER_MARKERS = [
+    "薪資", "福利", "待遇", "條件", "資格", "需求", "要求", "工作時間", "上班時間", "工作時段", "工作地點",
+    "上班地點", "地點", "期間", "注意", "應徵", "備註", "加分", "公司", "關於我們", "聯絡",
+    "requirements", "qualifications", "benefits", "what we offer", "about us", "nice to have", "salary",
+]
+
+# decorations that open a header line: brackets, bullets, numbering like "5." or "B."
+LEAD_RE = re.compile(r"^[\s【〔﹝\[《（(<■◆◇●▍▌★☆◎※#＊*⭕▪•\-—~]*(?:[0-9A-Za-z][.)、．]\s*)?")
+CLOSE_CHARS = "】〕﹞]》）)>"
+LIST_ITEM_RE = re.compile(r"^\s*(?:[0-9]+[.)、．）]|[（(][0-9]+[)）]|[•●◆◇■▪★☆。\-—‧·]|[*＊](?![*＊])|[a-zA-Z][.)])")
+INLINE_SEP_RE = re.compile(r"^[\s/／|｜]*[^：:\n]{0,8}?[：:]\s*")
+
+
+def _header(line: str) -> Tuple[Optional[str], str, bool]:
+    """
+    Classify one line.
+
+    Returns:
+        (kind, inline text, standalone): kind is 'content', 'other' or None;
+            inline text is what follows 'header：' on the same line;
+            standalone is True for a header on a line of its own.
+    """
+    body = LEAD_RE.sub("", line).strip()
+    lower = body.lower()
+    for kind, markers in (("content", CONTENT_MARKERS), ("other", OTHER_MARKERS)):
+        for marker in markers:
+            if not lower.startswith(marker):
+                continue
+            rest = body[len(marker):]
+            bracketed = any(c in rest[:12] for c in CLOSE_CHARS)
+            stripped = rest.strip(" :：" + CLOSE_CHARS + "/／|｜")
+            if not stripped or (bracketed and len(rest) <= 12 and "：" not in rest and ":" not in rest):
+                return kind, "", True
+            m = INLINE_SEP_RE.match(rest)
+            if m:
+                inline = rest[m.end():].strip()
+                return kind, inline, not inline
+            if bracketed and len(body) <= 20:
+                return kind, "", True
+            return None, "", False
+    return None, "", False
+
+
+def parse_job_content(desc: str) -> Tuple[str, float]:
+    """
+    Extract the job content section of a description.
+
+    Args:
+        desc (str): Raw job description.
+
+    Returns:
+        Tuple[str, float]: (content, confidence in [0, 1]); ("", 0.0) when no
+            content header is found.
+    """
+    if not isinstance(desc, str) or not desc.strip():
+        return "", 0.0
+
+    lines = desc.replace("\r\n", "\n").split("\n")
+    start = None
+    for i, line in enumerate(lines):
+        kind, inline, standalone = _header(line)
+        if kind == "content":
+            start, first, is_standalone = i, inline, standalone
+            break
+    if start is None:
+        return "", 0.0
+
+    body: List[str] = [first] if first else []
+    ended_by_header = False
+    i = start + 1
+    while i < len(lines):
+        line = lines[i]
+        kind, inline, standalone = _header(line)
+        if kind == "other" and (standalone or not LIST_ITEM_RE.match(line)):
+            ended_by_header = True
+            break
+        if kind == "content":
+            if inline:
+                body.append(inline)
+            i += 1
+            continue
+        if not line.strip():
+            # a blank line ends the section unless the list carries on after it
+            nxt = next((l for l in lines[i + 1:] if l.strip()), "")
+            if body and not LIST_ITEM_RE.match(nxt):
+                break
+            i += 1
+            continue
+        body.append(line.strip())
+        i += 1
+
+    content = "\n".join(body).strip()
+    if not content:
+        return "", 0.0
+
+    list_items = sum(1 for b in body if LIST_ITEM_RE.match(b))
+    confidence = 0.5
+    confidence += 0.2 if is_standalone else 0.0
+    confidence += 0.2 if list_items >= 2 or len(body) >= 2 else 0.0
+    confidence += 0.1 if ended_by_header else 0.0
+    if len(content) < 8:
+        confidence = min(confidence, 0.3)
+    if len(content) > 0.8 * len(desc.strip()) and len(desc) > 200:
+        confidence -= 0.2  # the "section" swallowed almost everything
+    return content, round(max(0.0, min(1.0, confidence)), 2)
+
+
+def benchmark(path: str, threshold: float = 0.7) -> dict:
+    """Fast-path hit rate and per-row cost over a CSV with a 'description' column."""
+    csv.field_size_limit(sys.maxsize)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        descs = [row.get("description", "") for row in csv.DictReader(f)]
+
+    start = time.perf_counter()
+    scores = [parse_job_content(d)[1] for d in descs]
+    elapsed = time.perf_counter() - start
+
+    hits = sum(1 for s in scores if s >= threshold)
+    found = sum(1 for s in scores if s > 0)
+    return {
+        "rows": len(descs),
+        "section_found": found,
+        "fast_path_hits": hits,
+        "hit_rate": hits / len(descs) if descs else 0.0,
+        "us_per_row": elapsed / len(descs) * 1e6 if descs else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "pages/104_intern.csv"
+    result = benchmark(csv_path)
+    print(f"rows:            {result['rows']}")
+    print(f"section found:   {result['section_found']}")
+    print(f"fast-path hits:  {result['fast_path_hits']} ({result['hit_rate']:.1%}, threshold 0.7)")
+    print(f"time per row:    {result['us_per_row']:.1f} µs")
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+from typing import Any, Collection, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+
+def csv_value(value: Any) -> str:
+    """
+    A value as upsert_csv writes it and read_csv_str reads it back: missing
+    values are "", and whole floats lose the ".0" that a NaN elsewhere in an
+    integer column adds (200 and 200.0 are both "200").
+    """
+    if value is None or (isinstance(value, float) and value != value) or value is pd.NA:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def record_digest(record: Dict[str, Any], exclude: Collection[str] = ()) -> str:
+    """
+    Content hash of one posting, over its csv_value()s. Empty values are left
+    out, so a record straight from the API (where a key may be missing) and
+    the same row read back from the CSV (where it is "") hash the same.
+    Fields in `exclude` (e.g. applicant counts that change every day) do not
+    count as a change of the posting.
+    """
+    normalized = {k: v for k, v in ((k, csv_value(v)) for k, v in record.items() if k not in exclude) if v != ""}
+    payload = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SeenIndex:
+    """
+    On-disk index of already-scraped postings (key -> content digest).
+
+    Stored as sorted, one-entry-per-line JSON so the nightly commit only
+    touches the lines of new or changed postings.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def status(self, key: str, digest: str) -> str:
+        """Return 'new', 'changed' or 'known'."""
+        if key not in self.entries:
+            return "new"
+        return "known" if self.entries[key] == digest else "changed"
+
+    def update(self, key: str, digest: str) -> None:
+        self.entries[key] = digest
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, sort_keys=True, indent=0)
+            f.write("\n")
+
+    @classmethod
+    def from_csv(cls, path: str, csv_path: str, key_cols: List[str],
+                 exclude: Collection[str] = ()) -> "SeenIndex":
+        """Load the index, bootstrapping it from an existing CSV if it is missing."""
+        index = cls(path)
+        if not index.entries and os.path.exists(csv_path):
+            old = read_csv_str(csv_path)
+            for key, record in zip(row_keys(old, key_cols), old.to_dict(orient="records")):
+                index.update(key, record_digest(record, exclude))
+        return index
+
+
+def read_csv_str(path: str) -> pd.DataFrame:
+    # 全部以字串讀入，避免 '0000200' 這類欄位被轉成數字而改動整個檔案
+    return pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+
+
+def row_keys(df: pd.DataFrame, key_cols: List[str]) -> List[str]:
+    if df.empty:
+        return []
+    return df[key_cols].astype(str).agg("|".join, axis=1).tolist()
+
+
+def select_changed(index: SeenIndex,
+                   records: Iterable[Dict[str, Any]],
+                   key_cols: List[str],
+                   exclude: Collection[str] = ()) -> List[Dict[str, Any]]:
+    """Keep only new or changed records (ignoring `exclude` fields), recording their digests in `index`."""
+    changed = []
+    seen_keys = set()
+    for record in records:
+        key = "|".join(str(record.get(c)) for c in key_cols)
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+        digest = record_digest(record, exclude)
+        if index.status(key, digest) != "known":
+            index.update(key, digest)
+            changed.append(record)
+    return changed
+
+
+def upsert_csv(csv_path: str,
+               new_df: pd.DataFrame,
+               key_cols: List[str],
+               columns: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Merge `new_df` into `csv_path`: changed rows are replaced in place and
+    new rows are prepended (the sources are newest-first), everything else is
+    written back byte-for-byte.
+
+    Returns:
+        dict: {'added': n, 'updated': n, 'total': n}
+    """
+    new_df = new_df.astype(object).apply(lambda col: col.map(csv_value))
+    if columns is not None:
+        new_df = new_df.reindex(columns=columns, fill_value="")
+
+    if os.path.exists(csv_path):
+        old = read_csv_str(csv_path)
+    else:
+        old = pd.DataFrame(columns=new_df.columns)
+
+    cols = list(old.columns) + [c for c in new_df.columns if c not in old.columns]
+    old = old.reindex(columns=cols, fill_value="")
+    new_df = new_df.reindex(columns=cols, fill_value="")
+
+    position = {k: i for i, k in enumerate(row_keys(old, key_cols))}
+    new_keys = row_keys(new_df, key_cols)
+    is_update = [k in position for k in new_keys]
+
+    updates = new_df[is_update]
+    if not updates.empty:
+        rows = [position[k] for k, u in zip(new_keys, is_update) if u]
+        old.iloc[rows] = updates.values
+
+    added = new_df[[not u for u in is_update]]
+    merged = pd.concat([added, old], ignore_index=True)
+    merged.to_csv(csv_path, index=False, encoding="utf-8-sig")
+
+    return {"added": len(added), "updated": len(updates), "total": len(merged)}
@@ -0,0 +1,100 @@
+import ast
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import pandas as pd
+
+
+def normalize_tag(tag: str) -> str:
+    return re.sub(r"\s+", " ", str(tag)).strip().casefold()
+
+
+def parse_tags(value) -> List[str]:
+    """`job_tags` is stored as a stringified Python list, e.g. "['SQL', 'R']"."""
+    if isinstance(value, (list, tuple)):
+        tags = value
+    elif not isinstance(value, str) or not value.strip():
+        return []
+    else:
+        try:
+            tags = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            tags = value.split(",")
+        if not isinstance(tags, (list, tuple)):
+            tags = [tags]
+    return [t for t in (normalize_tag(t) for t in tags) if t]
+
+
+def parse_skill_query(text: str) -> Tuple[List[str], str]:
+    """
+    Split a user prompt into skills and a combine mode.
+
+    "Python and SQL" / "Python & SQL" / "Python + SQL" -> AND,
+    "Python, SQL" / "Python、SQL" / "Python or SQL" -> OR.
+    Operators need surrounding spaces so tags like "C++" or "R&D" stay whole.
+    """
+    and_sep = r"\s+(?:and|&|\+)\s+"
+    if re.search(and_sep, text, flags=re.I):
+        parts, mode = re.split(and_sep, text, flags=re.I), "and"
+    else:
+        parts, mode = re.split(r"\s+or\s+|[,，、;；|]", text, flags=re.I), "or"
+    skills = [normalize_tag(p) for p in parts if normalize_tag(p)]
+    return skills, mode
+
+
+class SkillIndex:
+    """
+    Inverted index from normalized tag to the row positions carrying it.
+
+    Exact lookups are a dict hit and prefix lookups a binary search over the
+    sorted vocabulary, so a query costs O(matches) instead of a scan over
+    every row.
+    """
+
+    def __init__(self, tags_per_row: Iterable[Sequence[str]]):
+        postings: Dict[str, List[int]] = {}
+        for row_id, tags in enumerate(tags_per_row):
+            for tag in set(tags):
+                postings.setdefault(tag, []).append(row_id)
+        self.postings = postings
+        self.vocab = sorted(postings)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, column: str = "job_tags") -> "SkillIndex":
+        return cls(parse_tags(v) for v in df[column].tolist())
+
+    def lookup(self, skill: str, prefix: bool = False) -> List[int]:
+        skill = normalize_tag(skill)
+        if not prefix:
+            return self.postings.get(skill, [])
+        rows = []
+        i = bisect_left(self.vocab, skill)
+        while i < len(self.vocab) and self.vocab[i].startswith(skill):
+            rows.extend(self.postings[self.vocab[i]])
+            i += 1
+        return rows
+
+    def query(self, skills: Sequence[str], mode: str = "or", prefix: bool = False) -> List[Tuple[int, int]]:
+        """
+        Args:
+            skills (Sequence[str]): Skills to look up.
+            mode (str): 'or' keeps rows matching any skill, 'and' only rows
+                matching all of them.
+            prefix (bool): Match tags starting with each skill instead of
+                equal to it.
+
+        Returns:
+            List[Tuple[int, int]]: (row position, matched skill count), best
+                matches first and ties in row order.
+        """
+        counts: Counter = Counter()
+        for skill in skills:
+            counts.update(set(self.lookup(skill, prefix=prefix)))
+        if mode == "and":
+            ranked = [(r, c) for r, c in counts.items() if c == len(skills)]
+        else:
+            ranked = list(counts.items())
+        ranked.sort(key=lambda rc: (-rc[1], rc[0]))
+        return ranked
@@ -0,0 +1,158 @@
+import csv
+import hashlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+Item = Tuple[Hashable, str]
+OUTPUT_COLUMNS = ["rowIndex", "jobName", "jobContent"]
+
+
+class RowFailed(Exception):
+    """A per-row failure returned in place of the content by plan/work results."""
+
+
+def file_digest(fileobj, block_size: int = 1 << 20) -> str:
+    """SHA-256 of an uploaded file, read in blocks; the file position is restored."""
+    h = hashlib.sha256()
+    pos = fileobj.tell()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(block_size), b""):
+        h.update(block)
+    fileobj.seek(pos)
+    return h.hexdigest()
+
+
+def checkpoint_path(digest: str, directory: str = ".cache/job_cleaner") -> str:
+    return os.path.join(directory, f"{digest[:16]}.csv")
+
+
+def load_done(out_path: str) -> Set[int]:
+    """Row indexes already written to `out_path` (the checkpoint of a previous run)."""
+    if not os.path.exists(out_path):
+        return set()
+    done = pd.read_csv(out_path, usecols=["rowIndex"], encoding="utf-8-sig")["rowIndex"]
+    return set(int(i) for i in done)
+
+
+def read_output(out_path: str) -> pd.DataFrame:
+    """
+    The output / checkpoint CSV in input order. Rows are appended as they
+    finish, so the file itself is in completion order.
+    """
+    out = pd.read_csv(out_path, dtype={"jobName": str, "jobContent": str},
+                      keep_default_na=False, encoding="utf-8-sig")
+    return out.sort_values("rowIndex", kind="stable").reset_index(drop=True)
+
+
+def read_contents(out_path: str, rows: Set[int], chunksize: int = 10000) -> Dict[int, str]:
+    """jobContent of `rows` in the output / checkpoint CSV, read in chunks."""
+    if not rows or not os.path.exists(out_path):
+        return {}
+    found: Dict[int, str] = {}
+    for chunk in pd.read_csv(out_path, usecols=["rowIndex", "jobContent"], dtype={"jobContent": str},
+                             keep_default_na=False, encoding="utf-8-sig", chunksize=chunksize):
+        hits = chunk[chunk["rowIndex"].isin(rows)]
+        found.update(zip(hits["rowIndex"].astype(int), hits["jobContent"]))
+    return found
+
+
+def clean_stream(chunks: Iterable[pd.DataFrame],
+                 out_path: str,
+                 plan: Callable[[List[Item]], Tuple[Dict[Hashable, str], List[List[Item]]]],
+                 work: Callable[[List[Item]], Dict[Hashable, str]],
+                 window: int = 64,
+                 max_workers: int = 32,
+                 on_progress: Optional[Callable[[int], None]] = None) -> Dict[str, object]:
+    """
+    Stream a CSV through the extractor with a bounded number of work units
+    in flight, appending each cleaned row to `out_path` as soon as it is done.
+
+    Rows already in `out_path` are skipped, so an interrupted run resumes
+    where it stopped. Failed rows are not written and are retried next run.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): `pd.read_csv(..., chunksize=n)`
+            reader with 'jobName' and 'description' columns.
+        out_path (str): Output / checkpoint CSV (rowIndex, jobName, jobContent).
+        plan (callable): Splits a chunk's pending (row index, description)
+            pairs into rows resolved right away (e.g. cache hits) and work units.
+        work (callable): Runs one unit and returns {row index: content};
+            rows missing from the result count as failures. A value may be
+            an exception (e.g. RowFailed) to report that row as failed, and
+            results may cover rows outside the unit (duplicates fanned out).
+        window (int): Maximum number of units in flight.
+        max_workers (int): Thread pool size.
+        on_progress (callable, optional): Called with the number of rows
+            written so far in this run.
+
+    Returns:
+        dict: {'written': n, 'skipped': n, 'failures': [(row index, error), ...]}
+    """
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    done = load_done(out_path)
+    new_file = not os.path.exists(out_path)
+    stats = {"written": 0, "skipped": 0, "failures": []}
+
+    with open(out_path, "a", newline="", encoding="utf-8-sig" if new_file else "utf-8") as f, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(OUTPUT_COLUMNS)
+        names: Dict[Hashable, str] = {}
+        in_flight = {}
+
+        def write(results: Dict[Hashable, object]) -> None:
+            written = 0
+            for idx, content in results.items():
+                if isinstance(content, Exception):
+                    names.pop(idx, None)
+                    stats["failures"].append((idx, str(content)))
+                    continue
+                writer.writerow([idx, names.pop(idx, ""), content])
+                written += 1
+            f.flush()
+            stats["written"] += written
+            if on_progress and written:
+                on_progress(stats["written"])
+
+        def drain(block_until: int) -> None:
+            while len(in_flight) > block_until:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    unit = in_flight.pop(future)
+                    try:
+                        results = future.result()
+                        error = "no result"
+                    except Exception as e:
+                        results, error = {}, str(e)
+                    write(results)
+                    for idx, _ in unit:
+                        if idx not in results and idx in names:
+                            names.pop(idx)
+                            stats["failures"].append((idx, error))
+
+        for chunk in chunks:
+            pending: List[Item] = []
+            for idx, name, desc in zip(chunk.index, chunk["jobName"], chunk["description"]):
+                idx = int(idx)
+                if idx in done:
+                    stats["skipped"] += 1
+                    continue
+                names[idx] = name
+                pending.append((idx, desc))
+
+            resolved, units = plan(pending)
+            write(resolved)
+            for unit in units:
+                drain(window - 1)
+                in_flight[executor.submit(work, unit)] = unit
+        drain(0)
+        # rows no plan or work result ever mentioned must not vanish silently
+        for idx in list(names):
+            names.pop(idx)
+            stats["failures"].append((idx, "no result"))
+
+    return stats
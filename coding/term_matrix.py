@@ -0,0 +1,200 @@
+import logging
+import os
+import re
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence
+
+import jieba
+import numpy as np
+import streamlit as st
+from scipy import sparse
+
+from coding.job_store import SOURCES, read_jobs
+
+logger = logging.getLogger(__name__)
+
+jieba.setLogLevel(60)  # silence the "Building prefix dict" banner
+# jieba's default dictionary is Simplified Chinese; point JIEBA_DICT at
+# dict.txt.big (Traditional + Simplified) for better segmentation of 104 text
+if os.getenv("JIEBA_DICT"):
+    jieba.set_dictionary(os.getenv("JIEBA_DICT"))
+
+# Function words and boilerplate that carry no meaning in a job posting
+STOPWORDS = {
+    "的", "了", "和", "與", "及", "或", "在", "是", "有", "為", "於", "等", "並", "將", "可", "能", "會",
+    "我們", "你", "您", "我", "他", "她", "其", "之", "以", "而", "也", "就", "都", "對", "從", "到",
+    "相關", "以上", "以及", "進行", "協助", "具備", "具有", "負責", "提供", "需要", "可以", "能夠",
+    "如果", "歡迎", "一起", "其他", "工作", "內容", "公司", "the", "and", "or", "of", "to", "in",
+    "for", "with", "a", "an", "is", "are", "be", "on", "as", "at", "by", "you", "we", "our", "your",
+}
+
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+WORD_RE = re.compile(r"\w")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Segment a description into words with jieba; drop stopwords, punctuation,
+    numbers and single CJK characters. Latin words are lowercased.
+    """
+    if not isinstance(text, str) or not text:
+        return []
+    tokens = []
+    for token in jieba.lcut(URL_RE.sub(" ", text)):
+        token = token.strip().lower()
+        if len(token) < 2 or not WORD_RE.search(token) or token.isdigit():
+            continue
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+    return tokens
+
+
+class TermMatrix:
+    """
+    Document-term counts of a job corpus in CSR layout (one row per job).
+
+    Attributes:
+        keys (np.ndarray): Job id of every row.
+        vocab (np.ndarray): Term of every column.
+        indptr, indices, data (np.ndarray): CSR arrays; row i holds the terms
+            vocab[indices[indptr[i]:indptr[i + 1]]] with counts data[...].
+    """
+
+    def __init__(self, keys, vocab, indptr, indices, data):
+        self.keys = np.asarray(keys).astype(str)
+        self.vocab = np.asarray(vocab).astype(str)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.int32)
+        self._row_of = {key: i for i, key in enumerate(self.keys)}
+        self._csr = None
+        self._idf = None
+
+    @classmethod
+    def build(cls, keys: Iterable[Hashable], texts: Iterable[str]) -> "TermMatrix":
+        vocab: Dict[str, int] = {}
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            counts: Dict[int, int] = {}
+            for token in tokenize(text):
+                col = vocab.setdefault(token, len(vocab))
+                counts[col] = counts.get(col, 0) + 1
+            for col in sorted(counts):
+                indices.append(col)
+                data.append(counts[col])
+            indptr.append(len(indices))
+        return cls(list(keys), list(vocab), indptr, indices, data)
+
+    @classmethod
+    def load(cls, path: str) -> "TermMatrix":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(z["keys"], z["vocab"], z["indptr"], z["indices"], z["data"])
+
+    def save(self, path: str) -> None:
+        # write through a file object so numpy does not append ".npz" to the name
+        with open(path, "wb") as f:
+            np.savez_compressed(f, keys=self.keys, vocab=self.vocab, indptr=self.indptr,
+                                indices=self.indices, data=self.data)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def row_of(self, key: Hashable) -> Optional[int]:
+        return self._row_of.get(str(key))
+
+    def frequencies(self, row: int) -> Dict[str, int]:
+        """Term -> count of one job, ready for WordCloud.generate_from_frequencies."""
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return dict(zip(self.vocab[self.indices[start:end]].tolist(), self.data[start:end].tolist()))
+
+    def rows_of(self, keys: Iterable[Hashable]) -> np.ndarray:
+        """Row numbers of the given job ids; unknown ids are skipped."""
+        rows = (self._row_of.get(str(key)) for key in keys)
+        return np.fromiter((r for r in rows if r is not None), dtype=np.int64)
+
+    @property
+    def csr(self) -> sparse.csr_matrix:
+        if self._csr is None:
+            self._csr = sparse.csr_matrix((self.data, self.indices, self.indptr),
+                                          shape=(len(self.keys), len(self.vocab)))
+        return self._csr
+
+    @property
+    def idf(self) -> np.ndarray:
+        """Smoothed inverse document frequency of every term, as in scikit-learn."""
+        if self._idf is None:
+            doc_freq = np.bincount(self.indices, minlength=len(self.vocab))
+            self._idf = np.log((1 + len(self.keys)) / (1 + doc_freq)) + 1.0
+        return self._idf
+
+    def aggregate(self, rows: Sequence[int], weighting: str = "tf", top: int = 200) -> Dict[str, float]:
+        """
+        Term weights summed over a subset of jobs.
+
+        Args:
+            rows (Sequence[int]): Row numbers of the subset.
+            weighting (str): 'tf' for raw counts, 'tfidf' to scale each term by
+                its idf so words found in every posting (實習, 公司) fade out.
+            top (int): Keep only the heaviest terms.
+
+        Returns:
+            Dict[str, float]: Term -> weight, heaviest first.
+        """
+        if len(rows) == 0:
+            return {}
+        # sparse row-sum: one pass over the non-zeros of the selected rows
+        totals = np.asarray(self.csr[np.asarray(rows)].sum(axis=0)).ravel().astype(float)
+        if weighting == "tfidf":
+            totals *= self.idf  # sum of tf * idf == idf * sum of tf, per term
+        nonzero = np.flatnonzero(totals)
+        if len(nonzero) > top:
+            nonzero = nonzero[np.argpartition(totals[nonzero], -top)[-top:]]
+        nonzero = nonzero[np.argsort(-totals[nonzero], kind="stable")]
+        return dict(zip(self.vocab[nonzero].tolist(), totals[nonzero].tolist()))
+
+
+def term_store_path(source: str = "104") -> str:
+    return os.path.splitext(SOURCES[source]["csv"])[0] + ".terms.npz"
+
+
+def build_term_store(source: str = "104") -> str:
+    """
+    Segment every description of `source` once and save the term counts next
+    to its CSV. The scrapers call this after each run.
+
+    Returns:
+        str: Path of the written .npz file.
+    """
+    df = read_jobs(source, columns=["jobNo", "description"])
+    matrix = TermMatrix.build(df["jobNo"], df["description"])
+    path = term_store_path(source)
+    matrix.save(path)
+    return path
+
+
+@st.cache_resource(show_spinner=False)
+def load_term_matrix(source: str = "104", version: float = 0.0) -> TermMatrix:
+    """
+    Shared term matrix of `source`; `version` is data_version(source), so a
+    new scrape rebuilds a stale store instead of serving old counts.
+    """
+    path = term_store_path(source)
+    if not os.path.exists(path) or os.path.getmtime(path) < version:
+        try:
+            build_term_store(source)
+        except OSError as e:
+            # read-only checkout: keep the matrix in memory only
+            logger.warning("Cannot write %s: %s", path, e)
+            df = read_jobs(source, columns=["jobNo", "description"])
+            return TermMatrix.build(df["jobNo"], df["description"])
+    return TermMatrix.load(path)
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    out = build_term_store("104")
+    matrix = TermMatrix.load(out)
+    print(f"{out}: {len(matrix)} jobs, {len(matrix.vocab)} terms, "
+          f"{len(matrix.data)} non-zeros in {time.perf_counter() - start:.1f}s")
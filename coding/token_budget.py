@@ -0,0 +1,111 @@
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from coding.batch_extract import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Token budgets of what is fed to the agents; override with env vars
+TOOL_TOKEN_BUDGET = int(os.getenv("TOOL_TOKEN_BUDGET", "1500"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+FIELD_TOKEN_LIMIT = int(os.getenv("FIELD_TOKEN_LIMIT", "120"))
+
+
+class BudgetReport(NamedTuple):
+    name: str
+    total: int      # items before capping
+    returned: int   # items that fit the budget
+    tokens: int     # estimated tokens of the returned items
+
+    def log(self) -> None:
+        logger.info("%s: %d/%d items, ~%d tokens", self.name, self.returned, self.total, self.tokens)
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Longest prefix of `text` within `max_tokens` (by estimate_tokens), marked with '…'."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, min(len(text), max_tokens * 4)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) < max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + "…"
+
+
+def compact_record(record: Dict[str, Any],
+                   fields: Optional[Sequence[str]] = None,
+                   max_field_tokens: int = FIELD_TOKEN_LIMIT) -> Dict[str, Any]:
+    """
+    Project `record` to `fields`, drop empty values and truncate long text,
+    leaving a JSON-serializable dict.
+    """
+    compact = {}
+    for key in fields or list(record):
+        value = record.get(key)
+        if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+            continue
+        if not isinstance(value, (bool, int, float)):
+            value = truncate_text(str(value), max_field_tokens)
+        compact[key] = value
+    return compact
+
+
+def fit_records(records: Sequence[Dict[str, Any]],
+                name: str,
+                fields: Optional[Sequence[str]] = None,
+                budget: int = TOOL_TOKEN_BUDGET,
+                max_items: Optional[int] = None,
+                max_field_tokens: int = FIELD_TOKEN_LIMIT) -> Tuple[List[Dict[str, Any]], BudgetReport]:
+    """
+    Compact records (best first) and keep them while they fit the budget.
+
+    Args:
+        records (Sequence[dict]): Tool results, already ranked.
+        name (str): Tool name, for the log line.
+        fields (Sequence[str], optional): Fields to keep; all when omitted.
+        budget (int): Token budget of the returned records.
+        max_items (int, optional): Hard cap on the number of records.
+        max_field_tokens (int): Token limit of each text field.
+
+    Returns:
+        Tuple[List[dict], BudgetReport]: The records that fit (at least one
+            when there are any) and what was kept.
+    """
+    kept: List[Dict[str, Any]] = []
+    used = 0
+    for record in records[:max_items]:
+        compact = compact_record(record, fields, max_field_tokens)
+        cost = estimate_tokens(json.dumps(compact, ensure_ascii=False))
+        if kept and used + cost > budget:
+            break
+        kept.append(compact)
+        used += cost
+    report = BudgetReport(name, len(records), len(kept), used)
+    report.log()
+    return kept, report
+
+
+def fit_lines(lines: Sequence[str],
+              name: str,
+              budget: int = CONTEXT_TOKEN_BUDGET,
+              max_items: Optional[int] = None,
+              max_line_tokens: int = FIELD_TOKEN_LIMIT) -> Tuple[str, BudgetReport]:
+    """fit_records for context injected as text: one truncated line per item, best first."""
+    kept: List[str] = []
+    used = 0
+    for line in lines[:max_items]:
+        line = truncate_text(line, max_line_tokens)
+        cost = estimate_tokens(line)
+        if kept and used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    report = BudgetReport(name, len(lines), len(kept), used)
+    report.log()
+    return "\n".join(kept), report
@@ -1,16 +1,57 @@
+import logging
+import os
 import requests
 import pandas as pd
-from coding.constant import TEXTBOOK_LIST, EXPERTS_LIST
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from coding.catalog import EXPERT_CATALOG, TEXTBOOK_CATALOG
+from coding.news_index import NewsIndex
 from typing import Optional, List
 import streamlit as st
 
-def fetch_news_json(page_idx: int, list_type: str = 'all') -> dict:
+logger = logging.getLogger(__name__)
+
+# Point at a local stub server to run without the real Taipei Times endpoint
+TAIPEI_TIMES_BASE_URL = os.getenv("TAIPEI_TIMES_BASE_URL", "https://www.taipeitimes.com")
+NEWS_MAX_WORKERS = 4
+NEWS_TIMEOUT = 10  # seconds, per request
+
+def make_session(pool_size: int = NEWS_MAX_WORKERS, retries: int = 3) -> requests.Session:
+    """
+    Keep-alive session with a connection pool sized for the fetch workers and
+    retry-with-backoff on connection errors, 429 and 5xx responses.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+_session = None
+
+def _default_session() -> requests.Session:
+    global _session
+    if _session is None:
+        _session = make_session()
+    return _session
+
+def fetch_news_json(page_idx: int,
+                    list_type: str = 'all',
+                    session: Optional[requests.Session] = None,
+                    timeout: float = NEWS_TIMEOUT) -> dict:
     if list_type == 'all':  
-        api_url = f"https://www.taipeitimes.com/ajax_json/{page_idx}/list/"
+        api_url = f"{TAIPEI_TIMES_BASE_URL}/ajax_json/{page_idx}/list/"
     else:
-        api_url = f"https://www.taipeitimes.com/ajax_json/{page_idx}/list/{list_type}/"
+        api_url = f"{TAIPEI_TIMES_BASE_URL}/ajax_json/{page_idx}/list/{list_type}/"
 
-    response = requests.get(api_url)
+    response = (session or _default_session()).get(api_url, timeout=timeout)
     response.raise_for_status()
     return response.json()
 
@@ -19,33 +60,46 @@ def json_to_dataframe(json_data: dict) -> pd.DataFrame:
 
 def fetch_all_news(start_page: int = 1,
                    end_page: int = 1,
-                   list_type: str = 'all') -> pd.DataFrame:
+                   list_type: str = 'all',
+                   session: Optional[requests.Session] = None,
+                   max_workers: int = NEWS_MAX_WORKERS) -> pd.DataFrame:
     """
     Retrieve and compile Taipei Times news into a single DataFrame from API.
 
+    Pages are fetched concurrently over one pooled session; a page that still
+    fails after retries is skipped, so the result may be partial.
+
     Args:
         start_page (int): First page index to retrieve.
         end_page (int): Last page index to retrieve (inclusive).
         list_type (str): Section of news ('front', 'taiwan', etc.).
+        session (requests.Session, optional): Session to fetch with; defaults
+            to a shared pooled session from make_session().
+        max_workers (int): Maximum number of pages fetched at once.
 
     Returns:
         pd.DataFrame: Consolidated, sorted, and deduplicated DataFrame of news items.
     """
-    frames = []
-    for page in range(start_page, end_page + 1):
+    session = session or _default_session()
+    pages = list(range(start_page, end_page + 1))
+
+    def fetch(page):
         try:
-            json_data = fetch_news_json(page, list_type)
-            df = json_to_dataframe(json_data)
-            frames.append(df)
-        except requests.HTTPError as e:
-            print(f"Failed to fetch page {page}: {e}")
+            return json_to_dataframe(fetch_news_json(page, list_type, session=session))
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Failed to fetch page %s: %s", page, e)
+            return None
+
+    # executor.map keeps page order, so the ar_id sort/dedupe below is deterministic
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pages)))) as executor:
+        frames = [df for df in executor.map(fetch, pages) if df is not None]
 
     if not frames:
         return pd.DataFrame()
 
     all_df = pd.concat(frames, ignore_index=True)
     if 'ar_id' in all_df.columns:
-        all_df.sort_values(by='ar_id', ascending=False, inplace=True)
+        all_df.sort_values(by='ar_id', ascending=False, inplace=True, kind='stable')
         all_df.drop_duplicates(subset='ar_id', keep='first', inplace=True)
     all_df.reset_index(drop=True, inplace=True)
 
@@ -58,7 +112,8 @@ def search_news(
     sections: Optional[List[str]] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    news_number: Optional[int] = 5
+    news_number: Optional[int] = 5,
+    index: Optional[NewsIndex] = None
 ) -> pd.DataFrame:
     """
     Search a pre-fetched news DataFrame with multiple optional filters.
@@ -77,14 +132,21 @@ def search_news(
         sections (List[str], optional): List of ar_section values to include.
         date_from (str, optional): Start date (inclusive) 'YYYY-MM-DD'.
         date_to (str, optional): End date (inclusive) 'YYYY-MM-DD'.
+        news_number (int, optional): Maximum number of rows to return.
+        index (NewsIndex, optional): Prebuilt index to search instead of `df`;
+            without one, a temporary index is built from `df`.
 
     Returns:
-        pd.DataFrame: Filtered DataFrame matching all provided criteria.
+        pd.DataFrame: Articles matching all provided criteria, ranked by
+            BM25 relevance to `query` (or newest first when there is none).
 
     Raises:
         ValueError: If `df` is None or empty.
         KeyError: If required columns or specified search_columns are missing.
     """
+    if index is not None:
+        return index.search(query, search_columns, sections, date_from, date_to, news_number)
+
     if df is None or df.empty:
         raise ValueError("DataFrame is empty. Fetch news first with fetch_all_news.")
 
@@ -103,54 +165,17 @@ def search_news(
     if missing_search:
         raise KeyError(f"Search columns not found in DataFrame: {missing_search}")
 
-    mask = pd.Series(True, index=df.index)
-
-    # Text query filter
-    if query is not None:
-        text_mask = pd.Series(False, index=df.index)
-        for col in search_columns:
-            text_mask |= df[col].astype(str).str.contains(query, case=False, na=False)
-        mask &= text_mask
-
-    # Section filter
-    if sections is not None:
-        mask &= df['ar_section'].isin(sections)
-
-    # Date range filter
-    dates = pd.to_datetime(df['ar_pubdate'], errors='coerce')
-    if date_from is not None:
-        start = pd.to_datetime(date_from)
-        mask &= (dates >= start)
-
-    if date_to is not None:
-        end = pd.to_datetime(date_to)
-        mask &= (dates <= end)
-
-    result = df[mask].reset_index(drop=True)
-
-    if news_number is not None:
-        result = result.head(news_number)
-
-    return result
+    index = NewsIndex.from_frame(df, fields=search_columns)
+    return index.search(query, search_columns, sections, date_from, date_to, news_number)
 
 def search_expert(name: str = None,
                   discipline: str = None,
                   interest: str = None):
-    results = []
-    for exp in EXPERTS_LIST["EXPERTS"]:
-        if ((name and name.lower() in exp["NAME"].lower()) or
-            (discipline and discipline.lower() in exp["DISCIPLINE"].lower()) or
-            (interest and interest.lower() in exp["INTEREST"].lower())):
-            results.append(exp)
+    results = EXPERT_CATALOG.search(NAME=[name], DISCIPLINE=[discipline], INTEREST=[interest])
     return results or [{"error": "No matching experts found."}]
 
 def search_textbook(title: str = None,
                     discipline: str = None,
                     related_expert: str = None):
-    results = []
-    for tb in TEXTBOOK_LIST["TEXTBOOKS"]:
-        if ((title and title.lower() in tb["TITLE"].lower()) or
-            (discipline and discipline.lower() in tb["DISCIPLINE"].lower()) or
-            (related_expert and related_expert.lower() in tb["RELATED_EXPERT"].lower())):
-            results.append(tb)
+    results = TEXTBOOK_CATALOG.search(TITLE=[title], DISCIPLINE=[discipline], RELATED_EXPERT=[related_expert])
     return results or [{"error": "No matching textbooks found."}]
\ No newline at end of file
@@ -1,8 +1,11 @@
 import streamlit as st
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 import json
 import os
 from datetime import datetime
+import pandas as pd
+from coding.job_store import data_version, read_jobs
+from coding.message_store import MessageStore, new_store
 
 def paging():
     st.page_link("streamlit_app.py", label="Home", icon="🏠")
@@ -12,11 +15,57 @@ def paging():
     st.page_link("pages/teacher_agent.py", label="Teacher Agent's Talk", icon= "👩‍💼")
 
 
+@st.cache_data(show_spinner=False)
+def _load_jobs_cached(source: str, columns: Optional[Tuple[str, ...]], version: float) -> pd.DataFrame:
+    return read_jobs(source, columns)
+
+def load_jobs(source: str = "104", columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Shared, cached loader for the scraped job data.
+
+    Args:
+        source (str): '104' (pages/104_intern.csv) or 'cake' (pages/jobsthousands.csv).
+        columns (Sequence[str], optional): Only read these columns.
+
+    Returns:
+        pd.DataFrame: Typed job data; the cache is keyed on the CSV version,
+            so a new scrape is picked up without restarting the app.
+    """
+    return _load_jobs_cached(source, tuple(columns) if columns else None, data_version(source))
+
+
+def get_message_store() -> MessageStore:
+    """
+    The session's bounded chat history (st.session_state.messages).
+    """
+    current = st.session_state.get("messages")
+    if isinstance(current, MessageStore):
+        return current
+    store = new_store()
+    if isinstance(current, list):
+        # a plain list left by an older version of the page
+        store.extend(current)
+    st.session_state.messages = store
+    return store
+
+def show_load_earlier(container_obj, store: MessageStore) -> None:
+    """
+    "Load earlier" control above the visible messages.
+    """
+    hidden = store.hidden_count()
+    if hidden:
+        container_obj.button(
+            f"⬆️ 載入更早的訊息（還有 {hidden} 則）",
+            on_click=store.load_earlier,
+            key="load_earlier",
+        )
+
 def display_session_msg(container_obj, user_image: Optional[str] = None):
-    # Initialize messages list if not present
-    messages = st.session_state.setdefault("messages", [])
+    # Only the visible page of the history is rendered on each rerun
+    store = get_message_store()
+    show_load_earlier(container_obj, store)
 
-    for msg in messages:
+    for msg in store.visible():
         role = msg.get("role", "user")
         content = msg.get("content", "")
         avatar = None
@@ -42,8 +91,7 @@ def show_chat_history(container_obj, chat_history: List[Dict[str, Any]], user_im
     Displays each valid message via Streamlit and returns the processed messages
     as a JSON-formatted string.
     """
-    if 'messages' not in st.session_state:
-        st.session_state.messages = []
+    store = get_message_store()
 
     processed = []
 
@@ -69,7 +117,7 @@ def show_chat_history(container_obj, chat_history: List[Dict[str, Any]], user_im
         processed.append(message)
 
         # Append to session history
-        st.session_state.messages.append(message)
+        store.append(message)
 
         # Display according to role
         if role == 'assistant':
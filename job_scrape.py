@@ -1,8 +1,17 @@
-import requests
+import argparse
+import asyncio
+from contextlib import aclosing
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
 import os
+from coding.crawler import AsyncCrawler
+from coding.seen_index import SeenIndex, select_changed, upsert_csv
+
+BASE_URL = 'https://www.cake.me/jobs/%E5%AF%A6%E7%BF%92'
+CSV_PATH = 'pages/jobsthousands.csv'
+INDEX_PATH = 'pages/.seen_cake.json'
+COLUMNS = ['job_name', 'comp_name', 'job_desc', 'job_tags']
+KEY_COLS = ['job_name', 'comp_name']
 
 def parsing_job(job):
     try:
@@ -24,27 +33,55 @@ def parsing_job(job):
 
     return [job_name, comp_name, job_desc, job_tags]
 
-def crawl_jobs():
+async def fetch_jobs(pages=49, base_url=BASE_URL, fetcher=None, max_in_flight=4):
+    # 每 3 秒一個請求的禮貌限制不變，但多個請求的網路延遲可以重疊
+    data = []
+    async with AsyncCrawler(rate_per_host=1 / 3, max_in_flight=max_in_flight, fetcher=fetcher) as crawler:
+
+        async def fetch_page(p):
+            return await crawler.fetch_text(base_url, params={'locale': 'zh-TW', 'page': p})
+
+        async with aclosing(crawler.iter_pages(fetch_page, range(1, pages + 1))) as results:
+            async for p, html in results:
+                if isinstance(html, Exception):
+                    print(f"第 {p} 頁發生錯誤: {html}")
+                    continue
+                soup = BeautifulSoup(html, 'html.parser')
+                jobs = soup.select('div.JobSearchHits_list__3UtHp > div')
+
+                for job in jobs:
+                    data.append(parsing_job(job))
+
+    return data
+
+def crawl_jobs(pages=49, base_url=BASE_URL, fetcher=None, incremental=True):
     try:
         # 檢查並創建 'pages' 資料夾（如果不存在）
         if not os.path.exists('pages'):
             os.makedirs('pages')
 
-        data = []
-        for p in range(1, 50):
-            url = f'https://www.cake.me/jobs/%E5%AF%A6%E7%BF%92?locale=zh-TW&page={p}'
-            resp = requests.get(url)
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            jobs = soup.select('div.JobSearchHits_list__3UtHp > div')
-            
-            for job in jobs:
-                data.append(parsing_job(job))
-            
-            time.sleep(3)
-
-        # 儲存爬取的資料到 CSV
-        df = pd.DataFrame(data, columns=['job_name', 'comp_name', 'job_desc', 'job_tags'])
-        df.to_csv('pages/jobsthousands.csv', index=False, encoding='utf-8-sig')  # 儲存到 'pages' 資料夾
+        data = asyncio.run(fetch_jobs(pages, base_url=base_url, fetcher=fetcher))
+
+        if not incremental:
+            # 儲存爬取的資料到 CSV
+            df = pd.DataFrame(data, columns=COLUMNS)
+            df.to_csv(CSV_PATH, index=False, encoding='utf-8-sig')  # 儲存到 'pages' 資料夾
+            seen = SeenIndex(INDEX_PATH)
+            seen.entries.clear()
+            select_changed(seen, df.to_dict(orient='records'), KEY_COLS)
+            seen.save()
+            return
+
+        # 增量模式：cake.me 不是依時間排序，仍需走完所有頁面，但只寫入新的或有變動的職缺
+        seen = SeenIndex.from_csv(INDEX_PATH, CSV_PATH, KEY_COLS)
+        records = pd.DataFrame(data, columns=COLUMNS).to_dict(orient='records')
+        changed = select_changed(seen, records, KEY_COLS)
+        seen.save()
+        if changed:
+            stats = upsert_csv(CSV_PATH, pd.DataFrame(changed, columns=COLUMNS), KEY_COLS)
+            print(f"新增 {stats['added']} 筆、更新 {stats['updated']} 筆，共 {stats['total']} 筆職缺")
+        else:
+            print("沒有新的職缺")
 
     except KeyboardInterrupt:
         print("爬蟲被中斷，請稍後再試！")
@@ -52,4 +89,8 @@ def crawl_jobs():
         print(f"發生錯誤: {e}")
 
 if __name__ == "__main__":
-    crawl_jobs()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=49)
+    parser.add_argument('--full', action='store_true', help='重新爬取並覆寫 CSV')
+    args = parser.parse_args()
+    crawl_jobs(args.pages, incremental=not args.full)
@@ -1,52 +1,91 @@
-import requests
+import argparse
+import asyncio
+from contextlib import aclosing
 import pandas as pd
 import os
-import time
+from coding.crawler import AsyncCrawler
+from coding.seen_index import SeenIndex, select_changed, upsert_csv
 
-def crawl_104_jobs(pages=10):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.84 Safari/537.36',
-        'Referer': 'https://www.104.com.tw/jobs/search/',
-        'Accept': 'application/json, text/javascript, */*; q=0.01',
-        'X-Requested-With': 'XMLHttpRequest'
-    }
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.84 Safari/537.36',
+    'Referer': 'https://www.104.com.tw/jobs/search/',
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'X-Requested-With': 'XMLHttpRequest'
+}
 
-    url = "https://www.104.com.tw/jobs/search/list"
+BASE_URL = "https://www.104.com.tw/jobs/search/list"
+CSV_PATH = 'pages/104_intern.csv'
+INDEX_PATH = 'pages/.seen_104.json'
+KEY_COLS = ['jobNo']
+# 每天都會變動的應徵人數、個人化欄位，不算職缺內容變動（否則每晚幾乎每筆都被重寫）
+VOLATILE_COLS = ['applyCnt', 'applyDesc', 'applyType', 'isApply', 'applyDate',
+                 'userApplyCount', 'isSave', 'isActivelyHiring']
+
+async def fetch_104_jobs(pages=10, base_url=BASE_URL, fetcher=None, max_in_flight=4, seen=None):
+    # 每 2 秒一個請求的禮貌限制不變，但多個請求的網路延遲可以重疊
     all_jobs = []
+    async with AsyncCrawler(rate_per_host=1 / 2, max_in_flight=max_in_flight,
+                            headers=HEADERS, fetcher=fetcher) as crawler:
+
+        async def fetch_page(page):
+            params = {
+                "ro": 0,  # 全職、兼職、實習都要
+                "keyword": "實習",
+                "mode": "l",
+                "order": 11,  # 最新排序
+                "asc": 0,     # 降序
+                "page": page
+            }
+            return await crawler.fetch_json(base_url, params=params)
 
-    for page in range(1, pages + 1):
-        params = {
-            "ro": 0,  # 全職、兼職、實習都要
-            "keyword": "實習",
-            "mode": "l",
-            "order": 11,  # 最新排序
-            "asc": 0,     # 降序
-            "page": page
-        }
-
-        try:
-            resp = requests.get(url, headers=headers, params=params)
-            if resp.status_code == 200:
-                data = resp.json()
+        async with aclosing(crawler.iter_pages(fetch_page, range(1, pages + 1))) as results:
+            async for page, data in results:
+                if isinstance(data, Exception):
+                    print(f"⚠️ 第 {page} 頁發生錯誤：{data}")
+                    continue
                 jobs = data.get('data', {}).get('list', [])
                 if not jobs:
                     print(f"第 {page} 頁無職缺，結束爬取")
                     break
                 all_jobs.extend(jobs)
                 print(f"✅ 成功爬取第 {page} 頁，共獲得 {len(jobs)} 筆職缺")
-            else:
-                print(f"❌ 第 {page} 頁請求失敗，狀態碼：{resp.status_code}")
-        except Exception as e:
-            print(f"⚠️ 第 {page} 頁發生錯誤：{e}")
+                # 104 依最新排序，整頁都已收錄代表之後的頁面也都看過了
+                if seen is not None and all(str(job.get('jobNo')) in seen for job in jobs):
+                    print(f"第 {page} 頁皆為已收錄職缺，結束爬取")
+                    break
 
-        time.sleep(2)
+    return all_jobs
 
+def crawl_104_jobs(pages=10, base_url=BASE_URL, fetcher=None, incremental=True):
     if not os.path.exists('pages'):
         os.makedirs('pages')
 
-    df = pd.DataFrame(all_jobs)
-    df.to_csv('pages/104_intern.csv', index=False, encoding='utf-8-sig')
-    print(f"📁 已儲存 {len(jobs)} 筆職缺資料")
+    if not incremental:
+        all_jobs = asyncio.run(fetch_104_jobs(pages, base_url=base_url, fetcher=fetcher))
+        df = pd.DataFrame(all_jobs)
+        df.to_csv(CSV_PATH, index=False, encoding='utf-8-sig')
+        seen = SeenIndex(INDEX_PATH)
+        seen.entries.clear()
+        select_changed(seen, all_jobs, KEY_COLS, VOLATILE_COLS)
+        seen.save()
+        print(f"📁 已儲存 {len(all_jobs)} 筆職缺資料")
+        return
+
+    # 增量模式：只寫入新的或內容有變動的職缺
+    seen = SeenIndex.from_csv(INDEX_PATH, CSV_PATH, KEY_COLS, VOLATILE_COLS)
+    all_jobs = asyncio.run(fetch_104_jobs(pages, base_url=base_url, fetcher=fetcher, seen=seen))
+    changed = select_changed(seen, all_jobs, KEY_COLS, VOLATILE_COLS)
+    seen.save()
+    if not changed:
+        print("📁 沒有新的職缺")
+        return
+
+    stats = upsert_csv(CSV_PATH, pd.DataFrame(changed), KEY_COLS)
+    print(f"📁 新增 {stats['added']} 筆、更新 {stats['updated']} 筆，共 {stats['total']} 筆職缺資料")
 
 if __name__ == "__main__":
-    crawl_104_jobs(10)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--full', action='store_true', help='重新爬取全部頁面並覆寫 CSV')
+    args = parser.parse_args()
+    crawl_104_jobs(args.pages, incremental=not args.full)
@@ -3,13 +3,20 @@
 """
 import os
 import re
+import time
 import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from autogen import AssistantAgent, LLMConfig
 from tqdm import tqdm
 from coding.utils import paging
+from coding.llm_cache import LLMCache, cache_key
+from coding.batch_extract import plan_batches, extract_batch
+from coding.llm_scheduler import AIMDScheduler
+from coding.fake_llm import FakeExtractor
+from coding.stream_clean import RowFailed, clean_stream, checkpoint_path, file_digest, load_done, read_output
+from coding.dedup import DedupStage
+from coding.section_parser import parse_job_content
 
 # --- page setting ---
 def save_lang():
@@ -35,90 +42,308 @@ load_dotenv(override=True)
 API_KEY = os.getenv("GEMINI_API_KEY")
 
 # ----------------------------- 建立 LLM Agent --------------------------------
+MODEL_CONFIG = {
+    "model": "gemini-2.0-pro",
+    "temperature": 0,
+    "max_tokens": 256,
+}
+
+SYSTEM_MESSAGE = (
+    "你是一位人力資源資料清理助手。\n"
+    "輸入是一段職缺簡介，請：\n"
+    "1. 找出『工作內容/見習內容/Responsibilities』段落並保留條列。\n"
+    "2. 移除資格條件、期間說明、證明、注意事項等。\n"
+    "3. 直接輸出純文字，不要附加其他說明。"
+)
+
 llm_cfg = LLMConfig(
     api_type="google",
-    model="gemini-2.0-pro",
     api_key=API_KEY,
-    temperature=0,
-    max_tokens=256
+    **MODEL_CONFIG
 )
 
 extractor = AssistantAgent(
     name="extractor",
     llm_config=llm_cfg,
-    system_message=(
-        "你是一位人力資源資料清理助手。\n"
-        "輸入是一段職缺簡介，請：\n"
-        "1. 找出『工作內容/見習內容/Responsibilities』段落並保留條列。\n"
-        "2. 移除資格條件、期間說明、證明、注意事項等。\n"
-        "3. 直接輸出純文字，不要附加其他說明。"
-    ),
+    system_message=SYSTEM_MESSAGE,
+    max_consecutive_auto_reply=1
+)
+
+# 批次模式：一次送出多筆描述，system prompt 只送一次
+BATCH_MODEL_CONFIG = {
+    "model": "gemini-2.0-pro",
+    "temperature": 0,
+    "max_tokens": 8192,
+}
+
+BATCH_SYSTEM_MESSAGE = (
+    SYSTEM_MESSAGE + "\n"
+    "輸入是 JSON 陣列，每個元素為 {\"id\": ..., \"text\": 職缺簡介}。\n"
+    "請對每一筆分別處理，只輸出 JSON 陣列，每個元素為 {\"id\": 原本的 id, \"content\": 工作內容純文字}，"
+    "每個 id 都要出現，找不到工作內容時 content 為空字串。"
+)
+
+# 快取 key 只看正規化後的職缺內容與抽取指令：單筆與批次模式抽出的是同一份工作內容，
+# 互相沿用彼此的結果（批次的 max_tokens 是整批的上限，不影響單筆內容，故不列入）
+CACHE_KEY_CONFIG = {"model": MODEL_CONFIG["model"], "temperature": MODEL_CONFIG["temperature"]}
+
+def content_key(desc: str) -> str:
+    return cache_key(desc, SYSTEM_MESSAGE, CACHE_KEY_CONFIG)
+
+batch_extractor = AssistantAgent(
+    name="batch_extractor",
+    llm_config=LLMConfig(api_type="google", api_key=API_KEY, **BATCH_MODEL_CONFIG),
+    system_message=BATCH_SYSTEM_MESSAGE,
     max_consecutive_auto_reply=1
 )
 
-@st.cache_data(show_spinner=False)
+# 設定 JOB_CLEANER_FAKE_LLM=1 改用本機假 LLM（不需 API key，可測試排程器）
+if os.getenv("JOB_CLEANER_FAKE_LLM"):
+    extractor = FakeExtractor()
+    batch_extractor = FakeExtractor()
+
+# ----------------------------- 自適應並行排程 --------------------------------
+@st.cache_resource(show_spinner=False)
+def get_scheduler() -> AIMDScheduler:
+    # 整個 process 共用：同一把 API key 的配額由同一個排程器控管
+    return AIMDScheduler(initial=4, max_limit=32)
+
+scheduler = get_scheduler()
+# 每次執行頁面各自計算指標（並行上限仍是共用的），其他 session 同時執行不會清掉本次數字
+run_stats = scheduler.new_run()
+
+def render_scheduler_stats(box) -> None:
+    stats = run_stats.stats()
+    with box.container():
+        c1, c2, c3, c4, c5 = st.columns(5)
+        c1.metric("並行上限", f"{stats['limit']:.1f}")
+        c2.metric("吞吐量", f"{stats['throughput']:.2f} 次/秒")
+        c3.metric("延遲 p50 / p95", f"{stats['p50']:.1f}s / {stats['p95']:.1f}s")
+        c4.metric("限流 (429)", stats["throttled"])
+        c5.metric("重試 / 失敗", f"{stats['retries']} / {stats['errors']}")
+
+# ----------------------------- 持久化快取 ------------------------------------
+@st.cache_resource(show_spinner=False)
+def get_llm_cache() -> LLMCache:
+    # 同一個 SQLite 檔跨重啟、跨使用者共用；key 含描述內容、system prompt 與模型設定
+    return LLMCache(os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite"))
+
+llm_cache = get_llm_cache()
+
 def extract_content(desc: str) -> str:
     """
-    呼叫 LLM 抽取工作內容；如果回空字串就用 regex 備援。
+    呼叫 LLM 抽取工作內容（先查磁碟快取）；如果回空字串就用 regex 備援。
     """
     if not isinstance(desc, str) or desc.strip() == "":
         return ""
 
-    # ⬇️ 用 generate_reply 取得回答
-    reply_msg = extractor.generate_reply(
+    key = content_key(desc)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # ⬇️ 用 generate_reply 取得回答（經排程器控制並行與重試）
+    reply_msg = run_stats.run(
+        extractor.generate_reply,
         messages=[{"role": "user", "content": desc}],
         sender="user"                    # 說明這是 user 發話
     )
     reply = reply_msg["content"].strip() if reply_msg else ""
 
     if reply:
+        llm_cache.put(key, reply)
         return reply
 
+    return regex_fallback(desc)
+
+def regex_fallback(desc: str) -> str:
     # ---------- fallback: regex ------------------------------------------------
     m = re.search(r"([(（]?\s*1[.)）]\s*.*?)(?:\n\s*\n|$)", desc, flags=re.S)
     return m.group(1).strip() if m else ""
 
+def call_batch_llm(prompt: str) -> str:
+    reply_msg = run_stats.run(
+        batch_extractor.generate_reply,
+        messages=[{"role": "user", "content": prompt}],
+        sender="user"
+    )
+    return reply_msg["content"] if reply_msg else ""
+
+# ----------------------------- 工作切分 ---------------------------------------
+def is_blank(desc) -> bool:
+    return not isinstance(desc, str) or desc.strip() == ""
+
+def plan_single(pending):
+    # 單筆模式：每一筆是一個工作單位
+    resolved = {idx: "" for idx, desc in pending if is_blank(desc)}
+    units = [[(idx, desc)] for idx, desc in pending if not is_blank(desc)]
+    return resolved, units
+
+def with_fast_path(plan, threshold: float, hits: list):
+    """
+    規則快速路徑：描述中有明確「工作內容」段落標題且信心分數夠高時直接切出，
+    不查快取也不呼叫 LLM；其餘交給原本的 plan。
+    """
+    def fast_plan(pending):
+        resolved, rest = {}, []
+        for idx, desc in pending:
+            content, confidence = parse_job_content(desc)
+            if confidence >= threshold:
+                resolved[idx] = content
+            else:
+                rest.append((idx, desc))
+        hits[0] += len(resolved)
+        base_resolved, units = plan(rest)
+        resolved.update(base_resolved)
+        return resolved, units
+    return fast_plan
+
+def work_single(unit):
+    return {idx: extract_content(desc) for idx, desc in unit}
+
+def make_plan_batched(max_items: int):
+    def plan_batched(pending):
+        """
+        批次模式：先查快取，其餘依 token 預算分批送出。
+        """
+        resolved, rest = {}, []
+        for idx, desc in pending:
+            if is_blank(desc):
+                resolved[idx] = ""
+                continue
+            cached = llm_cache.get(content_key(desc))
+            if cached is not None:
+                resolved[idx] = cached
+            else:
+                rest.append((idx, desc))
+        units = plan_batches(
+            rest,
+            max_items=max_items,
+            output_budget=BATCH_MODEL_CONFIG["max_tokens"],
+            output_per_item=MODEL_CONFIG["max_tokens"],
+        )
+        return resolved, units
+    return plan_batched
+
+def work_batched(unit):
+    """
+    回覆缺漏的項目會拆成更小的批次重送，單筆仍失敗才改用單筆模式。
+    限流、授權等錯誤不拆批，直接拋出，整批記為失敗（附錯誤訊息）。
+    """
+    descs = dict(unit)
+    results, failed = extract_batch(call_batch_llm, unit)
+    contents = {}
+    for idx, content in results.items():
+        if content:
+            llm_cache.put(content_key(descs[idx]), content)
+            contents[idx] = content
+        else:
+            contents[idx] = regex_fallback(descs[idx])
+    for idx, desc in failed:
+        try:
+            contents[idx] = extract_content(desc)
+        except Exception as e:
+            contents[idx] = RowFailed(f"單筆模式失敗：{e}")
+    return contents
+
 # ----------------------------- UI 介面 ---------------------------------------
 uploaded = st.file_uploader("⬆️ 上傳含 jobName, description 欄位的 CSV", type="csv")
+batch_mode = st.toggle("批次模式（多筆描述合併成一個請求）", value=True)
+batch_size = st.slider("每批最多筆數", 2, 32, 20, disabled=not batch_mode)
+dedup_mode = st.toggle("合併重複／近似重複的職缺描述（每群只抽取一次）", value=True)
+fast_path = st.toggle("規則快速路徑（有明確「工作內容」標題時不呼叫 LLM）", value=True)
+FAST_PATH_THRESHOLD = 0.7   # parse_job_content 信心分數門檻
+CHUNK_SIZE = 500   # 每次從 CSV 讀入的筆數
+WINDOW = 64        # 同時進行中的工作單位上限
+
+def download_output(out_path: str, label: str, key: str) -> None:
+    # 檢查點依完成順序寫入，下載前依 rowIndex 排回原始順序
+    data = read_output(out_path).to_csv(index=False).encode("utf-8-sig")
+    st.download_button(label, data, file_name="jobs_cleaned.csv", mime="text/csv", key=key)
 
 if uploaded:
-    df = pd.read_csv(uploaded)
-    if {"jobName", "description"}.issubset(df.columns):
-        st.success(f"載入 {len(df)} 筆職缺，開始清理…")
+    header = pd.read_csv(uploaded, nrows=0)
+    uploaded.seek(0)
+    if {"jobName", "description"}.issubset(header.columns):
+        # 以上傳檔案的雜湊作為檢查點：同一份檔案重新上傳會從中斷處繼續
+        out_path = checkpoint_path(file_digest(uploaded))
+        resumed = len(load_done(out_path))
+        if resumed:
+            st.info(f"找到先前的進度：已完成 {resumed} 筆，將從中斷處繼續")
+            download_output(out_path, "💾 下載目前進度 (部分結果)", key="partial")
+            if st.button("🔄 從頭開始（刪除先前進度）", key="restart"):
+                os.remove(out_path)
+                st.rerun()
+
+        # 先只讀 jobName 欄位算總筆數，供進度條使用
+        total = sum(len(c) for c in pd.read_csv(uploaded, usecols=["jobName"], chunksize=CHUNK_SIZE))
+        uploaded.seek(0)
+        st.success(f"載入 {total} 筆職缺，開始清理…")
         progress = st.progress(0, text="LLM 抽取中…")
-        contents = [""] * len(df)
-
-        # 並行呼叫，提高速度
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            futures = {
-                executor.submit(extract_content, desc): idx
-                for idx, desc in enumerate(df["description"])
-            }
-            for n, future in enumerate(as_completed(futures), start=1):
-                idx = futures[future]
-                try:
-                    contents[idx] = future.result()
-                except Exception as e:
-                    contents[idx] = ""
-                    st.warning(f"第 {idx} 筆失敗：{e}")
-                progress.progress(n / len(futures))
-
-        df["jobContent"] = contents
-        st.success("✅ 抽取完成！")
+        stats_box = st.empty()
+        last_render = [0.0]
+
+        def on_progress(written: int) -> None:
+            progress.progress(min(1.0, (resumed + written) / max(1, total)), text=f"已完成 {resumed + written} / {total} 筆…")
+            if time.monotonic() - last_render[0] > 0.5:
+                render_scheduler_stats(stats_box)
+                last_render[0] = time.monotonic()
+
+        chunks = pd.read_csv(uploaded, usecols=["jobName", "description"], chunksize=CHUNK_SIZE)
+        if batch_mode:
+            plan, work = make_plan_batched(batch_size), work_batched
+        else:
+            plan, work = plan_single, work_single
+        dedup = DedupStage(checkpoint=out_path) if dedup_mode else None
+        if dedup:
+            plan, work = dedup.wrap(plan, work)
+        # 快速路徑包在最外層：規則能切出的列不進入重複偵測，也不呼叫 LLM
+        fast_hits = [0]
+        if fast_path:
+            plan = with_fast_path(plan, FAST_PATH_THRESHOLD, fast_hits)
+        result = clean_stream(
+            chunks, out_path, plan, work,
+            window=WINDOW,
+            max_workers=scheduler.max_limit,
+            on_progress=on_progress,
+        )
+        progress.progress(1.0, text="完成")
+        render_scheduler_stats(stats_box)
+        st.success(f"✅ 抽取完成！本次寫入 {result['written']} 筆，沿用先前進度 {result['skipped']} 筆")
+
+        if fast_path:
+            st.info(f"⚡ 規則快速路徑直接切出 {fast_hits[0]} 筆，未呼叫 LLM")
+
+        if dedup:
+            st.info(
+                f"🔁 重複描述共 {dedup.index.exact_hits + dedup.index.near_hits} 筆"
+                f"（完全相同 {dedup.index.exact_hits}、近似 {dedup.index.near_hits}），"
+                f"沿用代表列結果 {dedup.saved} 筆，省下 {dedup.saved} 次抽取"
+            )
+
+        failures = result["failures"]
+        if failures:
+            st.warning(f"{len(failures)} 筆在重試後仍失敗，未寫入檔案；重新整理頁面即可只重跑這些筆數")
+            with st.expander("失敗明細"):
+                for idx, err in failures:
+                    st.write(f"第 {idx} 筆：{err}")
+
+        # 快取命中統計（命中數與命中率為整個服務累計；呼叫 LLM 為本次實際送出的請求數，含重試）
+        stats = llm_cache.stats()
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("快取命中（累計）", stats["hits"])
+        c2.metric("呼叫 LLM（本次）", run_stats.stats()["calls"])
+        c3.metric("命中率（累計）", f"{stats['hit_rate']:.0%}")
+        c4.metric("快取筆數", stats["entries"])
 
         # 顯示前 5 筆預覽
         st.subheader("預覽 (前 5 筆)")
-        st.dataframe(df[["jobName", "jobContent"]].head(), use_container_width=True)
-
-        # 下載按鈕
-        cleaned_csv = df[["jobName", "jobContent"]].to_csv(index=False).encode("utf-8-sig")
-        st.download_button(
-            "💾 下載清理後 CSV",
-            cleaned_csv,
-            file_name="jobs_cleaned.csv",
-            mime="text/csv"
-        )
+        preview = read_output(out_path).head(5)
+        st.dataframe(preview[["jobName", "jobContent"]], use_container_width=True)
+
+        # 下載按鈕（依 rowIndex 排回上傳檔案的順序）
+        download_output(out_path, "💾 下載清理後 CSV", key="full")
     else:
         st.error("CSV 必須包含 'jobName' 與 'description' 欄位！")
 else:
-    st.info("請先上傳 CSV 檔")
\ No newline at end of file
+    st.info("請先上傳 CSV 檔")
@@ -26,7 +26,12 @@ from coding.agenttools import (
 import matplotlib.pyplot as plt
 import pandas as pd
 from matplotlib import font_manager
-from coding.utils import paging
+from coding.utils import paging, load_jobs
+from coding.job_store import data_version
+from coding.agent_factory import AgentSpec, gemini_model, session_team
+from coding.chat_stream import render_chat_stream
+from coding.chat_runner import ChatRunner
+from coding.chat_cache import conversation_scope, get_chat_cache, replay_events, show_cache_stats
 
 # Load environment variables from .env file
 load_dotenv(override=True)
@@ -54,25 +59,84 @@ llm_config_openai = LLMConfig(
     api_key=OPEN_API_KEY,  # Authentication
 )
 
+# --- agent definitions ---
+# Persona templates; {lang_setting} is filled in by team_blueprint once per
+# (personas, language, model), and session_team builds each session's agents from it.
+STUDENT_PERSONA = """You are a student willing to learn. After your result, say 'ALL DONE'. Please output in {lang_setting}"""
+
+TEACHER_PERSONA = """You are a teacher. Please try to use tools to answer student's question according to the following rules:
+1. Check current time: use `get_time` tool to retrieve current date and time.
+2. Search news by `AG_search_news` according to user's question, try to distill student's question within 1~2 words and facilitate it as query string. Also you may search by sections,  e.g. ['Taiwan News', 'World News', 'Sports', 'Front Page', 'Features', 'Editorials', 'Business','Bilingual Pages'], if you cannot distill it, use None instead.
+3. From the return news, randomly pick one news. Classify the news to the following <DISCIPLINE>:
+<DISCIPLINE>
+    "Digital Sociology"
+    "Information Systems Strategy"
+    "Technology and Society"
+    "Empathetic and research-driven"
+    "Computational Social Science"
+</DISCIPLINE>
+4. Use `AG_search_expert` to select expert by <DISCIPLINE>, also Use `AG_search_textbook` to select a textbook by <DISCIPLINE>.
+5. Explain to student a interesting essay within 500 words about the news using expert and textbook. Please remember to mention about the expert and textbook you cite.
+
+6. Fallback & Termination
+    – On successful completion or when ending, return '##ALL DONE##'.
+    - Return '##ALL DONE##' and respond accordingly when:
+        • The task is completed.
+        • The input is empty.
+        • An error occurs.
+        • The request is repeated.
+        • Additional confirmation is required from the user.
+7. Please output in {lang_setting}
+"""
+
+JOB_AGENT_PERSONA = """
+你是一位實習職缺推薦老師。根據學生提供的實習職缺名稱，你要協助他們：
+
+1. 告訴他們「這份職缺通常需要哪些技能」。
+2. 告訴他們「可以去哪裡學這些技能」。
+3. 回答：「目前有哪些類似的職缺？」請用 `AG_retrieve_jobs` 工具查詢 104 職缺資料，只推薦工具回傳的職缺。
+4. 如果學生說「我想在哪裡工作...」或提到產業、薪資、距離某地多遠，請用 `AG_search_jobs` 工具篩選（地點用 location，某捷運站或地標附近用 near 與 within_km），回覆「這是根據你想工作地點進一步篩選後的職缺」。
+5. 若找不到職缺，請明確告知：「目前找不到相關的職缺喔」。
+
+請用簡單易懂的語言中文回覆，使用 {lang_setting}。在完成職缺推薦後，請說 'JOB_RECOMMENDATION_DONE'。
+"""
+
+SKILL_AGENT_PERSONA = """
+你是一位技能分析專家。當學生輸入他們擁有的技能時，你要：
+
+1. 告訴他們：「你可以做哪些實習類型（例如：資料分析、前端開發、行銷實習等）」。
+2. 根據學生說「我想朝 xxx 試看看」，針對該方向給出建議。
+3. 告訴他們：「除了你剛才說的技能，xxx 技能也很常見喔，加分喔！」（也就是建議加強的技能）。
+4. 接著回答：「現在有哪些適合的職缺？」請用 `AG_retrieve_jobs` 工具以學生的技能查詢 104 職缺，只推薦工具回傳的職缺。
+5. 如果學生說「我想在哪裡工作...」或提到產業、薪資、距離某地多遠，請用 `AG_search_jobs` 工具篩選（地點用 location，某捷運站或地標附近用 near 與 within_km）後回答：「這是根據你想工作地點進一步篩選後的職缺」。
+
+請使用 {lang_setting} 中文回答，並以鼓勵且實用的語氣與學生互動。在完成技能分析後，請說 'SKILL_ANALYSIS_DONE'。
+"""
+
+TEACHER_TOOLS = ("get_time", "AG_search_expert", "AG_search_textbook", "AG_search_news")
+JOB_TOOLS = ("AG_retrieve_jobs", "AG_search_jobs")
+
+TEAM_SPECS = (
+    AgentSpec("Teacher_Agent", TEACHER_PERSONA, tools=TEACHER_TOOLS),
+    AgentSpec("Job_Advisor_Agent", JOB_AGENT_PERSONA, tools=JOB_TOOLS),
+    AgentSpec("Skill_Analyzer_Agent", SKILL_AGENT_PERSONA, tools=JOB_TOOLS),
+)
+TERMINATION_TOKENS = ("##ALL DONE##", "JOB_RECOMMENDATION_DONE", "SKILL_ANALYSIS_DONE")
+MODEL = gemini_model("gemini-2.0-flash", GEMINI_API_KEY)
+
 # --- 載入與前處理資料 ---
 def load_job_data():
     try:
-        df = pd.read_csv("104_jobs_all.csv")
+        df = load_jobs("104", columns=["jobNo", "jobName", "description", "jobAddrNoDesc"])
         df = df.dropna(subset=['jobName', 'description', 'jobAddrNoDesc'])
         return df
     except FileNotFoundError:
-        st.error("找不到檔案：104_jobs_all.csv")
+        st.error("找不到檔案：pages/104_intern.csv")
         return None
 
 job_df = load_job_data()
 
 
-def stream_data(stream_str):
-    for word in stream_str.split(" "):
-        yield word + " "
-        time.sleep(0.05)
-
-
 def save_lang():
     st.session_state["lang_setting"] = st.session_state.get("language_select")
 
@@ -123,133 +187,41 @@ def main():
         key="input_type",
     )
 
-    student_persona = f"""You are a student willing to learn. After your result, say 'ALL DONE'. Please output in {lang_setting}"""
-
-    teacher_persona = f"""You are a teacher. Please try to use tools to answer student's question according to the following rules:
-    1. Check current time: use `get_time` tool to retrieve current date and time.
-    2. Search news by `AG_search_news` according to user's question, try to distill student's question within 1~2 words and facilitate it as query string. Also you may search by sections,  e.g. ['Taiwan News', 'World News', 'Sports', 'Front Page', 'Features', 'Editorials', 'Business','Bilingual Pages'], if you cannot distill it, use None instead.
-    3. From the return news, randomly pick one news. Classify the news to the following <DISCIPLINE>:
-    <DISCIPLINE>
-        "Digital Sociology"
-        "Information Systems Strategy"
-        "Technology and Society"
-        "Empathetic and research-driven"
-        "Computational Social Science"
-    </DISCIPLINE>
-    4. Use `AG_search_expert` to select expert by <DISCIPLINE>, also Use `AG_search_textbook` to select a textbook by <DISCIPLINE>.
-    5. Explain to student a interesting essay within 500 words about the news using expert and textbook. Please remember to mention about the expert and textbook you cite.
-
-    6. Fallback & Termination
-        – On successful completion or when ending, return '##ALL DONE##'.
-        - Return '##ALL DONE##' and respond accordingly when:
-            • The task is completed.
-            • The input is empty.
-            • An error occurs.
-            • The request is repeated.
-            • Additional confirmation is required from the user.
-    7. Please output in {lang_setting}
-    """
-
-    job_agent_persona = f"""
-    你是一位實習職缺推薦老師。根據學生提供的實習職缺名稱，你要協助他們：
-
-    1. 告訴他們「這份職缺通常需要哪些技能」。
-    2. 告訴他們「可以去哪裡學這些技能」。
-    3. 回答：「目前有哪些類似的職缺？」請從 `104_jobs_all.csv` 資料中篩選相關職缺。
-    4. 如果學生說「我想在哪裡工作...」，請再根據地點進行篩選，回覆「這是根據你想工作地點進一步篩選後的職缺」。
-    5. 若找不到職缺，請明確告知：「目前找不到相關的職缺喔」。
-
-    請用簡單易懂的語言中文回覆，使用 {lang_setting}。在完成職缺推薦後，請說 'JOB_RECOMMENDATION_DONE'。
-    """
-
-    skill_agent_persona = f"""
-    你是一位技能分析專家。當學生輸入他們擁有的技能時，你要：
-
-    1. 告訴他們：「你可以做哪些實習類型（例如：資料分析、前端開發、行銷實習等）」。
-    2. 根據學生說「我想朝 xxx 試看看」，針對該方向給出建議。
-    3. 告訴他們：「除了你剛才說的技能，xxx 技能也很常見喔，加分喔！」（也就是建議加強的技能）。
-    4. 接著回答：「現在有哪些適合的職缺？」請從 `104_jobs_all.csv` 找出符合技能條件的職缺。
-    5. 如果學生說「我想在哪裡工作...」，請進一步根據地點篩選後回答：「這是根據你想工作地點進一步篩選後的職缺」。
-
-    請使用 {lang_setting} 中文回答，並以鼓勵且實用的語氣與學生互動。在完成技能分析後，請說 'SKILL_ANALYSIS_DONE'。
-    """
-
-
-    with llm_config_gemini:
-        teacher_agent = ConversableAgent(
-            name="Teacher_Agent",
-            system_message=teacher_persona,
-        )
-
-        job_advisor_agent = ConversableAgent(
-            name="Job_Advisor_Agent",
-            system_message=job_agent_persona,
-        )
-
-        skill_analyzer_agent = ConversableAgent(
-            name="Skill_Analyzer_Agent",
-            system_message=skill_agent_persona,
-        )
-
-    user_proxy = UserProxyAgent(
-        "user_proxy",
-        human_input_mode="NEVER",
-        code_execution_config=False,
-        is_termination_msg=lambda x: content_str(x.get("content")).find("##ALL DONE##")
-        >= 0
-        or content_str(x.get("content")).find("JOB_RECOMMENDATION_DONE") >= 0
-        or content_str(x.get("content")).find("SKILL_ANALYSIS_DONE") >= 0,
-    )
-
-    def register_agent_methods(agent, proxy, methods):
-        for name, description, func in methods:
-            agent.register_for_llm(name=name, description=description)(func)
-            proxy.register_for_execution(name=name)(func)
-
-    methods_to_register = [
-        ("get_time", "Retrieve the current date and time.", get_time),
-        (
-            "AG_search_expert",
-            "Search EXPERTS_LIST by name, discipline, or interest.",
-            AG_search_expert,
-        ),
-        (
-            "AG_search_textbook",
-            "Search TEXTBOOK_LIST by title, discipline, or related_expert.",
-            AG_search_textbook,
-        ),
-        (
-            "AG_search_news",
-            "Search a pre-fetched news DataFrame by keywords, sections, and date range.",
-            AG_search_news,
-        ),
-    ]
-
-    # Register all methods using the helper function
-    register_agent_methods(teacher_agent, user_proxy, methods_to_register)
+    # this session's agents, reused across reruns; other sessions have their own
+    team = session_team(TEAM_SPECS, lang_setting, MODEL, TERMINATION_TOKENS)
 
     def generate_response(prompt, selected_input_type):
         if selected_input_type == "感興趣的職缺":
-            chat_result = user_proxy.initiate_chat(
-                job_advisor_agent,
-                message=prompt,
-            )
+            recipient = team["Job_Advisor_Agent"]
         elif selected_input_type == "你的技能":
-            chat_result = user_proxy.initiate_chat(
-                skill_analyzer_agent,
-                message=prompt
-            )
+            recipient = team["Skill_Analyzer_Agent"]
         else:
-            chat_result = user_proxy.initiate_chat(
-                teacher_agent,
-                message=prompt,
-            )
+            recipient = team["Teacher_Agent"]
+        # an identical or paraphrased prompt (same personas, language and job data) replays the stored chat;
+        # needs CHAT_CACHE=1
+        chat_cache = get_chat_cache()
+        version = data_version("104")
+        scope = conversation_scope("teacher_agent", [spec.template for spec in TEAM_SPECS], lang_setting,
+                                   recipient=recipient.name)
+        if chat_cache is not None and (hit := chat_cache.lookup(scope, prompt, version)) is not None:
+            render_chat_stream(st_c_chat, replay_events(hit.history), user_image)
+            return hit.history
+
+        # the chat runs on the shared event loop; a new prompt cancels the previous one
+        runner = st.session_state.setdefault("chat_runner", ChatRunner())
+        handle = runner.start(
+            lambda: team.user_proxy.a_initiate_chat(recipient, message=prompt)
+        )
+        chat_result = render_chat_stream(st_c_chat, handle.events(), user_image, progress=handle.progress)
+        if chat_result is None:
+            return []
         response = chat_result.chat_history
+        if chat_cache is not None:
+            chat_cache.put(scope, prompt, "teacher_agent", version, response, elapsed=handle.progress["elapsed"])
         return response
 
     def chat(prompt: str, input_type: str):
-        response = generate_response(prompt, input_type)
-        show_chat_history(st_c_chat, response, user_image)
+        generate_response(prompt, input_type)
         # messages = json.loads(conv_res)
         # file_path = save_messages_to_json(messages, output_dir="chat_logs")
         # st.write(f"Saved chat history to `{file_path}`")
@@ -257,6 +229,8 @@ def main():
     if prompt := st.chat_input(placeholder=placeholderstr, key="chat_bot"):
         chat(prompt, st.session_state.input_type)
 
+    show_cache_stats(st.sidebar)
+
 
 if __name__ == "__main__":
     main()
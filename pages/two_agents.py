@@ -13,7 +13,14 @@ from autogen import ConversableAgent, LLMConfig, Agent
 from autogen import AssistantAgent, UserProxyAgent, LLMConfig
 from autogen.code_utils import content_str
 from coding.constant import JOB_DEFINITION, RESPONSE_FORMAT
-from coding.utils import paging
+from coding.utils import paging, get_message_store, show_load_earlier, load_jobs
+from coding.job_store import data_version
+from coding.skill_index import SkillIndex, parse_skill_query
+from coding.agent_factory import AgentSpec, gemini_model, session_team
+from coding.chat_stream import render_chat_stream
+from coding.chat_runner import ChatRunner
+from coding.token_budget import fit_lines
+from coding.chat_cache import conversation_scope, get_chat_cache, replay_events, show_cache_stats
 
 # Load environment variables from .env file
 load_dotenv(override=True)
@@ -30,6 +37,9 @@ def clean_text(text):
     except:
         return str(text).encode("utf-8", "ignore").decode("utf-8", "ignore")
 
+# 注入對話的職缺上限（另受 CONTEXT_TOKEN_BUDGET 限制）
+MAX_SKILL_JOBS = int(os.getenv("MAX_SKILL_JOBS", "30"))
+
 # UI 設定
 placeholderstr = "請輸入你會的技能（例如 Python）"
 user_name = "Melody"
@@ -48,45 +58,80 @@ llm_config_gemini_2 = LLMConfig(
     api_key=GEMINI_API_KEY_2,
 )
 
-# Agent 初始化
-with llm_config_gemini:
-    student_agent = ConversableAgent(
-        name="Student_Agent",
-        system_message="你是一位學生，想找適合你的實習職缺，請提供技能來獲得建議。",
-    )
-    teacher_agent = ConversableAgent(
-        name="Teacher_Agent",
-        system_message=(
-            "你是一位實習職缺推薦老師。當學生提供技能（例如 Python），你需要從提供的職缺清單中找出相關職缺，並推薦給學生。"
-        )
-    )
+# Agent 定義：人設與工具每個 process 只準備一次，每個 session 各自建立 agent（session_team），不會在每次 rerun 重建
+TEAM_SPECS = (
+    AgentSpec("Student_Agent", "你是一位學生，想找適合你的實習職缺，請提供技能來獲得建議。"),
+    AgentSpec(
+        "Teacher_Agent",
+        "你是一位實習職缺推薦老師。當學生提供技能（例如 Python），你需要從提供的職缺清單中找出相關職缺，並推薦給學生。",
+    ),
+)
+MODEL = gemini_model("gemini-2.0-flash-lite", GEMINI_API_KEY)
 
 
 # 讀入資料
-df = pd.read_csv('pages/jobsthousands.csv')
+df = load_jobs("cake", columns=["job_name", "comp_name", "job_tags"])
+
+@st.cache_resource(show_spinner=False)
+def get_skill_index(version: float) -> SkillIndex:
+    # 資料載入時建一次，之後每輪對話只查索引
+    return SkillIndex.from_frame(df, "job_tags")
+
+skill_index = get_skill_index(data_version("cake"))
 
 def get_jobs_by_skill(skill):
-    matched = df[df["job_tags"].str.contains(skill, case=False, na=False)]
-    if matched.empty:
+    skills, mode = parse_skill_query(skill)
+    ranked = skill_index.query(skills, mode)
+    if not ranked:
+        # 沒有完全相同的標籤時，改用前綴比對（例如 SQL -> SQL/MySQL）
+        ranked = skill_index.query(skills, mode, prefix=True)
+    if not ranked:
         return "目前沒有符合該技能的職缺，請嘗試其他技能。"
-    return "\n".join([f"{row['comp_name']} - {row['job_name']}，技能需求：{row['job_tags']}" for _, row in matched.iterrows()])
+    rows = [r for r, _ in ranked]
+    comp_names = df["comp_name"].to_numpy()[rows]
+    job_names = df["job_name"].to_numpy()[rows]
+    job_tags = df["job_tags"].to_numpy()[rows]
+    lines = [f"{c} - {j}，技能需求：{t}" for c, j, t in zip(comp_names, job_names, job_tags)]
+    # 依技能相符程度排序後，只放進 token 預算內的職缺，避免熱門技能塞爆 prompt
+    text, report = fit_lines(lines, "get_jobs_by_skill", max_items=MAX_SKILL_JOBS)
+    if report.returned < report.total:
+        text += f"\n（共 {report.total} 筆，僅列出最相關的 {report.returned} 筆）"
+    return text
+
+def generate_response(prompt, container_obj):
+    # 相同或意思相近的問題（同一份資料版本）直接重播先前的對話，不再呼叫模型；需設定 CHAT_CACHE=1
+    chat_cache = get_chat_cache()
+    version = data_version("cake")
+    scope = conversation_scope("two_agents", [spec.template for spec in TEAM_SPECS], "")
+    if chat_cache is not None and (hit := chat_cache.lookup(scope, prompt, version)) is not None:
+        render_chat_stream(container_obj, replay_events(hit.history), user_image, initiator="Student_Agent")
+        return hit.history
 
-def generate_response(prompt):
     job_info = get_jobs_by_skill(prompt)
     message = f"以下是和 {prompt} 有關的實習職缺：\n{job_info}"
-    chat_result = student_agent.initiate_chat(
-        teacher_agent,
-        message = message,
-        summary_method="reflection_with_llm",
-        max_turns=2,
+    team = session_team(TEAM_SPECS, "", MODEL)
+    # 對話在共用的 event loop 上執行；送出新問題時會取消上一段還沒結束的對話
+    runner = st.session_state.setdefault("chat_runner", ChatRunner())
+    handle = runner.start(
+        lambda: team["Student_Agent"].a_initiate_chat(
+            team["Teacher_Agent"],
+            message = message,
+            summary_method="reflection_with_llm",
+            max_turns=2,
+        )
+    )
+    # 每一輪對話與 token 產生時就顯示，不必等整段對話結束
+    chat_result = render_chat_stream(
+        container_obj, handle.events(), user_image,
+        initiator="Student_Agent", progress=handle.progress,
     )
+    if chat_result is None:
+        return []
+    if chat_cache is not None:
+        chat_cache.put(scope, prompt, "two_agents", version, chat_result.chat_history,
+                       elapsed=handle.progress["elapsed"])
     return chat_result.chat_history
 
-def stream_data(stream_str):
-    for word in stream_str.split(" "):
-        yield word + " "
-        time.sleep(0.05)
-
 def save_lang():
     st.session_state['lang_setting'] = st.session_state.get("language_select")
 
@@ -118,42 +163,30 @@ def main():
 
     st_c_chat = st.container(border=True)
 
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    else:
-        for msg in st.session_state.messages:
-            role = msg["role"]
-            content = clean_text(msg["content"])
-            if role == "user":
-                st_c_chat.chat_message(role, avatar=user_image).markdown(content)
-            elif role == "assistant":
-                st_c_chat.chat_message(role).markdown(content)
+    # 每次 rerun 只重繪目前可見的訊息，較早的按「載入更早的訊息」再讀取
+    store = get_message_store()
+    show_load_earlier(st_c_chat, store)
+    for msg in store.visible():
+        role = msg["role"]
+        content = clean_text(msg["content"])
+        if role == "user":
+            st_c_chat.chat_message(role, avatar=user_image).markdown(content)
+        elif role == "assistant":
+            st_c_chat.chat_message(role).markdown(content)
+        else:
+            image_tmp = msg.get("image")
+            if image_tmp:
+                st_c_chat.chat_message(role, avatar=image_tmp).markdown(content)
             else:
-                image_tmp = msg.get("image")
-                if image_tmp:
-                    st_c_chat.chat_message(role, avatar=image_tmp).markdown(content)
-                else:
-                    st_c_chat.chat_message(role).markdown(content)
-
-    def show_chat_history(chat_history):
-        for entry in chat_history:
-            role = entry.get('role')
-            content = clean_text(entry.get('content'))
-            st.session_state.messages.append({"role": role, "content": content})
-            if len(content.strip()) != 0: 
-                if 'ALL DONE' in content:
-                    return 
-                if role != 'assistant':
-                    st_c_chat.chat_message(role).write(content)
-                else:
-                    st_c_chat.chat_message("user", avatar=user_image).write(content)
+                st_c_chat.chat_message(role).markdown(content)
 
     def chat(prompt: str):
-        response = generate_response(prompt)
-        show_chat_history(response)
+        generate_response(prompt, st_c_chat)
 
     if prompt := st.chat_input(placeholder=placeholderstr, key="chat_bot"):
         chat(prompt)
 
+    show_cache_stats(st.sidebar)
+
 if __name__ == "__main__":
     main()
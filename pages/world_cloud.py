@@ -1,8 +1,10 @@
+import io
+import numpy as np
 import streamlit as st
-import pandas as pd
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-from coding.utils import paging
+from coding.utils import paging, load_jobs
+from coding.job_store import data_version, salary_band
+from coding.term_matrix import load_term_matrix
 
 # --- page setting ---
 st.set_page_config(page_title="World Cloud", layout="wide")
@@ -24,36 +26,87 @@ with st.sidebar:
             st.image(user_image)
      
 # --- load data ---
-@st.cache_data(show_spinner=False)
-def load_data(path: str):
-    return pd.read_csv(path)
+version = data_version("104")
+df = load_jobs("104", columns=["jobNo", "jobName", "description", "coIndustryDesc",
+                               "jobAddrNoDesc", "salaryType", "salaryLow"])
+df["salaryBand"] = salary_band(df)
+# 斷詞與詞頻在 build_term_store 預先算好，這裡只取用
+terms = load_term_matrix("104", version)
+FONT_PATH = "msyh.ttc"
 
-df = load_data("104_jobs_all.csv")
+def to_png(freqs: dict, max_words: int, background: str) -> bytes:
+    if not freqs:
+        return b""
+    wc = WordCloud(
+        font_path=FONT_PATH,
+        width=800,
+        height=400,
+        background_color=background,
+        max_words=max_words
+    )
+    wc.generate_from_frequencies(freqs)
+    buf = io.BytesIO()
+    wc.to_image().save(buf, format="PNG")
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def render_cloud(job_no: str, max_words: int, background: str, version: float) -> bytes:
+    """
+    依 (職缺, 設定, 資料版本) 快取文字雲 PNG；超過 max_entries 時淘汰最久未用的。
+    """
+    row = terms.row_of(job_no)
+    freqs = terms.frequencies(row) if row is not None else {}
+    return to_png(freqs, max_words, background)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def render_group_cloud(industries: tuple, areas: tuple, bands: tuple, keyword: str,
+                       weighting: str, max_words: int, background: str, version: float):
+    """
+    篩選條件下所有職缺的合併文字雲：以稀疏矩陣列加總取代串接文字後重新斷詞。
+    回傳 (PNG, 符合筆數)。
+    """
+    mask = np.ones(len(df), dtype=bool)
+    if industries:
+        mask &= df["coIndustryDesc"].isin(industries).to_numpy()
+    if areas:
+        mask &= df["jobAddrNoDesc"].isin(areas).to_numpy()
+    if bands:
+        mask &= df["salaryBand"].isin(bands).to_numpy()
+    if keyword:
+        text = df["jobName"].fillna("") + "\n" + df["description"].fillna("")
+        mask &= text.str.contains(keyword, case=False, regex=False).to_numpy()
+    rows = terms.rows_of(df["jobNo"].to_numpy()[mask])
+    freqs = terms.aggregate(rows, weighting=weighting, top=max_words)
+    return to_png(freqs, max_words, background), len(rows)
 
 # --- user command ---
-job_list = df["jobName"].tolist()
-selected = st.selectbox("請選擇職缺：", job_list)
+mode = st.radio("範圍", ["單一職缺", "職缺群組"], horizontal=True)
+c1, c2 = st.columns(2)
+max_words = c1.slider("最多字數", 20, 200, 100, step=10)
+background = c2.selectbox("背景顏色", ["white", "black"])
 
 # --- world cloud ---
-content = df.loc[df["jobName"] == selected, "description"].values
-if len(content) == 0:
-    st.error("找不到對應的職缺描述！")
-    st.stop()
-text = content[0]
-
-# --- generate ---
-font_path = "msyh.ttc"  
-wc = WordCloud(
-    font_path=font_path,
-    width=800,
-    height=400,
-    background_color="white",
-    max_words=100
-)
-wc.generate(text)
+if mode == "單一職缺":
+    names = dict(zip(df["jobNo"], df["jobName"]))
+    selected = st.selectbox("請選擇職缺：", list(names), format_func=lambda no: names[no])
+    png = render_cloud(selected, max_words, background, version)
+    if not png:
+        st.error("找不到對應的職缺描述！")
+        st.stop()
+else:
+    f1, f2, f3 = st.columns(3)
+    industries = f1.multiselect("產業", sorted(df["coIndustryDesc"].dropna().unique()))
+    areas = f2.multiselect("地區", sorted(df["jobAddrNoDesc"].dropna().unique()))
+    bands = f3.multiselect("薪資區間", sorted(df["salaryBand"].unique()))
+    keyword = st.text_input("關鍵字（職缺名稱或描述）").strip()
+    weighting = st.radio("權重", ["tf", "tfidf"], horizontal=True,
+                         format_func=lambda w: "詞頻" if w == "tf" else "TF-IDF（淡化「實習」等常見詞）")
+    png, matched = render_group_cloud(tuple(industries), tuple(areas), tuple(bands), keyword,
+                                      weighting, max_words, background, version)
+    st.caption(f"符合 {matched} 筆職缺")
+    if not png:
+        st.error("沒有符合條件的職缺！")
+        st.stop()
 
 # --- show plot ---
-fig, ax = plt.subplots(figsize=(10, 5))
-ax.imshow(wc, interpolation="bilinear")
-ax.axis("off")
-st.pyplot(fig)
\ No newline at end of file
+st.image(png, use_container_width=True)
@@ -10,7 +10,10 @@ from autogen import ConversableAgent, LLMConfig
 from autogen import AssistantAgent, UserProxyAgent, LLMConfig
 from autogen.code_utils import content_str
 from coding.constant import JOB_DEFINITION, RESPONSE_FORMAT
-from coding.utils import paging
+from coding.utils import paging, get_message_store, show_load_earlier
+from coding.agent_factory import AgentSpec, gemini_model, session_team
+from coding.chat_stream import render_chat_stream
+from coding.chat_runner import ChatRunner
 import streamlit as st
 
 # Load environment variables from .env file
@@ -39,31 +42,21 @@ llm_config_gemini_2 = LLMConfig(
     api_key=GEMINI_API_KEY_2,   # Authentication
 )
 
-with llm_config_gemini:
-    assistant = AssistantAgent(
-        name="assistant",
-        system_message=(
+# Personas and tools are prepared once per process; each session gets its own agents (session_team)
+TEAM_SPECS = (
+    AgentSpec(
+        "assistant",
         "You are a helpful storyteller assistant. "
         "Please give me a story. After your result, say 'ALL DONE'. "
-        "Do not say 'ALL DONE' in the same response."
-        ),
-        max_consecutive_auto_reply=2
-    )
-
-user_proxy = UserProxyAgent(
-    "user_proxy",
-    human_input_mode="NEVER",
-    code_execution_config=False,
-    is_termination_msg=lambda x: content_str(x.get("content")).find("ALL DONE") >= 0,
+        "Do not say 'ALL DONE' in the same response.",
+        max_auto_reply=2,
+        assistant=True,
+    ),
 )
+MODEL = gemini_model("gemini-2.0-flash-lite", GEMINI_API_KEY)
 
 # Function Declaration 
 
-def stream_data(stream_str):
-    for word in stream_str.split(" "):
-        yield word + " "
-        time.sleep(0.05)
-
 def save_lang():
     st.session_state['lang_setting'] = st.session_state.get("language_select")
 
@@ -98,24 +91,24 @@ def main():
 
     st_c_chat = st.container(border=True)
 
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    else:
-        for msg in st.session_state.messages:
-            if msg["role"] == "user":
-                if user_image:
-                    st_c_chat.chat_message(msg["role"],avatar=user_image).markdown((msg["content"]))
-                else:
-                    st_c_chat.chat_message(msg["role"]).markdown((msg["content"]))
-            elif msg["role"] == "assistant":
-                st_c_chat.chat_message(msg["role"]).markdown((msg["content"]))
+    # only the visible page of the history is rendered on each rerun
+    store = get_message_store()
+    show_load_earlier(st_c_chat, store)
+    for msg in store.visible():
+        if msg["role"] == "user":
+            if user_image:
+                st_c_chat.chat_message(msg["role"],avatar=user_image).markdown((msg["content"]))
             else:
-                try:
-                    image_tmp = msg.get("image")
-                    if image_tmp:
-                        st_c_chat.chat_message(msg["role"],avatar=image_tmp).markdown((msg["content"]))
-                except:
-                    st_c_chat.chat_message(msg["role"]).markdown((msg["content"]))
+                st_c_chat.chat_message(msg["role"]).markdown((msg["content"]))
+        elif msg["role"] == "assistant":
+            st_c_chat.chat_message(msg["role"]).markdown((msg["content"]))
+        else:
+            try:
+                image_tmp = msg.get("image")
+                if image_tmp:
+                    st_c_chat.chat_message(msg["role"],avatar=image_tmp).markdown((msg["content"]))
+            except:
+                st_c_chat.chat_message(msg["role"]).markdown((msg["content"]))
 
 
     story_template = ("Give me a story started from '##PROMPT##'."
@@ -138,10 +131,24 @@ def main():
         # prompt_template = f"Give me a story started from '{prompt}'"
         prompt_template = story_template.replace('##PROMPT##',prompt)
         # prompt_template = classification_template.replace('##PROMPT##',prompt)
-        result = user_proxy.initiate_chat(
-        recipient=assistant,
-        message=prompt_template
+        team = session_team(TEAM_SPECS, lang_setting, MODEL, ("ALL DONE",))
+        # runs on the shared event loop; a new prompt cancels the unfinished story
+        runner = st.session_state.setdefault("chat_runner", ChatRunner())
+        handle = runner.start(
+            lambda: team.user_proxy.a_initiate_chat(
+                recipient=team["assistant"],
+                message=prompt_template
+            )
         )
+        # the story is streamed into the chat as it is generated
+        result = render_chat_stream(
+            st_c_chat, handle.events(),
+            hidden=("user_proxy",),
+            roles=("user", "assistant"),
+            progress=handle.progress,
+        )
+        if result is None:
+            return ""
 
         response = result.summary
         return response
@@ -151,7 +158,7 @@ def main():
             role = entry.get('role')
             name = entry.get('name')
             content = entry.get('content')
-            st.session_state.messages.append({"role": f"{role}", "content": content})
+            store.append({"role": f"{role}", "content": content})
 
             if len(content.strip()) != 0: 
                 if 'ALL DONE' in content:
@@ -167,12 +174,9 @@ def main():
     # Chat function section (timing included inside function)
     def chat(prompt: str):
         st_c_chat.chat_message("user",avatar=user_image).write(prompt)
-        st.session_state.messages.append({"role": "user", "content": prompt})
-
-        response = generate_response(prompt)
+        store.append({"role": "user", "content": prompt})
 
-        st_c_chat.chat_message("assistant").write(response)
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        generate_response(prompt)
         
     
     if prompt := st.chat_input(placeholder=placeholderstr, key="chat_bot"):
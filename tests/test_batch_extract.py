@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from coding.batch_extract import extract_batch
+
+BATCH = [(1, "a"), (2, "b"), (3, "c")]
+
+
+def reply_for(prompt, skip=()):
+    return json.dumps([{"id": item["id"], "content": item["text"].upper()}
+                       for item in json.loads(prompt) if item["id"] not in skip])
+
+
+def test_missing_items_are_resent_in_smaller_batches():
+    prompts = []
+
+    def call(prompt):
+        prompts.append(prompt)
+        return reply_for(prompt, skip={"2"} if len(prompts) == 1 else ())
+
+    results, failed = extract_batch(call, BATCH)
+    assert results == {1: "A", 2: "B", 3: "C"} and failed == []
+    assert len(prompts) == 2
+
+
+def test_length_error_splits_the_batch():
+    def call(prompt):
+        if len(json.loads(prompt)) > 1:
+            raise RuntimeError("400 Request exceeds the maximum context length")
+        return reply_for(prompt)
+
+    results, failed = extract_batch(call, BATCH)
+    assert results == {1: "A", 2: "B", 3: "C"} and failed == []
+
+
+@pytest.mark.parametrize("message", ["429 Resource exhausted", "401 Unauthorized", "403 Forbidden"])
+def test_other_errors_are_raised_without_splitting(message):
+    prompts = []
+
+    def call(prompt):
+        prompts.append(prompt)
+        raise RuntimeError(message)
+
+    with pytest.raises(RuntimeError, match=message):
+        extract_batch(call, BATCH)
+    assert len(prompts) == 1
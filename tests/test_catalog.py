@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from coding.catalog import Catalog
+from coding.constant import EXPERTS_LIST
+
+FIELDS = ["NAME", "DISCIPLINE", "INTEREST"]
+EXPERTS = EXPERTS_LIST["EXPERTS"]
+
+
+def scan(entries, **criteria):
+    """The linear substring scan Catalog replaced."""
+    return [e for e in entries
+            if any(v and v.lower() in str(e.get(f, "")).lower()
+                   for f, values in criteria.items() for v in values or [])]
+
+
+@pytest.fixture
+def catalog():
+    return Catalog(EXPERTS, FIELDS)
+
+
+@pytest.mark.parametrize("criteria", [
+    {"DISCIPLINE": ["sociology"]},
+    {"DISCIPLINE": ["Socio"]},              # fragment of a token
+    {"DISCIPLINE": ["ology"]},              # fragment longer than a trigram
+    {"INTEREST": ["data ethics"]},          # several tokens
+    {"INTEREST": ["a ethi"]},               # spans a token boundary
+    {"NAME": ["furen"], "INTEREST": ["privacy"]},
+    {"NAME": ["e"]},
+    {"NAME": [""], "DISCIPLINE": None},
+    {"DISCIPLINE": ["quantum"]},
+])
+def test_search_matches_a_substring_scan(catalog, criteria):
+    assert catalog.search(**criteria) == scan(EXPERTS, **criteria)
+
+
+def test_results_keep_catalog_order_without_duplicates(catalog):
+    results = catalog.search(NAME=["gild"], DISCIPLINE=["digital"])
+    assert results == [e for e in EXPERTS if e in results]
+    assert len({e["NAME"] for e in results}) == len(results)
+
+
+def test_from_json(tmp_path):
+    path = tmp_path / "experts.json"
+    path.write_text(json.dumps({"EXPERTS": EXPERTS[:2]}), encoding="utf-8")
+    catalog = Catalog.from_json(str(path), "EXPERTS", FIELDS)
+    assert len(catalog) == 2
+    assert catalog.search(NAME=["gild"]) == [EXPERTS[0]]
@@ -0,0 +1,100 @@
+import pytest
+
+from coding.chat_cache import ChatCache, conversation_scope
+
+SCOPE = conversation_scope("teacher_agent", ["persona"], "繁體中文", recipient="Job_Advisor_Agent")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ChatCache(str(tmp_path / "chat_cache.sqlite"), threshold=0.9)
+
+
+def history(text):
+    return [{"role": "user", "name": "Job_Advisor_Agent", "content": text}]
+
+
+def test_paraphrase_reuses_the_cached_chat(cache):
+    cache.put(SCOPE, "我會Python", "teacher_agent", 1.0, history("python"))
+    hit = cache.lookup(SCOPE, "Python 技能", 1.0)
+    assert hit is not None and hit.history == history("python")
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("時薪 200 以上 行銷", "時薪 300 以上 行銷"),
+    ("捷運港墘站 3 公里內 Python", "捷運港墘站 10 公里內 Python"),
+    ("資料分析 月薪 3 萬以上", "資料分析 月薪 5 萬以上"),
+    ("行銷實習", "行銷 不要 實習"),
+])
+def test_different_constraints_never_hit(cache, cached, asked):
+    cache.put(SCOPE, cached, "teacher_agent", 1.0, history(cached))
+    assert cache.lookup(SCOPE, asked, 1.0) is None
+
+
+def test_new_data_version_misses(cache):
+    cache.put(SCOPE, "資料分析", "teacher_agent", 1.0, history("old"))
+    assert cache.lookup(SCOPE, "資料分析", 2.0) is None
+
+
+def test_default_threshold_does_not_reuse_a_narrower_question(tmp_path):
+    cache = ChatCache(str(tmp_path / "chat_cache.sqlite"))
+    cache.put(SCOPE, "我會Python", "teacher_agent", 1.0, history("python"))
+    assert cache.lookup(SCOPE, "我會 Python 和 Excel", 1.0) is None
+    assert cache.lookup(SCOPE, "Python 技能", 1.0) is not None
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("coding.chat_cache.time.time", clock)
+    return clock
+
+
+def exact_cache(tmp_path, **kwargs):
+    return ChatCache(str(tmp_path / "chat_cache.sqlite"), threshold=None, **kwargs)
+
+
+def test_exact_prompt_hits_after_normalization(tmp_path, clock):
+    cache = exact_cache(tmp_path)
+    cache.put(SCOPE, "我會 Python", "teacher_agent", 1.0, history("python"), elapsed=12.0)
+    hit = cache.lookup(SCOPE, "  我會　Python ", 1.0)
+    assert hit is not None and hit.history == history("python") and hit.similarity == 1.0
+    assert hit.saved_seconds > 11
+    assert cache.lookup(SCOPE, "我會 Java", 1.0) is None
+    other_scope = conversation_scope("teacher_agent", ["persona"], "English", recipient="Job_Advisor_Agent")
+    assert cache.lookup(other_scope, "我會 Python", 1.0) is None
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = exact_cache(tmp_path, ttl=60)
+    cache.put(SCOPE, "資料分析", "teacher_agent", 1.0, history("old"))
+    clock.now += 59
+    assert cache.lookup(SCOPE, "資料分析", 1.0) is not None
+    clock.now += 2
+    assert cache.lookup(SCOPE, "資料分析", 1.0) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = exact_cache(tmp_path, max_entries=2)
+    for prompt in ("行銷", "資料分析"):
+        clock.now += 1
+        cache.put(SCOPE, prompt, "teacher_agent", 1.0, history(prompt))
+    clock.now += 1
+    assert cache.lookup(SCOPE, "行銷", 1.0) is not None  # now more recent than 資料分析
+
+    clock.now += 1
+    cache.put(SCOPE, "後端工程", "teacher_agent", 1.0, history("後端工程"))
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup(SCOPE, "資料分析", 1.0) is None
+    assert cache.lookup(SCOPE, "行銷", 1.0) is not None
+    assert cache.lookup(SCOPE, "後端工程", 1.0) is not None
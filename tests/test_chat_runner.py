@@ -0,0 +1,34 @@
+import asyncio
+import threading
+import time
+
+from coding.chat_runner import get_loop, run_chat
+
+
+async def never_finishes():
+    await asyncio.sleep(60)
+
+
+def test_events_end_with_done():
+    handle = run_chat(lambda: asyncio.sleep(0.05, result="answer"))
+    events = list(handle.events())
+    assert [event.kind for event in events] == ["done"]
+    assert events[-1].content == "answer"
+
+
+def test_cancel_while_running_ends_events():
+    handle = run_chat(never_finishes)
+    threading.Timer(0.1, handle.cancel).start()
+    assert [event.kind for event in handle.events()] == ["cancelled"]
+
+
+def test_cancel_before_start_does_not_hang_the_reader():
+    blocked = threading.Event()
+    get_loop().call_soon_threadsafe(blocked.wait, 1.0)  # keep the loop busy so the chat never starts
+    handle = run_chat(never_finishes)
+    handle.cancel(wait=0)
+
+    start = time.monotonic()
+    assert [event.kind for event in handle.events()] == ["cancelled"]
+    assert time.monotonic() - start < 2
+    blocked.set()
@@ -0,0 +1,84 @@
+import asyncio
+
+from autogen import ConversableAgent
+from autogen.events.client_events import StreamEvent
+from autogen.io import IOStream
+
+from coding.chat_runner import run_chat
+from coding.chat_stream import ChatEvent, announce_speaker, render_chat_stream
+
+
+def streaming_agent(name, chunks):
+    """Agent whose reply streams `chunks` through the IOStream, like an LLM client with stream=True."""
+    agent = ConversableAgent(name, llm_config=False, human_input_mode="NEVER", max_consecutive_auto_reply=1)
+
+    def reply(recipient, messages=None, sender=None, config=None):
+        for chunk in chunks:
+            IOStream.get_default().send(StreamEvent(content=chunk))
+        return True, "".join(chunks)
+
+    agent.register_reply([ConversableAgent, None], reply)
+    agent.register_hook("update_agent_state", announce_speaker)
+    return agent
+
+
+def test_tokens_are_attributed_to_the_replying_agent():
+    student = streaming_agent("student", ["Hi ", "teacher"])
+    teacher = streaming_agent("teacher", ["Hello ", "there"])
+    handle = run_chat(lambda: student.a_initiate_chat(teacher, message="start", max_turns=2))
+    events = [(event.kind, event.sender, event.content) for event in handle.events()
+              if event.kind in ("token", "message")]
+
+    assert events[:4] == [
+        ("message", "student", "start"),
+        ("token", "teacher", "Hello "),
+        ("token", "teacher", "there"),
+        ("message", "teacher", "Hello there"),
+    ]
+    assert ("token", "student", "Hi ") in events
+
+
+class Placeholder:
+    def __init__(self, log, role):
+        self.log, self.role = log, role
+
+    def empty(self):
+        return self
+
+    def markdown(self, text):
+        self.log.append((self.role, text))
+
+
+class Container:
+    def __init__(self):
+        self.log = []
+
+    def chat_message(self, role, avatar=None):
+        return Placeholder(self.log, role)
+
+    def caption(self, text):
+        self.log.append(("caption", text))
+
+
+def test_hidden_senders_tokens_are_not_rendered():
+    events = [
+        ChatEvent("token", "user_proxy", "secret template"),
+        ChatEvent("message", "user_proxy", "secret template"),
+        ChatEvent("token", "assistant", "Once "),
+        ChatEvent("token", "assistant", "upon"),
+        ChatEvent("message", "assistant", "Once upon"),
+        ChatEvent("token", "", "summary"),  # outside any agent reply
+        ChatEvent("done", content="result"),
+    ]
+    container = Container()
+    assert render_chat_stream(container, iter(events), hidden=("user_proxy",)) == "result"
+
+    assert all("secret" not in text and "summary" not in text for _, text in container.log)
+    assert container.log[-1] == ("ai", "Once upon")
+
+
+def test_initiator_tokens_stream_into_the_initiator_bubble():
+    events = [ChatEvent("token", "student", "Hi"), ChatEvent("message", "student", "Hi"), ChatEvent("done")]
+    container = Container()
+    render_chat_stream(container, iter(events), initiator="student")
+    assert container.log == [("assistant", "Hi▌"), ("assistant", "Hi")]
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+from coding.crawler import AsyncCrawler, HTTPStatusError
+
+
+def fake_fetcher(pages):
+    """Fetcher serving `pages[page] = (status, body)` from memory instead of the network."""
+    async def fetch(url, params):
+        return pages[params["page"]]
+    return fetch
+
+
+def test_fetch_text_non_200_raises_printable_error():
+    async def run():
+        async with AsyncCrawler(rate_per_host=1000, fetcher=fake_fetcher({1: (503, "busy")})) as crawler:
+            await crawler.fetch_text("https://example.com/list", params={"page": 1})
+
+    with pytest.raises(HTTPStatusError) as info:
+        asyncio.run(run())
+    assert info.value.status == 503
+    assert "503" in str(info.value)
+
+
+def test_104_scrape_skips_a_failed_page(capsys):
+    from job_scrape_104 import fetch_104_jobs
+
+    page = lambda jobs: (200, json.dumps({"data": {"list": jobs}}))
+    fetcher = fake_fetcher({
+        1: page([{"jobNo": "1"}, {"jobNo": "2"}]),
+        2: (503, "Service Unavailable"),
+        3: page([{"jobNo": "3"}]),
+        4: page([]),
+    })
+    jobs = asyncio.run(fetch_104_jobs(pages=4, fetcher=fetcher))
+
+    assert [job["jobNo"] for job in jobs] == ["1", "2", "3"]
+    assert "第 2 頁發生錯誤" in capsys.readouterr().out
+
+
+def test_cake_scrape_keeps_pages_around_a_failed_one():
+    pytest.importorskip("bs4")
+    from job_scrape import fetch_jobs
+
+    html = ('<div class="JobSearchHits_list__3UtHp"><div>'
+            '<a data-algolia-event-name="click_job">{job}</a>'
+            '<a data-algolia-event-name="click_page">Co</a></div></div>')
+    fetcher = fake_fetcher({1: (200, html.format(job="A")), 2: (503, ""), 3: (200, html.format(job="B"))})
+    data = asyncio.run(fetch_jobs(pages=3, fetcher=fetcher))
+
+    assert [row[0] for row in data] == ["A", "B"]
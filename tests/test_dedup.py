@@ -0,0 +1,60 @@
+import pandas as pd
+
+from coding.dedup import DedupStage
+from coding.stream_clean import clean_stream
+
+DESC = "負責資料分析與報表製作，熟悉 Python 與 SQL，協助團隊整理每週營運數據。" * 3
+
+
+def plan_single(pending):
+    return {}, [[item] for item in pending]
+
+
+def run(tmp_path, descriptions, work, chunksize=2, stage=None, window=4):
+    frame = pd.DataFrame({"jobName": [f"job{i}" for i in range(len(descriptions))], "description": descriptions})
+    chunks = (frame.iloc[i:i + chunksize] for i in range(0, len(frame), chunksize))
+    out_path = tmp_path / "out.csv"
+    plan, work = (stage or DedupStage()).wrap(plan_single, work)
+    stats = clean_stream(chunks, str(out_path), plan, work, window=window, max_workers=2)
+    return stats, pd.read_csv(out_path, encoding="utf-8-sig")
+
+
+def test_duplicates_share_the_representative_result(tmp_path):
+    stats, out = run(tmp_path, [DESC, DESC, "其他職缺", DESC], lambda unit: {idx: "ok" for idx, _ in unit})
+    assert stats["failures"] == []
+    assert sorted(out["rowIndex"]) == [0, 1, 2, 3]
+
+
+def test_failed_representative_fails_every_duplicate(tmp_path):
+    def work(unit):
+        if any(desc == DESC for _, desc in unit):
+            raise RuntimeError("quota exceeded")
+        return {idx: "ok" for idx, _ in unit}
+
+    stage = DedupStage()
+    stats, out = run(tmp_path, [DESC, DESC, "其他職缺", DESC], work, stage=stage)
+    assert sorted(out["rowIndex"]) == [2]
+    assert stage.saved == 0 and stage.index.exact_hits == 2
+    assert sorted(idx for idx, _ in stats["failures"]) == [0, 1, 3]
+    assert {error for _, error in stats["failures"]} == {"quota exceeded"}
+
+
+def test_missing_representative_result_counts_its_duplicates(tmp_path):
+    stats, out = run(tmp_path, [DESC, DESC, DESC], lambda unit: {})
+    assert out.empty
+    assert sorted(idx for idx, _ in stats["failures"]) == [0, 1, 2]
+
+
+def test_evicted_results_are_read_back_from_the_checkpoint(tmp_path):
+    calls = []
+
+    def work(unit):
+        calls.extend(idx for idx, _ in unit)
+        return {idx: f"content {idx}" for idx, _ in unit}
+
+    stage = DedupStage(checkpoint=str(tmp_path / "out.csv"), recent=1)
+    descriptions = [DESC, "其他職缺", "第三個職缺", "第四個職缺", DESC, DESC]
+    stats, out = run(tmp_path, descriptions, work, stage=stage, window=1)
+    assert stats["failures"] == [] and 4 not in calls and 5 not in calls
+    assert stage.saved == 2
+    assert out.set_index("rowIndex").loc[[4, 5], "jobContent"].tolist() == ["content 0", "content 0"]
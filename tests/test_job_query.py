@@ -0,0 +1,85 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from coding import job_store
+from coding.job_query import JobQueryIndex, haversine_km
+
+BUNDLED = Path(__file__).parent.parent / "pages" / "104_intern.csv"
+
+pytestmark = pytest.mark.skipif(not BUNDLED.exists(), reason="bundled 104 CSV not present")
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("jobs")
+    shutil.copy(BUNDLED, directory / "jobs.csv")
+    spec = dict(job_store.SOURCES["104"], csv=str(directory / "jobs.csv"), store=str(directory / "jobs.parquet"))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(job_store.SOURCES, "test", spec)
+        yield JobQueryIndex("test")
+
+
+def scan(jobs, locations=None, industries=None, salary_type=None, min_salary=None,
+         max_salary=None, posted_after=None, near=None, within_km=None):
+    """Row-by-row filter with the semantics of JobQueryIndex.query."""
+    mask = np.ones(len(jobs), dtype=bool)
+    if locations:
+        mask &= jobs["jobAddrNoDesc"].astype(str).apply(lambda v: any(t in v for t in locations)).to_numpy()
+    if industries:
+        mask &= jobs["coIndustryDesc"].astype(str).apply(lambda v: any(t in v for t in industries)).to_numpy()
+    if salary_type:
+        mask &= (jobs["salaryType"].astype(str) == salary_type).to_numpy()
+    if min_salary is not None:
+        mask &= (pd.to_numeric(jobs["salaryLow"]) >= min_salary).fillna(False).to_numpy(dtype=bool)
+    if max_salary is not None:
+        mask &= (pd.to_numeric(jobs["salaryHigh"]) <= max_salary).fillna(False).to_numpy(dtype=bool)
+    if posted_after:
+        mask &= (jobs["appearDate"] >= pd.Timestamp(posted_after)).fillna(False).to_numpy(dtype=bool)
+    if near is not None and within_km:
+        lats = jobs["lat"].to_numpy(dtype=np.float64, na_value=np.nan)
+        lons = jobs["lon"].to_numpy(dtype=np.float64, na_value=np.nan)
+        mask &= np.nan_to_num(haversine_km(near[0], near[1], lats, lons), nan=np.inf) <= within_km
+    return set(jobs.loc[mask, "jobNo"].astype(str))
+
+
+@pytest.mark.parametrize("criteria", [
+    {},
+    {"locations": ["台北市"]},
+    {"locations": ["台北市", "新北市"], "salary_type": "H", "min_salary": 200},
+    {"industries": ["餐", "金融"], "max_salary": 40000},
+    {"salary_type": "M", "min_salary": 30000, "max_salary": 50000},
+    {"posted_after": "2025-05-24", "locations": ["新竹"]},
+    {"near": (25.0797, 121.5753), "within_km": 3},            # 捷運港墘站
+    {"near": (25.0478, 121.5170), "within_km": 5, "salary_type": "H"},
+    {"locations": ["不存在的地點"]},
+])
+def test_query_matches_a_row_scan(index, criteria):
+    result = index.query(limit=len(index.jobs), **criteria)
+    assert result["total"] == len(result["jobs"])
+    assert {job["jobNo"] for job in result["jobs"]} == scan(index.jobs, **criteria)
+
+
+def test_orders(index):
+    by_date = index.query(locations=["台北市"], limit=50)["jobs"]
+    dates = [job["appearDate"] or "" for job in by_date]
+    assert dates == sorted(dates, reverse=True)
+
+    by_salary = index.query(salary_type="H", order_by="salary", limit=50)["jobs"]
+    lows = index.jobs.set_index(index.jobs["jobNo"].astype(str))["salaryLow"]
+    salaries = [lows[job["jobNo"]] for job in by_salary]
+    assert salaries == sorted(salaries, reverse=True)
+
+    near = index.locate("捷運港墘站")
+    by_distance = index.query(near=near, within_km=5, order_by="distance", limit=50)["jobs"]
+    distances = [job["distance_km"] for job in by_distance]
+    assert near is not None and distances and distances == sorted(distances)
+    assert max(distances) <= 5
+
+
+def test_limit_keeps_the_total(index):
+    result = index.query(locations=["台北市"], limit=3)
+    assert len(result["jobs"]) == 3 and result["total"] >= 3
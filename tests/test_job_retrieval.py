@@ -0,0 +1,69 @@
+import os
+
+import pandas as pd
+import pytest
+
+from coding import job_retrieval, job_store
+from coding.job_retrieval import JobRetriever, build_job_vectors, get_job_retriever
+
+JOBS = pd.DataFrame({
+    "jobNo": ["1", "2", "3", "4"],
+    "jobName": ["資料分析實習生", "行銷企劃實習生", "後端工程實習生", "資料工程實習生"],
+    "description": ["使用 Python 與 SQL 進行資料分析，製作報表", "社群經營與活動企劃，撰寫行銷文案",
+                    "以 Go 開發後端服務與 API", "建置資料管線，使用 Python 處理資料"],
+    "custName": ["甲公司", "乙公司", "丙公司", "丁公司"],
+    "jobAddrNoDesc": ["台北市大安區", "台北市信義區", "新竹市東區", "新竹縣竹北市"],
+    "salaryDesc": ["時薪 200 元", "時薪 190 元", "月薪 30,000 元", "時薪 250 元"],
+    "salaryType": ["H", "H", "M", "H"],
+    "salaryLow": ["200", "190", "30000", "250"],
+    "salaryHigh": ["200", "190", "30000", "250"],
+    "link": ["{'job': '//www.104.com.tw/job/1'}", "", "", ""],
+})
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    csv = tmp_path / "jobs.csv"
+    JOBS.to_csv(csv, index=False, encoding="utf-8-sig")
+    spec = {"csv": str(csv), "store": str(tmp_path / "jobs.parquet"),
+            "categorical": [], "integer": ["salaryLow", "salaryHigh"], "float": [], "date": []}
+    monkeypatch.setitem(job_store.SOURCES, "test", spec)
+    monkeypatch.setattr(job_retrieval, "_retrievers", {})
+    return "test"
+
+
+@pytest.fixture
+def retriever(source):
+    build_job_vectors(source)
+    return JobRetriever(source)
+
+
+def test_most_similar_job_ranks_first(retriever):
+    hits = retriever.search("Python 資料分析", top_k=2)
+    assert [hit["jobNo"] for hit in hits] == ["1", "4"]
+    assert hits[0]["score"] >= hits[1]["score"] > 0
+    assert hits[0]["link"] == "https://www.104.com.tw/job/1"
+
+
+def test_filters_apply_before_scoring(retriever):
+    assert [hit["jobNo"] for hit in retriever.search("Python 資料", location="新竹")] == ["4"]
+    assert [hit["jobNo"] for hit in retriever.search("Python 資料", min_salary=210, salary_type="H")] == ["4"]
+    assert retriever.search("Python", location="高雄") == []
+
+
+def test_unrelated_query_returns_nothing(retriever):
+    assert retriever.search("zzzz") == []
+
+
+def test_get_job_retriever_rebuilds_after_a_new_scrape(source):
+    first = get_job_retriever(source)
+    assert get_job_retriever(source) is first
+
+    csv = job_store.SOURCES[source]["csv"]
+    JOBS.assign(jobName=JOBS["jobName"].str.replace("資料分析", "財務會計")).to_csv(
+        csv, index=False, encoding="utf-8-sig")
+    os.utime(csv, (os.path.getmtime(csv) + 10,) * 2)
+
+    second = get_job_retriever(source)
+    assert second is not first
+    assert second.search("財務會計")[0]["jobNo"] == "1"
@@ -0,0 +1,39 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from coding import job_store
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    csv = tmp_path / "jobs.csv"
+    pd.DataFrame({"jobNo": ["1", "2"], "salaryLow": ["180", "200"], "salaryType": ["H", "H"]}).to_csv(
+        csv, index=False, encoding="utf-8-sig")
+    spec = {"csv": str(csv), "store": str(tmp_path / "jobs.parquet"),
+            "categorical": ["salaryType"], "integer": ["salaryLow"], "float": [], "date": []}
+    monkeypatch.setitem(job_store.SOURCES, "test", spec)
+    return spec
+
+
+def test_corrupt_store_falls_back_to_csv(source, caplog):
+    with open(source["store"], "wb") as f:
+        f.write(b"not a parquet file")
+    os.utime(source["store"], (os.path.getmtime(source["csv"]) + 10,) * 2)  # looks fresh
+
+    df = job_store.read_jobs("test")
+    assert df["salaryLow"].tolist() == [180, 200]
+    assert "Cannot use" in caplog.text
+
+
+def test_concurrent_builds_leave_one_complete_store(source):
+    threads = [threading.Thread(target=job_store.build_store, args=("test",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(os.listdir(os.path.dirname(source["store"]))) == ["jobs.csv", "jobs.parquet"]  # no temp files left
+    assert pd.read_parquet(source["store"])["jobNo"].tolist() == ["1", "2"]
@@ -0,0 +1,66 @@
+import pytest
+
+from coding.llm_scheduler import AIMDScheduler, is_retryable_error
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def failing(errors):
+    """fn raising `errors` one by one, then returning 'ok'."""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+    return fn, calls
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (StatusError(429), True),
+    (StatusError(503), True),
+    (TimeoutError("read timed out"), True),
+    (RuntimeError("504 Gateway Timeout"), True),
+    (StatusError(400), False),
+    (StatusError(401), False),
+    (RuntimeError("403 Forbidden: API key not valid"), False),
+])
+def test_is_retryable_error(error, retryable):
+    assert is_retryable_error(error) is retryable
+
+
+def test_transient_errors_are_retried():
+    scheduler = AIMDScheduler(base_delay=0.001)
+    fn, calls = failing([StatusError(503), TimeoutError("timed out")])
+    assert scheduler.run(fn) == "ok"
+    assert len(calls) == 3 and scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["calls"] == 3
+
+
+def test_client_errors_are_not_retried():
+    scheduler = AIMDScheduler(base_delay=0.001)
+    fn, calls = failing([StatusError(401)])
+    with pytest.raises(StatusError):
+        scheduler.run(fn)
+    assert len(calls) == 1
+    assert scheduler.stats()["retries"] == 0 and scheduler.stats()["errors"] == 1
+    assert scheduler.stats()["calls"] == 1
+
+
+def test_runs_keep_their_own_stats():
+    scheduler = AIMDScheduler(base_delay=0.001)
+    first, second = scheduler.new_run(), scheduler.new_run()
+    first.run(failing([StatusError(503)])[0])
+    first.run(lambda: "ok")
+    second.run(lambda: "ok")
+    third = scheduler.new_run()
+
+    assert (first.stats()["completed"], first.stats()["retries"]) == (2, 1)
+    assert (second.stats()["completed"], second.stats()["retries"]) == (1, 0)
+    assert third.stats()["completed"] == 0
+    assert scheduler.stats()["completed"] == 3
@@ -0,0 +1,69 @@
+import os
+import time
+
+from coding.message_store import MessageStore, prune_archives
+
+
+def make_store(tmp_path, count, max_in_memory=4, page_size=2):
+    store = MessageStore(max_in_memory=max_in_memory, page_size=page_size, archive_dir=str(tmp_path))
+    store.extend([{"role": "user", "content": str(i)} for i in range(count)])
+    return store
+
+
+def contents(messages):
+    return [m["content"] for m in messages]
+
+
+def test_old_messages_are_paged_out_to_the_archive(tmp_path):
+    store = make_store(tmp_path, 10)
+    assert len(store) == 10
+    assert len(store.recent) <= store.max_in_memory
+    assert os.path.exists(store.archive_path)
+
+
+def test_visible_shows_the_newest_page(tmp_path):
+    store = make_store(tmp_path, 10)
+    assert contents(store.visible()) == ["8", "9"]
+    assert store.hidden_count() == 8
+
+
+def test_load_earlier_reads_back_archived_messages_in_order(tmp_path):
+    store = make_store(tmp_path, 10)
+    for _ in range(3):
+        store.load_earlier()
+    assert contents(store.visible()) == ["2", "3", "4", "5", "6", "7", "8", "9"]
+
+    store.load_earlier()
+    store.load_earlier()
+    assert contents(store.visible()) == [str(i) for i in range(10)]
+    assert store.hidden_count() == 0
+
+
+def test_clear_removes_the_archive(tmp_path):
+    store = make_store(tmp_path, 10)
+    store.clear()
+    assert len(store) == 0 and store.visible() == []
+    assert not os.path.exists(store.archive_path)
+
+
+def test_reading_keeps_an_open_session_from_being_pruned(tmp_path):
+    store = make_store(tmp_path, 10)
+    old = time.time() - 2 * 86400
+    os.utime(store.archive_path, (old, old))
+
+    store.visible()
+    prune_archives(str(tmp_path))
+    assert os.path.exists(store.archive_path)
+
+
+def test_pruned_archive_means_no_older_messages(tmp_path):
+    store = make_store(tmp_path, 10)
+    old = time.time() - 2 * 86400
+    os.utime(store.archive_path, (old, old))
+    prune_archives(str(tmp_path))
+    assert not os.path.exists(store.archive_path)
+
+    store.load_earlier()
+    store.load_earlier()
+    assert contents(store.visible()) == contents(store.recent)
+    assert store.hidden_count() == 0
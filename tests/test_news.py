@@ -0,0 +1,94 @@
+import http.server
+import re
+import threading
+from pathlib import Path
+
+import pytest
+import requests
+
+from coding import tools
+
+FIXTURES = Path(__file__).parent / "fixtures" / "taipei_times"
+LIST_RE = re.compile(r"/ajax_json/(\d+)/list/(?:(\w+)/)?$")
+
+
+def stub_page(path):
+    """(status, body) of the Taipei Times list API for `path`, served from the fixtures."""
+    match = LIST_RE.search(path)
+    fixture = match and FIXTURES / f"list_{match.group(1)}.json"
+    if fixture is None or not fixture.exists():
+        return 404, b"Not Found"
+    return 200, fixture.read_bytes()
+
+
+class StubSession:
+    """Stands in for requests.Session: answers get() from the fixtures instead of the network."""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        status, body = stub_page(url)
+        response = requests.Response()
+        response.status_code = status
+        response._content = body
+        response.url = url
+        return response
+
+
+def test_fetch_all_news_parses_dedupes_and_sorts_pages():
+    session = StubSession()
+    df = tools.fetch_all_news(1, 2, session=session)
+
+    assert sorted(session.urls) == [f"{tools.TAIPEI_TIMES_BASE_URL}/ajax_json/{page}/list/" for page in (1, 2)]
+    assert df["ar_id"].tolist() == [2003835102, 2003835099, 2003835050, 2003834980]
+    assert {"ar_head", "ar_desc", "ar_section", "ar_pubdate", "url"} <= set(df.columns)
+
+
+def test_fetch_all_news_skips_a_failed_page(caplog):
+    df = tools.fetch_all_news(1, 3, session=StubSession())
+
+    assert len(df) == 4
+    assert "Failed to fetch page 3" in caplog.text
+
+
+def test_search_news_over_fetched_stub_pages():
+    df = tools.fetch_all_news(1, 2, session=StubSession())
+
+    hits = tools.search_news(df, query="minimum wage", news_number=2)
+    assert hits.iloc[0]["ar_id"] == 2003834980
+
+    taiwan = tools.search_news(df, sections=["Taiwan News"], date_from="2025-05-22")
+    assert taiwan["ar_id"].tolist() == [2003835102]
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """Local HTTP server for the fixtures, with TAIPEI_TIMES_BASE_URL pointed at it."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, body = stub_page(self.path)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(tools, "TAIPEI_TIMES_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_all_news_from_local_stub_server(stub_server):
+    with tools.make_session(retries=0) as session:
+        df = tools.fetch_all_news(1, 3, session=session)
+
+    assert df["ar_id"].tolist() == [2003835102, 2003835099, 2003835050, 2003834980]
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pandas as pd
+
+from coding import news_cache
+from coding.news_cache import SWRCache
+
+
+class Loader:
+    """Counts loads and returns version n on the n-th call; `gate` holds a load until set."""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, key):
+        self.calls += 1
+        version = self.calls
+        self.gate.wait(5)
+        return f"{key}-v{version}"
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_fresh_entry_is_served_without_reloading():
+    loader = Loader()
+    cache = SWRCache(loader, ttl=60)
+    assert cache.get("k") == "k-v1"
+    assert cache.get("k") == "k-v1"
+    assert loader.calls == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    loader = Loader()
+    cache = SWRCache(loader, ttl=0)
+    assert cache.get("k") == "k-v1"
+
+    loader.gate.clear()
+    assert cache.get("k") == "k-v1"  # stale value returned at once, refresh started
+    assert cache.get("k") == "k-v1"  # still stale, no second refresh
+    assert loader.calls == 2
+
+    loader.gate.set()
+    assert wait_for(lambda: cache.get_entry("k")[1] == "k-v2")
+
+
+def test_concurrent_misses_share_one_load():
+    loader = Loader()
+    loader.gate.clear()
+    cache = SWRCache(loader, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert wait_for(lambda: loader.calls == 1)
+    loader.gate.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["k-v1"] * 8 and loader.calls == 1
+
+
+def test_rejected_values_are_not_cached():
+    loader = Loader()
+    cache = SWRCache(loader, ttl=60, keep=lambda value: value.endswith("v2"))
+    assert cache.get("k") == "k-v1"
+    assert cache.get("k") == "k-v2"
+    assert cache.get("k") == "k-v2" and loader.calls == 2
+
+
+def test_news_index_follows_cache_refreshes(monkeypatch):
+    frames = [
+        pd.DataFrame({"ar_id": [2, 1], "ar_head": ["Minimum wage rises", "Typhoon nears"], "ar_desc": ["", ""]}),
+        pd.DataFrame({"ar_id": [3, 2], "ar_head": ["Election results", "Minimum wage rises"], "ar_desc": ["", ""]}),
+    ]
+    cache = SWRCache(lambda key: frames.pop(0), ttl=0)
+    monkeypatch.setattr(news_cache, "_news_cache", cache)
+    monkeypatch.setattr(news_cache, "_indexes", {})
+
+    first = news_cache.get_news_index(1, 1)
+    assert first.search(query="typhoon")["ar_id"].tolist() == [1]
+    assert news_cache.get_news_index(1, 1) is first  # stale: served as is while a refresh starts
+    assert wait_for(lambda: not frames)
+    assert wait_for(lambda: news_cache.get_news_index(1, 1) is not first)
+
+    refreshed = news_cache.get_news_index(1, 1)
+    assert refreshed.search(query="typhoon").empty
+    assert refreshed.search(query="election")["ar_id"].tolist() == [3]
+    assert first.search(query="typhoon")["ar_id"].tolist() == [1]  # a published index is never modified
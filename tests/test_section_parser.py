@@ -0,0 +1,58 @@
+import re
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from coding.section_parser import benchmark, parse_job_content
+
+BUNDLED = Path(__file__).parent.parent / "pages" / "104_intern.csv"
+THRESHOLD = 0.7  # FAST_PATH_THRESHOLD of pages/job_cleaner.py
+# the regex job_cleaner used before the section parser (still its regex_fallback)
+OLD_RE = re.compile(r"([(（]?\s*1[.)）]\s*.*?)(?:\n\s*\n|$)", flags=re.S)
+
+
+def squash(text):
+    return re.sub(r"\s+", "", text)
+
+
+def test_bracketed_header_section_ends_at_the_next_header():
+    desc = "【公司亮點】\n1. 成長快速\n\n【工作內容】\n1. 資料建檔\n2. 報表製作\n\n【上班時間】\n09:00-18:00"
+    content, confidence = parse_job_content(desc)
+    assert content == "1. 資料建檔\n2. 報表製作"
+    assert confidence >= THRESHOLD
+
+
+def test_inline_header_and_english_header():
+    assert parse_job_content("工作內容：協助門市銷售與商品陳列\n薪資：面議")[0] == "協助門市銷售與商品陳列"
+    content, _ = parse_job_content("Responsibilities:\n- Build dashboards\n- Clean data\nRequirements:\n- SQL")
+    assert content == "- Build dashboards\n- Clean data"
+
+
+def test_no_header_means_no_fast_path():
+    assert parse_job_content("歡迎對行銷有興趣的同學加入我們") == ("", 0.0)
+    assert parse_job_content(float("nan")) == ("", 0.0)
+
+
+@pytest.mark.skipif(not BUNDLED.exists(), reason="bundled 104 CSV not present")
+def test_agrees_with_the_old_regex_where_both_find_the_same_section():
+    descs = pd.read_csv(BUNDLED, dtype=str, keep_default_na=False)["description"]
+    compared = 0
+    for desc in descs:
+        content, confidence = parse_job_content(desc)
+        match = OLD_RE.search(desc)
+        if confidence < THRESHOLD or not match:
+            continue
+        old = match.group(1).strip()
+        if old.splitlines()[0].strip() != content.splitlines()[0].strip():
+            continue  # the old regex grabbed another numbered list (e.g. 公司亮點)
+        compared += 1
+        assert squash(old) in squash(content) or squash(content) in squash(old)
+    assert compared >= 10
+
+
+@pytest.mark.skipif(not BUNDLED.exists(), reason="bundled 104 CSV not present")
+def test_fast_path_covers_a_good_share_of_the_bundled_rows():
+    result = benchmark(str(BUNDLED), THRESHOLD)
+    assert result["hit_rate"] >= 0.3
+    assert result["fast_path_hits"] <= result["section_found"] <= result["rows"]
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from coding.seen_index import SeenIndex, read_csv_str, record_digest, select_changed, upsert_csv
+
+KEY_COLS = ["jobNo"]
+RECORDS = [
+    {"jobNo": "1", "salaryLow": 200, "landmark": "捷運港墘站", "link": {"job": "//www.104.com.tw/job/1"}},
+    {"jobNo": "2", "salaryLow": None, "landmark": ""},  # no salaryLow -> the column becomes float
+    {"jobNo": "3", "salaryLow": 25000},                 # no landmark / link keys at all
+]
+
+
+def test_api_records_and_csv_rows_hash_the_same(tmp_path):
+    csv_path = str(tmp_path / "jobs.csv")
+    upsert_csv(csv_path, pd.DataFrame(RECORDS), KEY_COLS)
+
+    rows = read_csv_str(csv_path).to_dict(orient="records")
+    assert rows[0]["salaryLow"] == "200"
+    assert [record_digest(row) for row in rows] == [record_digest(record) for record in RECORDS]
+
+
+def test_rescrape_of_unchanged_records_selects_nothing(tmp_path):
+    csv_path = str(tmp_path / "jobs.csv")
+    upsert_csv(csv_path, pd.DataFrame(RECORDS), KEY_COLS)
+    seen = SeenIndex.from_csv(str(tmp_path / "seen.json"), csv_path, KEY_COLS)
+
+    assert select_changed(seen, RECORDS, KEY_COLS) == []
+    changed = dict(RECORDS[2], salaryLow=26000)
+    assert select_changed(seen, [changed], KEY_COLS) == [changed]
+
+
+def test_excluded_fields_do_not_count_as_a_change(tmp_path):
+    csv_path = str(tmp_path / "jobs.csv")
+    upsert_csv(csv_path, pd.DataFrame(RECORDS), KEY_COLS)
+    seen = SeenIndex.from_csv(str(tmp_path / "seen.json"), csv_path, KEY_COLS, exclude=["salaryLow"])
+
+    assert select_changed(seen, [dict(RECORDS[2], salaryLow=26000)], KEY_COLS, exclude=["salaryLow"]) == []
+    moved = dict(RECORDS[2], landmark="捷運市府站")
+    assert select_changed(seen, [moved], KEY_COLS, exclude=["salaryLow"]) == [moved]
@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from coding.skill_index import SkillIndex, parse_skill_query, parse_tags
+
+FRAME = pd.DataFrame({"job_tags": [
+    "['Python', 'SQL']",
+    "['python', 'Machine Learning']",
+    "['C++', 'SQL']",
+    "['R&D', 'PyTorch']",
+    "",
+]})
+
+
+@pytest.fixture
+def index():
+    return SkillIndex.from_frame(FRAME)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Python and SQL", (["python", "sql"], "and")),
+    ("Python & SQL", (["python", "sql"], "and")),
+    ("Python + SQL", (["python", "sql"], "and")),
+    ("Python, SQL", (["python", "sql"], "or")),
+    ("Python、SQL", (["python", "sql"], "or")),
+    ("Python or SQL", (["python", "sql"], "or")),
+    ("C++", (["c++"], "or")),
+    ("R&D", (["r&d"], "or")),
+    ("C++ and R&D", (["c++", "r&d"], "and")),
+])
+def test_parse_skill_query(text, expected):
+    assert parse_skill_query(text) == expected
+
+
+def test_parse_tags_handles_lists_strings_and_blanks():
+    assert parse_tags("['Python', ' Machine  Learning ']") == ["python", "machine learning"]
+    assert parse_tags("Python, SQL") == ["python", "sql"]
+    assert parse_tags(float("nan")) == [] and parse_tags("") == []
+
+
+def test_or_ranks_rows_matching_more_skills_first(index):
+    assert index.query(["python", "sql"], mode="or") == [(0, 2), (1, 1), (2, 1)]
+
+
+def test_and_keeps_only_rows_matching_every_skill(index):
+    assert index.query(["python", "sql"], mode="and") == [(0, 2)]
+    assert index.query(["python", "pytorch"], mode="and") == []
+
+
+def test_prefix_lookup_matches_tags_starting_with_the_skill(index):
+    assert index.lookup("py") == []
+    assert sorted(index.lookup("py", prefix=True)) == [0, 1, 3]
+
+
+def test_tags_with_symbols_stay_whole(index):
+    assert index.query(*parse_skill_query("C++")) == [(2, 1)]
+    assert index.query(*parse_skill_query("R&D")) == [(3, 1)]
+    assert index.lookup("c") == []
@@ -0,0 +1,23 @@
+import time
+
+import pandas as pd
+
+from coding.stream_clean import clean_stream, read_output
+
+
+def test_read_output_restores_input_order(tmp_path):
+    frame = pd.DataFrame({"jobName": [f"job{i}" for i in range(6)], "description": [f"desc {i}" for i in range(6)]})
+    chunks = (frame.iloc[i:i + 3] for i in range(0, 6, 3))
+
+    def work(unit):
+        idx, desc = unit[0]
+        time.sleep(0.02 * (6 - idx))  # earlier rows finish last
+        return {idx: desc.upper()}
+
+    out_path = str(tmp_path / "out.csv")
+    clean_stream(chunks, out_path, lambda pending: ({}, [[item] for item in pending]), work, window=6, max_workers=6)
+
+    assert pd.read_csv(out_path, encoding="utf-8-sig")["rowIndex"].tolist() != list(range(6))
+    out = read_output(out_path)
+    assert out["rowIndex"].tolist() == list(range(6))
+    assert out["jobContent"].tolist() == [f"DESC {i}" for i in range(6)]
@@ -0,0 +1,71 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from coding.term_matrix import TermMatrix, tokenize
+
+TEXTS = {
+    "1": "python sql python dashboard",
+    "2": "python excel report",
+    "3": "sql report report https://example.com/python",
+    "4": "",
+}
+
+
+@pytest.fixture
+def matrix():
+    return TermMatrix.build(TEXTS, TEXTS.values())
+
+
+def test_tokenize_drops_stopwords_numbers_and_urls():
+    assert tokenize("The Python and SQL 2025 see www.example.com") == ["python", "sql", "see"]
+    assert tokenize(None) == []
+
+
+def test_rows_hold_the_counts_of_each_job(matrix):
+    assert len(matrix) == 4
+    for key, text in TEXTS.items():
+        assert matrix.frequencies(matrix.row_of(key)) == Counter(tokenize(text))
+    assert matrix.rows_of(["3", "missing", "1"]).tolist() == [2, 0]
+
+
+def test_save_and_load_round_trip(matrix, tmp_path):
+    path = str(tmp_path / "terms.npz")
+    matrix.save(path)
+    loaded = TermMatrix.load(path)
+    assert loaded.keys.tolist() == matrix.keys.tolist()
+    assert all(loaded.frequencies(i) == matrix.frequencies(i) for i in range(len(matrix)))
+
+
+def brute_force(matrix, rows, weighting="tf"):
+    totals = Counter()
+    for row in rows:
+        totals.update(matrix.frequencies(row))
+    if weighting == "tfidf":
+        idf = dict(zip(matrix.vocab.tolist(), matrix.idf.tolist()))
+        return {term: count * idf[term] for term, count in totals.items()}
+    return dict(totals)
+
+
+@pytest.mark.parametrize("weighting", ["tf", "tfidf"])
+def test_aggregate_matches_summing_the_rows(matrix, weighting):
+    rows = matrix.rows_of(["1", "3", "4"])
+    weights = matrix.aggregate(rows, weighting=weighting)
+    expected = brute_force(matrix, rows, weighting)
+    assert weights.keys() == expected.keys()
+    assert all(weights[t] == pytest.approx(expected[t]) for t in expected)
+    assert list(weights.values()) == sorted(weights.values(), reverse=True)
+
+
+def test_tfidf_lowers_terms_found_in_most_jobs(matrix):
+    rows = matrix.rows_of(["1", "2", "3"])
+    tf, tfidf = matrix.aggregate(rows), matrix.aggregate(rows, weighting="tfidf")
+    assert tf["python"] > tf["dashboard"]
+    assert tfidf["python"] / tf["python"] < tfidf["dashboard"] / tf["dashboard"]
+
+
+def test_aggregate_keeps_the_top_terms(matrix):
+    rows = np.arange(len(matrix))
+    assert set(matrix.aggregate(rows, top=2)) == {"python", "report"}  # 3 each; sql has 2
+    assert matrix.aggregate([]) == {}
@@ -0,0 +1,49 @@
+import logging
+
+from coding.batch_extract import estimate_tokens
+from coding.token_budget import fit_lines, fit_records, truncate_text
+
+RECORDS = [{"jobName": f"職缺{i}", "description": "負責資料分析" * 20, "salaryLow": 200 + i, "note": ""}
+           for i in range(10)]
+
+
+def test_truncate_text_keeps_short_text_and_cuts_long_text_within_the_limit():
+    assert truncate_text("short text", 10) == "short text"
+
+    text = "資料分析" * 50
+    cut = truncate_text(text, 20)
+    assert cut.endswith("…") and text.startswith(cut[:-1])
+    assert estimate_tokens(cut) <= 20
+
+
+def test_fit_records_compacts_and_stops_at_the_budget():
+    kept, report = fit_records(RECORDS, "jobs", fields=["jobName", "description", "note"],
+                               budget=150, max_field_tokens=30)
+    assert 1 <= len(kept) < len(RECORDS)
+    assert [r["jobName"] for r in kept] == [f"職缺{i}" for i in range(len(kept))]
+    assert all("note" not in r and estimate_tokens(r["description"]) <= 30 for r in kept)
+    assert (report.total, report.returned) == (len(RECORDS), len(kept)) and report.tokens <= 150
+
+
+def test_fit_records_respects_max_items_and_keeps_at_least_one():
+    kept, report = fit_records(RECORDS, "jobs", max_items=3)
+    assert len(kept) == 3 and report.returned == 3
+
+    kept, _ = fit_records(RECORDS, "jobs", budget=1)
+    assert len(kept) == 1
+
+
+def test_fit_lines_respects_budget_and_max_items():
+    lines = [f"第 {i} 行：" + "技能" * 30 for i in range(10)]
+    text, report = fit_lines(lines, "context", budget=100, max_line_tokens=40)
+    assert 1 <= report.returned < 10 and report.tokens <= 100
+    assert text.splitlines()[0].startswith("第 0 行")
+
+    text, report = fit_lines(lines, "context", max_items=2)
+    assert len(text.splitlines()) == 2 and report.total == 10
+
+
+def test_report_is_logged_at_info(caplog):
+    with caplog.at_level(logging.INFO, logger="coding.token_budget"):
+        fit_lines(["a", "b"], "context", max_items=1)
+    assert "context: 1/2 items" in caplog.text